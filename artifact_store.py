@@ -0,0 +1,223 @@
+"""
+Artifact Store Module
+Screenshot dan dump HTML saat gagal, ditulis di background dengan batas
+retensi.
+
+Di jalur retry hanya byte screenshot (JPEG, lebih cepat di-encode Chromium
+daripada PNG) dan HTML page yang diambil; kompresi gzip HTML dan penulisan
+ke disk dilakukan worker thread. Antrean dibatasi: jika penuh, artefak
+dibuang dengan warning daripada menahan login.
+
+Struktur direktori:
+
+    artifacts/<run_id>/<akun>/<site>_<nama>[_attemptN].jpg
+    artifacts/<run_id>/<akun>/<site>_<nama>[_attemptN].html.gz
+
+Retensi per direktori run (run yang sedang berjalan tidak pernah dihapus):
+umur maksimum, jumlah run maksimum, lalu total ukuran maksimum (run tertua
+dihapus lebih dulu).
+
+Environment:
+    ARTIFACTS=0               nonaktifkan penyimpanan artefak
+    ARTIFACT_DIR=artifacts
+    ARTIFACT_MAX_RUNS=50
+    ARTIFACT_MAX_AGE_DAYS=14
+    ARTIFACT_MAX_MB=200
+"""
+
+import atexit
+import gzip
+import logging
+import os
+import queue
+import re
+import secrets
+import shutil
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+JPEG_QUALITY = 70
+QUEUE_SIZE = 64
+RETENTION_INTERVAL = 60  # Detik minimum antar pengecekan retensi
+
+_STOP = object()
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def new_run_id():
+    """ID run: waktu mulai + sufiks acak (urut secara leksikal)"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(2)}"
+
+
+def _safe_name(value):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(value)) or 'default'
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ArtifactStore:
+    """Antrean + worker penulis artefak dengan retensi per run"""
+
+    def __init__(self, root='artifacts', max_runs=50, max_age_days=14, max_bytes=200 * 1024 * 1024):
+        self.root = root
+        self.max_runs = max_runs
+        self.max_age_s = max_age_days * 86400
+        self.max_bytes = max_bytes
+        self.saved = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self.removed_runs = 0
+        self._active_runs = set()
+        self._runs_lock = threading.Lock()
+        self._last_retention = 0.0
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._closed = False
+        os.makedirs(root, exist_ok=True)
+        self._worker = threading.Thread(target=self._run, name='artifact-store', daemon=True)
+        self._worker.start()
+
+    def save(self, run_id, account, name, screenshot=None, html=None, attempt=None):
+        """Antrekan artefak (tidak menunggu kompresi/penulisan)
+
+        Args:
+            run_id: ID run (lihat new_run_id)
+            account: ID akun
+            name: Nama artefak, mis. 'starasn_login_failed'
+            screenshot: Byte JPEG dari page.screenshot(type='jpeg')
+            html: Isi page.content()
+            attempt: Nomor attempt (opsional, masuk ke nama file)
+        """
+        if self._closed:
+            return
+        with self._runs_lock:
+            self._active_runs.add(run_id)
+        item = (run_id, account, name, screenshot, html, attempt)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Antrean artefak penuh, artefak {name} dibuang")
+
+    def end_run(self, run_id):
+        """Run selesai: direktorinya boleh dihapus oleh retensi berikutnya"""
+        with self._runs_lock:
+            self._active_runs.discard(run_id)
+
+    def _write(self, run_id, account, name, screenshot, html, attempt):
+        directory = os.path.join(self.root, _safe_name(run_id), _safe_name(account))
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, _safe_name(name) + (f"_attempt{attempt}" if attempt is not None else ''))
+        paths = []
+        if screenshot is not None:
+            with open(base + '.jpg', 'wb') as f:
+                f.write(screenshot)
+            self.bytes_written += len(screenshot)
+            paths.append(base + '.jpg')
+        if html is not None:
+            data = gzip.compress(html.encode('utf-8'), compresslevel=6)
+            with open(base + '.html.gz', 'wb') as f:
+                f.write(data)
+            self.bytes_written += len(data)
+            paths.append(base + '.html.gz')
+        self.saved += 1
+        logger.info(f"Artefak disimpan: {', '.join(paths)}")
+
+    def _run(self):
+        self.enforce_retention()
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            try:
+                self._write(*item)
+            except Exception as e:
+                logger.error(f"Gagal menyimpan artefak {item[2]}: {e}")
+            if time.monotonic() - self._last_retention >= RETENTION_INTERVAL:
+                self.enforce_retention()
+        self.enforce_retention()
+
+    def enforce_retention(self):
+        """Hapus run lama berdasarkan umur, jumlah run, lalu total ukuran"""
+        self._last_retention = time.monotonic()
+        try:
+            runs = []
+            for entry in os.scandir(self.root):
+                if entry.is_dir():
+                    runs.append((entry.stat().st_mtime, entry.name, entry.path))
+        except OSError as e:
+            logger.warning(f"Gagal membaca direktori artefak {self.root}: {e}")
+            return
+        runs.sort(reverse=True)  # terbaru dulu
+
+        now = time.time()
+        with self._runs_lock:
+            active = {_safe_name(run_id) for run_id in self._active_runs}
+        keep, remove = [], []
+        for mtime, name, path in runs:
+            if name in active:
+                keep.append((name, path))
+            elif now - mtime > self.max_age_s or len(keep) >= self.max_runs:
+                remove.append(path)
+            else:
+                keep.append((name, path))
+
+        sizes = [(name, path, _dir_size(path)) for name, path in keep]
+        total = sum(size for _, _, size in sizes)
+        for name, path, size in reversed(sizes):  # tertua dulu
+            if total <= self.max_bytes:
+                break
+            if name in active:
+                continue
+            remove.append(path)
+            total -= size
+
+        for path in remove:
+            shutil.rmtree(path, ignore_errors=True)
+            self.removed_runs += 1
+        if remove:
+            logger.info(f"Retensi artefak: {len(remove)} run lama dihapus, total {total / 1024 / 1024:.1f} MB")
+
+    def close(self, timeout=30):
+        """Tulis sisa antrean lalu hentikan worker"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._worker.join(timeout)
+
+    def stats(self):
+        return {'saved': self.saved, 'dropped': self.dropped, 'queued': self._queue.qsize(),
+                'kb_written': round(self.bytes_written / 1024), 'removed_runs': self.removed_runs}
+
+
+def get_artifact_store():
+    """ArtifactStore bersama (satu per proses per direktori), None jika ARTIFACTS=0"""
+    if os.getenv('ARTIFACTS', '1') != '1':
+        return None
+    root = os.getenv('ARTIFACT_DIR', 'artifacts')
+    key = os.path.abspath(root)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ArtifactStore(
+                root,
+                max_runs=int(os.getenv('ARTIFACT_MAX_RUNS', '50')),
+                max_age_days=float(os.getenv('ARTIFACT_MAX_AGE_DAYS', '14')),
+                max_bytes=int(float(os.getenv('ARTIFACT_MAX_MB', '200')) * 1024 * 1024),
+            )
+            atexit.register(store.close)
+        return store
@@ -0,0 +1,405 @@
+"""
+Async Automation Engine
+Menjalankan alur login + presensi setiap site secara bersamaan dengan
+Playwright async API, masing-masing di browser context sendiri.
+
+Dengan engine sync, Star-ASN baru mulai setelah Pusaka selesai (waktu run =
+jumlah semua site). Di sini setiap site berjalan sebagai task asyncio,
+sehingga waktu run = site paling lama. Setiap site punya timeout sendiri dan
+error satu site tidak mempengaruhi site lain. Hasil (tuple per site) dan
+logika notifikasi sama dengan WebAutomation.run_automation.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError, async_playwright
+
+from artifact_store import JPEG_QUALITY
+from captcha_capture import CaptchaCapture
+from page_waits import (ACTION_TIMEOUT, CAPTCHA_LOADED_JS, FORM_TIMEOUT, LOGIN_RESPONSE_TIMEOUT,
+                        PUSAKA_PRESENCE_READY, REDIRECT_TIMEOUT, SHORT_TIMEOUT, STARASN_DASHBOARD_READY,
+                        is_action_response, is_login_response)
+from presence_probe import decide_pusaka, decide_starasn, probe_async, probe_selector
+from profiling import profile_phase
+from site_config import SESSION_CHECKS
+from site_flow import (ATTEMPT_RETRY, ATTEMPT_SUCCESS, MAX_CAPTCHA_ATTEMPTS, STEP_CHECK, STEP_DISCARD, STEP_LOGIN,
+                       STEP_REUSE, STEP_SAVE, announce_presence, captcha_text_valid, decode_captcha,
+                       judge_login_attempt, logged_in, presence_artifact, read_login_response, session_steps,
+                       should_prefetch_captcha, should_recheck_session, should_wait_redirect, submit_outcome)
+from web_automation import WebAutomation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SITE_TIMEOUT = 300  # detik per site (login + presensi)
+
+
+class AsyncWebAutomation(WebAutomation):
+    """WebAutomation dengan eksekusi site paralel di atas asyncio"""
+
+    def __init__(self, headless=True, site_timeout=DEFAULT_SITE_TIMEOUT, account=None,
+                 captcha_solver=None):
+        super().__init__(headless=headless, account=account, captcha_solver=captcha_solver)
+        self.site_timeout = site_timeout
+
+    async def _save_artifacts_async(self, page, site_key, name, attempt=None, html=True):
+        """Versi async _save_artifacts (screenshot dan HTML diambil bersamaan)"""
+        if self.artifacts is None:
+            return
+        try:
+            captures = [page.screenshot(type='jpeg', quality=JPEG_QUALITY)]
+            if html:
+                captures.append(page.content())
+            screenshot, *content = await asyncio.gather(*captures)
+        except Exception as e:
+            logger.warning(f"Gagal mengambil artefak {site_key}_{name}: {e}")
+            return
+        self.artifacts.save(self.run_id, self.account_id or 'default', f'{site_key}_{name}',
+                            screenshot, content[0] if content else None, attempt)
+
+    async def login_pusaka_async(self, page):
+        """Login ke pusaka-v3.kemenag.go.id"""
+        creds = self.credentials['pusaka']
+        labels = self._labels('pusaka')
+
+        logger.info(f"Membuka Pusaka: {creds['login_url']}")
+        async with self.metrics.span('goto', **labels):
+            await page.goto(creds['login_url'], timeout=30000, wait_until='domcontentloaded')
+            async with self.wait_timer.phase('pusaka.form_ready', 2000):
+                await page.wait_for_selector("input[placeholder='Username']", state='visible', timeout=FORM_TIMEOUT)
+
+        logger.info("Mengisi form login Pusaka...")
+        async with self.metrics.span('form_fill', **labels):
+            await page.fill("input[placeholder='Username']", creds['username'])
+            await page.fill("input[placeholder='Password']", creds['password'])
+
+        async with self.metrics.span('login_submit', **labels) as span:
+            await page.click("button.btn.bg-indigo-400")
+            async with self.wait_timer.phase('pusaka.login_redirect', 3000):
+                try:
+                    await page.wait_for_url(lambda url: logged_in('pusaka', url), timeout=LOGIN_RESPONSE_TIMEOUT)
+                except PlaywrightTimeoutError:
+                    span.set(outcome='timeout')
+
+        if logged_in('pusaka', page.url):
+            logger.info("✅ Login Pusaka berhasil!")
+            return True
+
+        logger.error("❌ Login Pusaka gagal - masih di halaman login")
+        await self._save_artifacts_async(page, 'pusaka', 'login_failed')
+        return False
+
+    async def _open_starasn_login_async(self, page, creds):
+        """Buka halaman login Star-ASN dan tutup modal"""
+        async with self.metrics.span('goto', **self._labels('starasn')):
+            await page.goto(creds['login_url'], timeout=30000, wait_until='domcontentloaded')
+            async with self.wait_timer.phase('starasn.form_ready', 2000):
+                await page.wait_for_selector("input#username", state='visible', timeout=FORM_TIMEOUT)
+                try:
+                    await page.wait_for_function(CAPTCHA_LOADED_JS, timeout=SHORT_TIMEOUT)
+                except PlaywrightTimeoutError:
+                    pass
+
+        # Close any modal that appears
+        try:
+            close_btn = page.locator("button.btn-close, .modal-header button[aria-label='Close']")
+            if await close_btn.count() > 0:
+                await close_btn.first.click()
+                async with self.wait_timer.phase('starasn.modal_close', 500):
+                    await close_btn.first.wait_for(state='hidden', timeout=SHORT_TIMEOUT)
+        except Exception:
+            pass
+
+    async def login_starasn_async(self, page):
+        """Login ke star-asn.kemenimipas.go.id dengan CAPTCHA solving (lihat login_starasn)"""
+        creds = self.credentials['starasn']
+        capture = CaptchaCapture()
+        capture.attach(page)
+        reload = True
+        labels = self._labels('starasn')
+
+        try:
+            for attempt in range(MAX_CAPTCHA_ATTEMPTS):
+                self.login_attempts['starasn'] = attempt + 1
+                if reload:
+                    logger.info(f"Membuka Star-ASN: {creds['login_url']} (Attempt {attempt + 1})")
+                    await self._open_starasn_login_async(page, creds)
+                    reload = False
+                    captcha_bytes = await capture.take_async(page)
+                else:
+                    logger.info(f"Meminta CAPTCHA baru Star-ASN (Attempt {attempt + 1})")
+                    async with self.wait_timer.phase('starasn.captcha_refresh', 2000):
+                        captcha_bytes = await capture.next_async(page)
+
+                img = decode_captcha(captcha_bytes)
+                if img is None:
+                    reload = True
+                    continue
+
+                # OCR memblokir CPU: jalankan di thread agar site lain tetap jalan
+                logger.info("Mendeteksi CAPTCHA, mencoba solve dengan OCR...")
+                captcha_text = await asyncio.to_thread(self.captcha_solver.solve_image, img)
+                if not captcha_text_valid(captcha_text):
+                    logger.warning("OCR gagal mendapatkan teks yang valid, minta captcha baru...")
+                    await capture.prefetch_async(page)
+                    continue
+
+                logger.info(f"CAPTCHA OCR result: {captcha_text}")
+                async with self.metrics.span('form_fill', **labels):
+                    await page.fill("input#username", creds['username'])
+                    await page.fill("input#password-input", creds['password'])
+                    await page.fill("input#kv-captcha", captcha_text)
+
+                outcome, message = None, ''
+                async with self.wait_timer.phase('starasn.login_response', 3000), \
+                        self.metrics.span('login_submit', **labels) as submit_span:
+                    try:
+                        async with page.expect_response(is_login_response, timeout=LOGIN_RESPONSE_TIMEOUT) as response_info:
+                            await page.click("button.btn-primary.d-grid.w-100")
+                        response = await response_info.value
+                        try:
+                            payload = await response.json()
+                        except Exception:
+                            payload = None
+                        outcome, message = read_login_response(response.status, payload)
+                        if should_prefetch_captcha(outcome):
+                            await capture.prefetch_async(page)
+                        elif should_wait_redirect(outcome):
+                            await page.wait_for_url(lambda url: logged_in('starasn', url), timeout=REDIRECT_TIMEOUT)
+                    except PlaywrightTimeoutError:
+                        reload = True
+                    submit_span.set(outcome=submit_outcome(outcome, reload))
+
+                session_valid = False
+                if should_recheck_session(page.url, outcome):
+                    session_valid = await self._recheck_login_session_async(page)
+                verdict = judge_login_attempt(page.url, outcome, session_valid)
+                artifact = self._settle_login_attempt(verdict, img, outcome, message, attempt)
+                if artifact is not None:
+                    await self._save_artifacts_async(page, 'starasn', **artifact)
+                if verdict != ATTEMPT_RETRY:
+                    return verdict == ATTEMPT_SUCCESS
+        finally:
+            capture.detach(page)
+            self._log_capture(capture)
+
+        self._login_starasn_exhausted()
+        return False
+
+    async def _recheck_login_session_async(self, page):
+        """Versi async WebAutomation._recheck_login_session"""
+        logger.warning("Login Star-ASN diterima server tapi redirect tidak selesai, mengecek sesi...")
+        if not await self._session_valid_async(page.context, 'starasn'):
+            return False
+        await page.goto(SESSION_CHECKS['starasn']['url'], timeout=30000, wait_until='domcontentloaded')
+        return True
+
+    @staticmethod
+    async def _click_and_wait_action_async(page, locator):
+        """Klik lalu tunggu respons submit dari server (ceiling ACTION_TIMEOUT)"""
+        try:
+            async with page.expect_response(is_action_response, timeout=ACTION_TIMEOUT):
+                await locator.click()
+        except PlaywrightTimeoutError:
+            logger.warning(f"Tidak ada respons server dalam {ACTION_TIMEOUT} ms setelah klik")
+
+    async def _presence_action_async(self, page, site_key, decision, phase_ms):
+        """Jalankan keputusan presensi: klik tombol yang ditandai probe (jika ada)"""
+        key, success, message = decision
+        if key is not None:
+            async with self.wait_timer.phase(f'{site_key}.presence_submit', phase_ms), \
+                    self.metrics.span('presence_click', **self._labels(site_key)):
+                await self._click_and_wait_action_async(page, page.locator(probe_selector(site_key, key)))
+        return key, success, message
+
+    async def do_presence_pusaka_async(self, page):
+        """Melakukan presensi di Pusaka"""
+        logger.info("Membuka halaman presensi...")
+        async with self.metrics.span('goto', **self._labels('pusaka')):
+            await page.goto("https://pusaka-v3.kemenag.go.id/profile/presence", timeout=30000)
+        async with self.wait_timer.phase('pusaka.presence_ready', 3000):
+            try:
+                await page.wait_for_selector(PUSAKA_PRESENCE_READY, timeout=FORM_TIMEOUT)
+            except PlaywrightTimeoutError:
+                pass
+
+        snapshot = await probe_async(page, 'pusaka', self.probe_stats)
+        decision = decide_pusaka(snapshot, datetime.now().hour)
+        announce_presence('pusaka', decision)
+        _, success, message = await self._presence_action_async(page, 'pusaka', decision, 3000)
+        artifact = presence_artifact('pusaka', decision, snapshot)
+        if artifact is not None:
+            await self._save_artifacts_async(page, 'pusaka', artifact, html=False)
+        return success, message
+
+    async def do_presence_starasn_async(self, page):
+        """Melakukan presensi di Star-ASN dashboard"""
+        logger.info("Mengecek status presensi Star-ASN...")
+        async with self.wait_timer.phase('starasn.dashboard_ready', 3000):
+            try:
+                await page.wait_for_selector(STARASN_DASHBOARD_READY, timeout=FORM_TIMEOUT)
+            except PlaywrightTimeoutError:
+                pass
+
+        snapshot = await probe_async(page, 'starasn', self.probe_stats)
+        decision = decide_starasn(snapshot, datetime.now().hour)
+        announce_presence('starasn', decision)
+        _, success, message = await self._presence_action_async(page, 'starasn', decision, 5000)
+        artifact = presence_artifact('starasn', decision, snapshot)
+        if artifact is not None:
+            await self._save_artifacts_async(page, 'starasn', artifact, html=False)
+        return success, message
+
+    async def _session_valid_async(self, context, site_key):
+        """Cek sesi lewat request context (cookie sama dengan page), tanpa render"""
+        check = SESSION_CHECKS[site_key]
+        try:
+            response = await context.request.get(check['url'], max_redirects=0, timeout=10000)
+            return response.status == 200 and (check['marker'] is None or check['marker'] in await response.text())
+        except Exception as e:
+            logger.warning(f"Cek sesi {site_key} gagal: {e}")
+            return False
+
+    async def _login_site_async(self, context, page, site_key, restored, login):
+        """Versi async WebAutomation._login_site / _reuse_or_login (langkah dari session_steps)"""
+        steps = session_steps(self.session_store is not None, restored)
+        start = time.perf_counter()
+        result = None
+        while True:
+            try:
+                step = steps.send(result)
+            except StopIteration as done:
+                return done.value
+            result = None
+            if step == STEP_CHECK:
+                result = await self._session_valid_async(context, site_key)
+                if result and SESSION_CHECKS[site_key]['open_page']:
+                    await page.goto(SESSION_CHECKS[site_key]['url'], timeout=30000, wait_until='domcontentloaded')
+            elif step == STEP_REUSE:
+                self._session_reused(site_key, start)
+            elif step == STEP_DISCARD:
+                self._session_discarded(site_key)
+                await context.clear_cookies()
+            elif step == STEP_LOGIN:
+                start = self._session_login_started(site_key)
+                result = await self._timed_login_async(site_key, login, page)
+            elif step == STEP_SAVE:
+                self._session_saved(site_key, start, await context.storage_state())
+
+    async def _timed_login_async(self, site_key, login, page):
+        """Versi async WebAutomation._timed_login"""
+        self.login_attempts.pop(site_key, None)
+        async with self.metrics.span('login', **self._labels(site_key)) as span, \
+                profile_phase(f'page.{site_key}.login'):
+            ok = await login(page)
+            span.set(outcome='ok' if ok else 'failed', attempts=self.login_attempts.pop(site_key, 1))
+        return ok
+
+    async def _run_browser_site(self, browser, site_key):
+        """Login + presensi satu site di context sendiri"""
+        if site_key == 'pusaka':
+            name = 'Pusaka'
+            login, presence = self.login_pusaka_async, self.do_presence_pusaka_async
+        else:
+            name = 'Star-ASN'
+            login, presence = self.login_starasn_async, self.do_presence_starasn_async
+
+        state = self.session_store.load(site_key, self.account_id) if self.session_store else None
+        context = await browser.new_context(**self._context_options(self.coords[site_key]), storage_state=state)
+        if site_key in self.route_filters:
+            await self.route_filters[site_key].attach_async(context)
+        try:
+            page = await context.new_page()
+            if not await self._login_site_async(context, page, site_key, state is not None, login):
+                return name, False, self._login_failed_message(site_key)
+            async with self.metrics.span('presence', **self._labels(site_key)) as span, \
+                    profile_phase(f'page.{site_key}.presence'):
+                success, msg = await presence(page)
+                span.set(outcome='ok' if success else 'failed')
+            return name, success, msg
+        finally:
+            await context.close()
+
+    async def _run_site(self, browser_factory, site_key, limiter=None):
+        """Jalankan satu site dengan timeout dan isolasi error
+
+        Args:
+            limiter: Rate limiter site (opsional, lihat fleet_runner.RateLimiter);
+                waktu tunggu limiter tidak dihitung ke timeout site
+        """
+        name = 'Pusaka' if site_key == 'pusaka' else 'Star-ASN'
+        if limiter is not None:
+            await limiter.acquire()
+        start = time.perf_counter()
+        # Thread alur HTTP tidak ikut berhenti oleh wait_for, jadi diberi deadline sendiri
+        deadline = time.monotonic() + self.site_timeout
+
+        async def flow():
+            if site_key == 'starasn' and self.site_modes['starasn'] == 'http':
+                logger.info("--- Proses Star-ASN via HTTP (Lokasi: Samarinda) ---")
+                http_result = await asyncio.to_thread(self.run_starasn_http, deadline)
+                if http_result is not None:
+                    return (name, *http_result)
+            logger.info(f"--- Proses {name} (async) ---")
+            return await self._run_browser_site(await browser_factory(), site_key)
+
+        try:
+            return await asyncio.wait_for(flow(), timeout=self.site_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Error {name}: timeout setelah {self.site_timeout}s")
+            return name, False, f"Timeout setelah {self.site_timeout}s"
+        except Exception as e:
+            logger.error(f"Error {name}: {e}")
+            return name, False, str(e)
+        finally:
+            logger.info(f"{name} selesai dalam {time.perf_counter() - start:.1f}s")
+
+    async def run_sites(self, browser_factory, site_keys, limiters=None):
+        """Jalankan site bersamaan dengan browser dari browser_factory
+
+        Returns:
+            list: [(nama site, success, message)] sesuai urutan site_keys
+        """
+        limiters = limiters or {}
+        return list(await asyncio.gather(
+            *(self._run_site(browser_factory, key, limiters.get(key)) for key in site_keys)
+        ))
+
+    async def run_automation_async(self, site='all'):
+        """Jalankan semua site bersamaan, hasil sama dengan run_automation"""
+        site_keys = [s for s in ('pusaka', 'starasn') if site in ['all', s] and s in self.credentials]
+        start = time.perf_counter()
+
+        async with async_playwright() as p:
+            browser = None
+            launch_lock = asyncio.Lock()
+
+            async def browser_factory():
+                # Browser diluncurkan sekali, hanya jika ada site yang butuh
+                nonlocal browser
+                async with launch_lock:
+                    if browser is None:
+                        async with self.metrics.span('browser_launch', mode='cold'):
+                            browser = await p.chromium.launch(headless=self.headless)
+                return browser
+
+            try:
+                results = await self.run_sites(browser_factory, site_keys)
+            finally:
+                if browser is not None:
+                    await browser.close()
+
+        logger.info(f"Run async selesai dalam {time.perf_counter() - start:.1f}s")
+        return results
+
+    def _run_automation(self, site='all'):
+        """Jalankan otomatisasi async (dibungkus WebAutomation.run_automation)"""
+        try:
+            results = asyncio.run(self.run_automation_async(site))
+            return self._finish_run(results)
+        except Exception as e:
+            logger.error(f"Error automation: {str(e)}")
+            self.send_email_notification(success=False, message=str(e))
+            return []
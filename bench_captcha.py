@@ -0,0 +1,288 @@
+"""
+Benchmark CAPTCHA Solver
+Micro-benchmark preprocessing per strategi: implementasi lama (PIL + lambda
+per pixel) vs pipeline NumPy di captcha_preprocess.
+
+Benchmark OCR backend: latency per panggilan (per PSM) dan total solve_image
+untuk setiap engine di ocr_engines.
+
+Benchmark corpus offline: jalankan setiap strategi x engine (plus engine
+template dan pipeline solve_image lengkap) pada folder CAPTCHA berlabel,
+laporkan exact-match, akurasi per karakter, latency p50/p95/p99 dan
+perkiraan jumlah percobaan login per sukses.
+
+Contoh:
+    python bench_captcha.py preprocess
+    python bench_captcha.py preprocess --image debug_captcha_original.png --repeat 50
+    python bench_captcha.py ocr --repeat 10
+    python bench_captcha.py corpus captcha_corpus/ --json corpus_report.json --min-exact 0.6
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
+
+import captcha_preprocess as cp
+import ocr_engines
+from captcha_solver import CaptchaSolver
+from captcha_templates import TemplateEngine, load_labelled_samples
+
+MAX_LOGIN_ATTEMPTS = 7  # Sama dengan max_captcha_attempts di login_starasn
+
+CAPTCHA_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def synthetic_captcha(text=None, seed=0, size=(160, 50)):
+    """Buat gambar mirip CAPTCHA StarASN (teks hijau + noise) untuk benchmark"""
+    rnd = random.Random(seed)
+    if text is None:
+        text = ''.join(rnd.choice(CAPTCHA_ALPHABET) for _ in range(6))
+
+    img = Image.new('RGB', size, (235, 235, 235))
+    draw = ImageDraw.Draw(img)
+    for _ in range(size[0] * size[1] // 8):
+        x, y = rnd.randrange(size[0]), rnd.randrange(size[1])
+        shade = rnd.randint(150, 255)
+        draw.point((x, y), fill=(shade, rnd.randint(120, 200), shade))
+    for _ in range(4):
+        draw.line(
+            [(rnd.randrange(size[0]), rnd.randrange(size[1])) for _ in range(2)],
+            fill=(rnd.randint(80, 160),) * 3, width=1
+        )
+    step = size[0] // (len(text) + 1)
+    for i, ch in enumerate(text):
+        draw.text((step // 2 + i * step, rnd.randint(8, 22)), ch,
+                  fill=(rnd.randint(0, 40), rnd.randint(130, 190), rnd.randint(0, 40)))
+    return img
+
+
+# --- Implementasi lama (sebelum vectorization), disimpan untuk perbandingan ---
+
+def _legacy_base(img):
+    base_img = img.convert('L') if img.mode != 'L' else img.copy()
+    base_img = ImageEnhance.Contrast(base_img).enhance(2.0)
+    return ImageEnhance.Brightness(base_img).enhance(1.5)
+
+
+def _legacy_color_filter_2x(img):
+    rgb_img = img.convert('RGB')
+    rgb_img = rgb_img.resize((rgb_img.width * 2, rgb_img.height * 2), Image.Resampling.LANCZOS)
+    new_data = []
+    # Image.getdata() deprecated (Pillow 14); piksel tetap diiterasi satu per satu
+    for item in np.asarray(rgb_img).reshape(-1, 3).tolist():
+        if item[1] > item[0] + 30 and item[1] > item[2] + 30:
+            new_data.append(0)
+        else:
+            new_data.append(255)
+    out = Image.new('L', rgb_img.size)
+    out.putdata(new_data)
+    return out
+
+
+def _legacy_strategies(img):
+    base = _legacy_base(img)
+    return {
+        'color_filter_2x': lambda: _legacy_color_filter_2x(img),
+        'smooth': lambda: base.filter(ImageFilter.SMOOTH).point(lambda p: 255 if p > 128 else 0),
+        'threshold': lambda: base.point(lambda p: 255 if p > 128 else 0),
+        'median': lambda: base.filter(ImageFilter.MedianFilter(size=3)).point(lambda p: 255 if p > 128 else 0),
+        'denoise_2x': lambda: base.resize((base.width * 2, base.height * 2), Image.Resampling.LANCZOS)
+            .filter(ImageFilter.MedianFilter(size=3)).point(lambda p: 255 if p > 140 else 0),
+        'sharpen': lambda: base.filter(ImageFilter.SHARPEN).point(lambda p: 255 if p > 128 else 0),
+    }
+
+
+def _time_ms(fn, repeat):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+
+def bench_preprocess(img, repeat):
+    """Bandingkan waktu per strategi dan pastikan bitmap identik"""
+    legacy = _legacy_strategies(img)
+    captcha = cp.PreprocessedCaptcha(img)
+    captcha.base  # base dihitung sekali, sama seperti di solve_image
+
+    base_old, _ = _time_ms(lambda: _legacy_base(img), repeat)
+    base_new, _ = _time_ms(lambda: cp.PreprocessedCaptcha(img).base, repeat)
+
+    print(f"Image: {img.size[0]}x{img.size[1]} mode={img.mode}, repeat={repeat}")
+    print(f"{'strategy':<16}{'before ms':>12}{'after ms':>12}{'speedup':>10}  identical")
+    print(f"{'(base)':<16}{base_old:>12.3f}{base_new:>12.3f}{base_old / base_new:>9.1f}x  -")
+
+    all_identical = True
+    total_old = total_new = 0.0
+    for tag, build in cp.STRATEGIES:
+        old_ms, old_img = _time_ms(legacy[tag], repeat)
+        new_ms, new_arr = _time_ms(lambda: build(captcha), repeat)
+        identical = old_img.tobytes() == cp.to_image(new_arr).tobytes()
+        all_identical &= identical
+        total_old += old_ms
+        total_new += new_ms
+        print(f"{tag:<16}{old_ms:>12.3f}{new_ms:>12.3f}{old_ms / new_ms:>9.1f}x  {identical}")
+
+    total_old += base_old
+    total_new += base_new
+    print(f"{'total':<16}{total_old:>12.3f}{total_new:>12.3f}{total_old / total_new:>9.1f}x")
+    return all_identical
+
+
+def bench_ocr(img, repeat):
+    """Bandingkan latency per panggilan OCR dan total solve_image per engine"""
+    bitmap = cp.to_image(cp.STRATEGIES[0][1](cp.PreprocessedCaptcha(img)))
+
+    print(f"Image: {img.size[0]}x{img.size[1]}, repeat={repeat}")
+    print(f"{'engine':<14}{'init ms':>10}{'psm7 ms':>10}{'psm8 ms':>10}{'psm6 ms':>10}{'solve ms':>11}  result")
+    for name in ocr_engines.ENGINES:
+        if ocr_engines.get_engine(name) is None:
+            print(f"{name:<14}  (tidak tersedia)")
+            continue
+
+        # Ukur biaya inisialisasi engine baru (di luar cache proses)
+        start = time.perf_counter()
+        fresh = ocr_engines.ENGINES[name]()
+        init_ms = (time.perf_counter() - start) * 1000
+        fresh.close()
+
+        engine = ocr_engines.get_engine(name)
+        per_psm = [_time_ms(lambda psm=psm: engine.recognize(bitmap, psm), repeat)[0] for psm in (7, 8, 6)]
+
+        solver = CaptchaSolver(engine=name)
+        solve_ms, text = _time_ms(lambda: solver.solve_image(img), repeat)
+        print(f"{name:<14}{init_ms:>10.1f}" + ''.join(f"{ms:>10.1f}" for ms in per_psm)
+              + f"{solve_ms:>11.1f}  {text}")
+
+
+def char_accuracy(predicted, label):
+    """Fraksi karakter label yang tebakannya benar di posisi yang sama"""
+    if not predicted:
+        return 0.0
+    hits = sum(a == b for a, b in zip(predicted.upper(), label.upper()))
+    return hits / max(len(label), len(predicted))
+
+
+def summarize(predictions, latencies_ms, labels):
+    """Ringkas hasil satu baris (strategi/engine) benchmark corpus"""
+    exact = [p is not None and p.upper() == l.upper() for p, l in zip(predictions, labels)]
+    exact_rate = sum(exact) / len(labels)
+    latencies = np.asarray(latencies_ms)
+    return {
+        'samples': len(labels),
+        'exact_match': round(exact_rate, 4),
+        'char_accuracy': round(float(np.mean([char_accuracy(p, l) for p, l in zip(predictions, labels)])), 4),
+        'answered': sum(p is not None for p in predictions),
+        'latency_ms': {
+            'p50': round(float(np.percentile(latencies, 50)), 3),
+            'p95': round(float(np.percentile(latencies, 95)), 3),
+            'p99': round(float(np.percentile(latencies, 99)), 3),
+        },
+        # Percobaan login ~ distribusi geometrik dengan peluang sukses = exact_rate
+        'expected_attempts': round(1 / exact_rate, 2) if exact_rate else None,
+        'success_within_max_attempts': round(1 - (1 - exact_rate) ** MAX_LOGIN_ATTEMPTS, 4),
+    }
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def bench_corpus(folder, templates=None):
+    """Jalankan setiap strategi x engine pada corpus berlabel"""
+    samples = list(load_labelled_samples(folder))
+    if not samples:
+        raise SystemExit(f"Tidak ada gambar berlabel di {folder}")
+    labels = [label for _, label in samples]
+
+    rows = {}
+    if templates:
+        engine = TemplateEngine.from_file(templates)
+        runs = [_timed(lambda img=img: engine.solve(img)) for img, _ in samples]
+        rows['templates'] = summarize(*zip(*runs), labels)
+
+    for name in ocr_engines.ENGINES:
+        if ocr_engines.get_engine(name) is None:
+            continue
+        solver = CaptchaSolver(engine=name)
+        for tag, build in cp.STRATEGIES:
+            runs = [
+                _timed(lambda img=img: solver._run_strategy(cp.PreprocessedCaptcha(img), tag, build) or None)
+                for img, _ in samples
+            ]
+            rows[f"{name}/{tag}"] = summarize(*zip(*runs), labels)
+
+        full = CaptchaSolver(engine=name, templates=templates)
+        runs = [_timed(lambda img=img: full.solve_image(img)) for img, _ in samples]
+        rows[f"{name}/solve_image"] = summarize(*zip(*runs), labels)
+
+    return {'corpus': str(folder), 'samples': len(samples), 'results': rows}
+
+
+def print_corpus_table(report):
+    print(f"Corpus: {report['corpus']} ({report['samples']} gambar)")
+    print(f"{'strategy':<28}{'exact':>8}{'char':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'attempts':>10}")
+    for name, row in report['results'].items():
+        lat = row['latency_ms']
+        attempts = row['expected_attempts'] if row['expected_attempts'] is not None else '-'
+        print(f"{name:<28}{row['exact_match']:>8.1%}{row['char_accuracy']:>8.1%}"
+              f"{lat['p50']:>9.1f}{lat['p95']:>9.1f}{lat['p99']:>9.1f}{attempts:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CAPTCHA Solver')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_pre = sub.add_parser('preprocess', help='Benchmark preprocessing per strategi')
+    p_pre.add_argument('--image', help='Gambar CAPTCHA (default: gambar sintetis)')
+    p_pre.add_argument('--repeat', type=int, default=20)
+
+    p_ocr = sub.add_parser('ocr', help='Benchmark backend OCR')
+    p_ocr.add_argument('--image', help='Gambar CAPTCHA (default: gambar sintetis)')
+    p_ocr.add_argument('--repeat', type=int, default=5)
+
+    p_corpus = sub.add_parser('corpus', help='Benchmark akurasi/latency pada corpus berlabel')
+    p_corpus.add_argument('folder', help='Folder CAPTCHA berlabel (nama file = label)')
+    p_corpus.add_argument('--templates', help='Index template (captcha_templates.npy)')
+    p_corpus.add_argument('--json', help='Simpan laporan JSON ke file ini')
+    p_corpus.add_argument('--min-exact', type=float,
+                          help='Gagal (exit 1) jika exact-match solve_image di bawah nilai ini')
+    args = parser.parse_args()
+    # Benchmark tidak ikut menulis event/textfile metrics produksi (kecuali diminta)
+    os.environ.setdefault('METRICS_EVENTS_FILE', '')
+    os.environ.setdefault('METRICS_TEXTFILE', '')
+
+    if args.command == 'preprocess':
+        img = Image.open(args.image) if args.image else synthetic_captcha()
+        if not bench_preprocess(img, args.repeat):
+            raise SystemExit("Bitmap hasil vectorization berbeda dari implementasi lama!")
+    elif args.command == 'ocr':
+        img = Image.open(args.image) if args.image else synthetic_captcha()
+        bench_ocr(img, args.repeat)
+    elif args.command == 'corpus':
+        logging.disable(logging.INFO)
+        report = bench_corpus(args.folder, args.templates)
+        print_corpus_table(report)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Laporan JSON: {args.json}")
+        if args.min_exact is not None:
+            pipeline = [row for name, row in report['results'].items()
+                        if name.endswith('/solve_image') or name == 'templates']
+            best = max((row['exact_match'] for row in pipeline), default=0.0)
+            if best < args.min_exact:
+                raise SystemExit(f"Regresi: exact-match {best:.1%} < {args.min_exact:.1%}")
+
+
+if __name__ == "__main__":
+    main()
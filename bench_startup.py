@@ -0,0 +1,170 @@
+"""
+Benchmark Startup
+Waktu dari start proses sampai aksi pertama, diukur di proses Python baru
+(cache modul dingin seperti saat scheduler/cron menjalankan run):
+
+    import    import web_automation
+    http      + WebAutomation() + requests.Session siap (request pertama Star-ASN HTTP)
+    ocr       + WebAutomation() + engine OCR siap (CAPTCHA pertama)
+    browser   + WebAutomation() + Chromium diluncurkan (aksi browser pertama)
+
+Setiap target dijalankan --repeat kali; dilaporkan median dan minimum per
+fase plus total wall time proses (termasuk startup interpreter). Dengan
+--importtime, modul dengan waktu impor kumulatif terbesar ikut dilaporkan
+(python -X importtime).
+
+Contoh:
+    python bench_startup.py
+    python bench_startup.py --targets import http --repeat 10 --json startup_report.json
+    python bench_startup.py --targets import --max-import-ms 300
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+TARGETS = ('import', 'http', 'ocr', 'browser')
+
+# Dijalankan di proses anak; mencetak durasi fase (ms) sebagai JSON
+PROBE = r'''
+import json, sys, time
+target = sys.argv[1]
+phases = {}
+start = time.perf_counter()
+import web_automation
+phases['import'] = time.perf_counter() - start
+if target != 'import':
+    mark = time.perf_counter()
+    automation = web_automation.WebAutomation(headless=True)
+    phases['construct'] = time.perf_counter() - mark
+    mark = time.perf_counter()
+    if target == 'http':
+        web_automation.create_session().close()
+    elif target == 'ocr':
+        automation.captcha_solver.engine
+    elif target == 'browser':
+        with automation._browser():
+            pass
+    phases['first_action'] = time.perf_counter() - mark
+phases['total'] = time.perf_counter() - start
+print(json.dumps({name: round(value * 1000, 1) for name, value in phases.items()}))
+'''
+
+
+def _child_env():
+    """Environment anak: tanpa file log/metrics/artefak produksi"""
+    env = dict(os.environ)
+    env.update({
+        'LOG_FILE': os.devnull,
+        'LOG_LEVEL': 'WARNING',
+        'METRICS_EVENTS_FILE': '',
+        'METRICS_TEXTFILE': '',
+        'ARTIFACTS': '0',
+        'PYTHONDONTWRITEBYTECODE': '1',
+    })
+    return env
+
+
+def run_probe(target, cwd):
+    """Satu proses baru untuk target; (fase ms, wall ms proses)"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', PROBE, target], cwd=cwd, env=_child_env(),
+                            capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        # Baris exception terakhir (Playwright menambahkan banner setelahnya)
+        lines = [line for line in result.stderr.splitlines() if 'Error' in line] or result.stderr.splitlines()
+        raise RuntimeError(lines[-1].strip() if lines else f'exit code {result.returncode}')
+    return json.loads(result.stdout.strip().splitlines()[-1]), wall_ms
+
+
+def bench_target(target, repeat, cwd):
+    runs = []
+    walls = []
+    for _ in range(repeat):
+        phases, wall_ms = run_probe(target, cwd)
+        runs.append(phases)
+        walls.append(wall_ms)
+    summary = {}
+    for name in runs[0]:
+        values = [phases[name] for phases in runs]
+        summary[name] = {'median_ms': round(statistics.median(values), 1), 'min_ms': min(values)}
+    summary['process_wall'] = {'median_ms': round(statistics.median(walls), 1), 'min_ms': round(min(walls), 1)}
+    return summary
+
+
+def import_times(cwd, top=15):
+    """Impor langsung web_automation dengan waktu kumulatif terbesar"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import web_automation'],
+                            cwd=cwd, env=_child_env(), capture_output=True, text=True)
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Modul anak dicetak sebelum induknya, satu level = 2 spasi indentasi
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == 'web_automation':
+                break
+            children = []
+        elif depth == 1:
+            children.append((name.strip(), int(cumulative) / 1000))
+    return sorted(children, key=lambda item: item[1], reverse=True)[:top]
+
+
+def print_report(report):
+    print(f"\n{'target':<10} {'fase':<14} {'median ms':>10} {'min ms':>10}")
+    for target, summary in report['targets'].items():
+        if 'error' in summary:
+            print(f"{target:<10} {'-':<14} gagal: {summary['error']}")
+            continue
+        for phase, entry in summary.items():
+            print(f"{target:<10} {phase:<14} {entry['median_ms']:>10.1f} {entry['min_ms']:>10.1f}")
+    if report.get('import_times'):
+        print("\nImpor langsung web_automation (kumulatif):")
+        for name, ms in report['import_times']:
+            print(f"  {name:<32} {ms:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark waktu startup sampai aksi pertama')
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=['import', 'http', 'ocr'],
+                        help='Target yang diukur (browser butuh Chromium Playwright terpasang)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--importtime', action='store_true', help='Laporkan modul impor terberat')
+    parser.add_argument('--json', help='Simpan laporan JSON ke file ini')
+    parser.add_argument('--max-import-ms', type=float,
+                        help='Gagal (exit 1) jika median import web_automation di atas nilai ini')
+    args = parser.parse_args()
+
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    report = {'python': sys.version.split()[0], 'repeat': args.repeat, 'targets': {}}
+    for target in args.targets:
+        try:
+            report['targets'][target] = bench_target(target, args.repeat, cwd)
+        except Exception as e:
+            report['targets'][target] = {'error': str(e)}
+    if args.importtime:
+        report['import_times'] = import_times(cwd)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Laporan JSON: {args.json}")
+
+    if args.max_import_ms is not None:
+        medians = [summary['import']['median_ms'] for summary in report['targets'].values() if 'import' in summary]
+        if not medians:
+            raise SystemExit("Tidak ada pengukuran import yang berhasil")
+        if min(medians) > args.max_import_ms:
+            raise SystemExit(f"Import web_automation {min(medians):.1f} ms > batas {args.max_import_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Browser Manager Module
+Chromium yang tetap hangat di antara run scheduler.
+
+Peluncuran Chromium adalah biaya tetap terbesar setiap run. BrowserManager
+menyimpan satu browser untuk seluruh umur proses scheduler, mengecek
+kesehatannya sebelum dipakai, dan me-recycle browser setelah N run atau
+jika memori (RSS) proses browser melewati batas.
+
+Catatan: objek Playwright sync terikat ke thread pembuatnya, jadi manager
+harus dipakai dari thread yang sama (loop scheduler di main()).
+"""
+
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Nama proses Chromium yang diluncurkan Playwright (chrome, chromium, headless_shell)
+BROWSER_PROCESS_NAMES = ('chrom', 'headless_shell')
+
+
+def _browser_pids():
+    """PID proses utama Chromium di bawah proses ini
+
+    Hanya akar pohon browser (parent-nya bukan proses Chromium); proses
+    renderer/GPU ikut dihitung lewat descendant-nya di _tree_rss_mb().
+    Set kosong jika psutil tidak tersedia.
+    """
+    try:
+        import psutil
+    except ImportError:
+        return set()
+    pids = set()
+    for child in psutil.Process(os.getpid()).children(recursive=True):
+        try:
+            if not any(name in child.name().lower() for name in BROWSER_PROCESS_NAMES):
+                continue
+            parent = child.parent()
+            if parent is None or not any(name in parent.name().lower() for name in BROWSER_PROCESS_NAMES):
+                pids.add(child.pid)
+        except psutil.Error:
+            pass
+    return pids
+
+
+def _tree_rss_mb(pids):
+    """Total RSS (MB) proses pids beserta semua turunannya
+
+    Tesseract, worker pool, dan driver Playwright tidak ikut dihitung karena
+    bukan turunan proses browser. None jika tidak bisa diukur.
+    """
+    if not pids:
+        return None
+    try:
+        import psutil
+    except ImportError:
+        return None
+    total = 0
+    measured = False
+    for pid in pids:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            continue
+        for proc in procs:
+            try:
+                total += proc.memory_info().rss
+                measured = True
+            except psutil.Error:
+                pass
+    return total / (1024 * 1024) if measured else None
+
+
+class BrowserManager:
+    """Satu Chromium hangat yang dipakai ulang oleh banyak run"""
+
+    def __init__(self, headless=True, max_runs=20, max_rss_mb=1024, launch_args=None):
+        """
+        Args:
+            headless: Jalankan Chromium tanpa GUI
+            max_runs: Recycle browser setelah sekian run (0 = tidak pernah)
+            max_rss_mb: Recycle jika RSS proses browser melewati batas ini
+                (butuh psutil, 0 = tidak dicek)
+            launch_args: Argumen tambahan untuk chromium.launch()
+        """
+        self.headless = headless
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.launch_args = launch_args or {}
+        self._playwright = None
+        self._browser = None
+        self._browser_pids = set()
+        self.runs = 0
+        self.launches = 0
+
+    def _launch(self):
+        if self._playwright is None:
+            from playwright.sync_api import sync_playwright
+            self._playwright = sync_playwright().start()
+
+        before = _browser_pids()
+        start = time.perf_counter()
+        self._browser = self._playwright.chromium.launch(headless=self.headless, **self.launch_args)
+        self.launches += 1
+        self.runs = 0
+        elapsed = time.perf_counter() - start
+        # Browser yang baru muncul = browser milik manager ini
+        self._browser_pids = _browser_pids() - before
+
+        rss = _tree_rss_mb(self._browser_pids)
+        rss_text = f", RSS {rss:.0f} MB" if rss is not None else ""
+        logger.info(f"Chromium diluncurkan dalam {elapsed:.2f}s (launch ke-{self.launches}{rss_text})")
+
+    def _healthy(self):
+        return self._browser is not None and self._browser.is_connected()
+
+    def _close_browser(self):
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception as e:
+                logger.warning(f"Gagal menutup browser: {e}")
+            self._browser = None
+            self._browser_pids = set()
+
+    def acquire(self):
+        """Browser siap pakai; diluncurkan ulang jika crash/terputus"""
+        if not self._healthy():
+            if self._browser is not None:
+                logger.warning("Browser tidak merespons / crash, meluncurkan ulang...")
+                self._close_browser()
+            self._launch()
+        else:
+            logger.info(f"Memakai Chromium hangat (run ke-{self.runs + 1} sejak launch)")
+        return self._browser
+
+    def release(self):
+        """Tandai akhir run; recycle browser jika sudah melewati batas
+
+        Recycle dilakukan di akhir run (bukan awal run berikutnya), sehingga
+        run berikutnya langsung mendapat browser yang sudah hangat.
+        """
+        self.runs += 1
+        rss = _tree_rss_mb(self._browser_pids)
+        if rss is not None:
+            logger.info(f"RSS browser setelah run: {rss:.0f} MB")
+
+        reason = None
+        if self.max_runs and self.runs >= self.max_runs:
+            reason = f"{self.runs} run"
+        elif self.max_rss_mb and rss is not None and rss > self.max_rss_mb:
+            reason = f"RSS {rss:.0f} MB > {self.max_rss_mb} MB"
+
+        if reason:
+            logger.info(f"Recycle browser ({reason})")
+            self._close_browser()
+            try:
+                self._launch()
+            except Exception as e:
+                # Akan dicoba lagi di acquire() berikutnya
+                logger.error(f"Gagal meluncurkan ulang browser: {e}")
+
+    def close(self):
+        self._close_browser()
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
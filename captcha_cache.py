@@ -0,0 +1,194 @@
+"""
+CAPTCHA Cache Module
+Cache jawaban CAPTCHA dengan key hash dari mask teksnya.
+
+Key adalah digest exact dari mask biner teks hijau StarASN (resolusi asli),
+jadi noise background tidak ikut menentukan key, tetapi dua CAPTCHA yang
+berbeda satu glyph saja tidak pernah berbagi jawaban. Tidak ada pencocokan
+fuzzy: glyph yang mirip (O/0, 8/B) hanya berbeda beberapa pixel mask,
+sedangkan encode ulang JPEG menggeser lebih banyak dari itu. Byte CAPTCHA
+diambil dari respons jaringan (lihat CaptchaCapture), sehingga gambar yang
+dilayani ulang tetap menghasilkan key yang sama.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from captcha_preprocess import DEFAULT_THRESHOLD, green_mask, threshold, to_gray_array
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 2  # Versi 1 memakai dHash grayscale + pencocokan fuzzy
+FLUSH_EVERY = 16  # Perubahan yang ditampung sebelum file ditulis ulang
+FLUSH_INTERVAL = 300  # detik; perubahan lebih lama dari ini ditulis saat perubahan berikutnya
+
+
+def text_mask(img):
+    """Mask biner teks (True = pixel teks)
+
+    Teks hijau StarASN dari green_mask; gambar tanpa teks hijau memakai
+    threshold grayscale (teks gelap).
+    """
+    mask = green_mask(img) == 0
+    if not mask.any():
+        mask = threshold(to_gray_array(img), DEFAULT_THRESHOLD) == 0
+    return mask
+
+
+def image_hash(img):
+    """Digest exact mask teks CAPTCHA sebagai string hex"""
+    mask = text_mask(img)
+    digest = hashlib.sha1(f"{mask.shape[0]}x{mask.shape[1]}:".encode('ascii'))
+    digest.update(np.packbits(mask).tobytes())
+    return digest.hexdigest()
+
+
+class CaptchaCache:
+    """Cache LRU jawaban CAPTCHA, opsional disimpan ke file JSON
+
+    Setiap entry menyimpan jawaban dan status ``confirmed`` (jawaban pernah
+    dipakai untuk login yang berhasil). Jawaban yang ditolak server langsung
+    dihapus. Key harus sama persis (lihat image_hash).
+
+    Penulisan file di-debounce: perubahan ditampung sampai ``flush_every``
+    perubahan atau ``flush_interval`` detik, lalu ditulis sekaligus; sisa
+    perubahan ditulis oleh flush() (dipanggil CaptchaSolver.close dan saat
+    proses keluar).
+    """
+
+    def __init__(self, max_size=1024, path=None, flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL):
+        self.max_size = max_size
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self._saved_at = time.monotonic()
+        if path:
+            self._load()
+            atexit.register(self.flush)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Jawaban untuk key, atau None (menghitung hit/miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['answer']
+
+    def put(self, key, answer):
+        """Simpan jawaban baru (belum terkonfirmasi)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['answer'] == answer:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = {'answer': answer, 'confirmed': False}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        self._changed()
+
+    def confirm(self, key):
+        """Tandai jawaban sebagai benar (login berhasil)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['confirmed']:
+                return
+            entry['confirmed'] = True
+        self._changed()
+
+    def reject(self, key):
+        """Hapus jawaban yang ditolak server"""
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return
+            self.evictions += 1
+        self._changed()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'confirmed': sum(e['confirmed'] for e in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != CACHE_VERSION:
+                logger.info(f"CAPTCHA cache {self.path} memakai format key lama, dimulai kosong")
+                return
+            for key, answer, confirmed in data.get('entries', [])[-self.max_size:]:
+                self._entries[key] = {'answer': answer, 'confirmed': bool(confirmed)}
+            logger.info(f"CAPTCHA cache dimuat: {len(self._entries)} entry dari {self.path}")
+        except Exception as e:
+            logger.warning(f"Gagal memuat CAPTCHA cache {self.path}: {e}")
+
+    def _changed(self):
+        if not self.path:
+            return
+        with self._lock:
+            self._dirty += 1
+            due = (self._dirty >= self.flush_every
+                   or time.monotonic() - self._saved_at >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Tulis perubahan yang belum tersimpan ke disk"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'version': CACHE_VERSION, 'entries': [[k, e['answer'], e['confirmed']] for k, e in self._entries.items()]}
+            self._dirty = 0
+            self._saved_at = time.monotonic()
+        if not self._save(data):
+            with self._lock:
+                self._dirty += 1  # dicoba lagi pada flush berikutnya
+
+    def _save(self, data):
+        """Tulis cache ke disk secara atomik (urutan LRU dipertahankan)"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            logger.warning(f"Gagal menyimpan CAPTCHA cache {self.path}: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return False
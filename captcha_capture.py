@@ -0,0 +1,109 @@
+"""
+CAPTCHA Capture Module
+Ambil byte gambar CAPTCHA Star-ASN langsung dari respons jaringan page,
+tanpa screenshot elemen (render + encode PNG oleh Chromium).
+
+Server hanya menerima jawaban untuk CAPTCHA yang paling akhir diterbitkan
+untuk sesi tersebut, jadi CaptchaCapture selalu memakai respons
+/authentication/captcha terbaru yang dilihat page: yang dimuat img#kv-image,
+atau yang di-request ulang lewat fetch() di page (cookie sesi sama, sama
+seperti StarAsnService::solveCaptcha). Retry cukup me-request endpoint
+CAPTCHA, tanpa memuat ulang halaman login.
+
+Prefetch dimulai tepat setelah respons login diterima (server sudah
+memeriksa jawaban sebelumnya), sehingga download CAPTCHA berikutnya berjalan
+bersamaan dengan pencatatan hasil dan penyimpanan artefak gagal. Prefetch
+lebih awal (sebelum respons login) bisa membuat server memeriksa jawaban
+terhadap CAPTCHA baru.
+"""
+
+import logging
+import time
+
+from page_waits import is_captcha_response
+from starasn_http import CAPTCHA_URL
+
+logger = logging.getLogger(__name__)
+
+# fetch() di page: respons ikut tertangkap listener 'response' milik page
+PREFETCH_JS = (
+    "(url) => { window.__kvNextCaptcha = fetch(url, {credentials: 'same-origin', cache: 'no-store'})"
+    ".then(r => r.ok).catch(() => false); }"
+)
+AWAIT_PREFETCH_JS = "() => window.__kvNextCaptcha || null"
+
+
+def captcha_url():
+    """URL CAPTCHA baru (?t=epoch ms), sama dengan StarAsnService::solveCaptcha"""
+    return f"{CAPTCHA_URL}?t={int(time.time() * 1000)}"
+
+
+class CaptchaCapture:
+    """Byte CAPTCHA terbaru dari respons jaringan satu page"""
+
+    def __init__(self):
+        self._latest = None
+        self._consumed = None
+        self.from_network = 0
+        self.fetched = 0
+
+    def on_response(self, response):
+        if is_captcha_response(response) and response.ok:
+            self._latest = response
+
+    def attach(self, page):
+        page.on('response', self.on_response)
+
+    def detach(self, page):
+        page.remove_listener('response', self.on_response)
+
+    def _fresh(self):
+        response = self._latest
+        if response is None or response is self._consumed:
+            return None
+        self._consumed = response
+        return response
+
+    def take(self, page):
+        """Byte CAPTCHA yang berlaku saat ini (Playwright sync)"""
+        response = self._fresh()
+        if response is not None:
+            try:
+                body = response.body()
+                self.from_network += 1
+                return body
+            except Exception as e:
+                logger.debug(f"Body respons CAPTCHA tidak tersedia: {e}")
+        # Tidak ada respons baru yang tertangkap: request endpoint CAPTCHA saja
+        self.fetched += 1
+        return page.context.request.get(captcha_url()).body()
+
+    def prefetch(self, page):
+        """Mulai request CAPTCHA berikutnya tanpa menunggu hasilnya"""
+        page.evaluate(PREFETCH_JS, captcha_url())
+
+    def next(self, page):
+        """Tunggu prefetch selesai lalu ambil byte CAPTCHA terbaru"""
+        page.evaluate(AWAIT_PREFETCH_JS)
+        return self.take(page)
+
+    async def take_async(self, page):
+        """Versi async take()"""
+        response = self._fresh()
+        if response is not None:
+            try:
+                body = await response.body()
+                self.from_network += 1
+                return body
+            except Exception as e:
+                logger.debug(f"Body respons CAPTCHA tidak tersedia: {e}")
+        self.fetched += 1
+        response = await page.context.request.get(captcha_url())
+        return await response.body()
+
+    async def prefetch_async(self, page):
+        await page.evaluate(PREFETCH_JS, captcha_url())
+
+    async def next_async(self, page):
+        await page.evaluate(AWAIT_PREFETCH_JS)
+        return await self.take_async(page)
@@ -0,0 +1,175 @@
+"""
+CAPTCHA Preprocessing Module
+Pipeline preprocessing berbasis NumPy untuk CaptchaSolver.
+
+Semua operasi per-pixel (mask hijau, contrast/brightness, threshold,
+smooth/sharpen/median) dikerjakan sebagai operasi array, sehingga tidak ada
+lagi fungsi Python yang dipanggil per pixel. Hasil bitmap identik dengan
+implementasi PIL sebelumnya (ImageEnhance, ImageFilter, Image.point).
+"""
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_THRESHOLD = 128
+GREEN_DOMINANCE = 30
+
+
+def to_gray_array(img):
+    """Konversi PIL Image ke array grayscale uint8"""
+    if img.mode != 'L':
+        img = img.convert('L')
+    return np.asarray(img, dtype=np.uint8)
+
+
+def to_image(arr):
+    """Konversi array uint8 ke PIL Image mode 'L'"""
+    return Image.fromarray(np.ascontiguousarray(arr, dtype=np.uint8), mode='L')
+
+
+def enhance_contrast(arr, factor=2.0):
+    """Setara ImageEnhance.Contrast(img).enhance(factor)"""
+    mean = int(arr.mean() + 0.5)
+    out = mean + factor * (arr.astype(np.float32) - mean)
+    return np.clip(out, 0, 255).astype(np.uint8)
+
+
+def enhance_brightness(arr, factor=1.5):
+    """Setara ImageEnhance.Brightness(img).enhance(factor)"""
+    out = arr.astype(np.float32) * factor
+    return np.clip(out, 0, 255).astype(np.uint8)
+
+
+def threshold(arr, level=DEFAULT_THRESHOLD):
+    """Setara img.point(lambda p: 255 if p > level else 0)"""
+    return np.where(arr > level, 255, 0).astype(np.uint8)
+
+
+def _neighbors(arr, dtype=np.int32):
+    """Sembilan view bergeser (3x3) untuk setiap pixel, border direplikasi"""
+    padded = np.pad(arr.astype(dtype, copy=False), 1, mode='edge')
+    h, w = arr.shape
+    return [padded[dy:dy + h, dx:dx + w] for dy in range(3) for dx in range(3)]
+
+
+def _kernel3x3(arr, center_weight, neighbor_weight, scale):
+    """Filter kernel 3x3 simetris seperti ImageFilter.BuiltinFilter
+
+    PIL membulatkan ke atas pada .5 dan menyalin pixel border apa adanya.
+    """
+    if arr.shape[0] < 3 or arr.shape[1] < 3:
+        return arr.copy()
+
+    views = _neighbors(arr)
+    total = views[0].copy()
+    for view in views[1:]:
+        total += view
+    src = views[4]
+    acc = neighbor_weight * total + (center_weight - neighbor_weight) * src
+    # round-half-up: floor((acc / scale) + 0.5)
+    acc *= 2
+    acc += scale
+    acc //= 2 * scale
+    out = np.clip(acc, 0, 255).astype(np.uint8)
+
+    out[0, :] = arr[0, :]
+    out[-1, :] = arr[-1, :]
+    out[:, 0] = arr[:, 0]
+    out[:, -1] = arr[:, -1]
+    return out
+
+
+def smooth(arr):
+    """Setara ImageFilter.SMOOTH"""
+    return _kernel3x3(arr, center_weight=5, neighbor_weight=1, scale=13)
+
+
+def sharpen(arr):
+    """Setara ImageFilter.SHARPEN"""
+    return _kernel3x3(arr, center_weight=32, neighbor_weight=-2, scale=16)
+
+
+def median3(arr):
+    """Setara ImageFilter.MedianFilter(size=3)"""
+    p = _neighbors(arr, np.uint8)
+
+    def sort2(i, j):
+        lo = np.minimum(p[i], p[j])
+        p[j] = np.maximum(p[i], p[j])
+        p[i] = lo
+
+    # Sorting network median-of-9 (19 compare-exchange)
+    for i, j in ((1, 2), (4, 5), (7, 8), (0, 1), (3, 4), (6, 7), (1, 2),
+                 (4, 5), (7, 8), (0, 3), (5, 8), (4, 7), (3, 6), (1, 4),
+                 (2, 5), (4, 7), (4, 2), (6, 4), (4, 2)):
+        sort2(i, j)
+    return p[4].copy()
+
+
+def resize2x(img):
+    """Resize 2x dengan LANCZOS (tetap di C milik PIL)"""
+    return img.resize((img.width * 2, img.height * 2), Image.Resampling.LANCZOS)
+
+
+def green_mask(img, dominance=GREEN_DOMINANCE):
+    """Mask teks hijau StarASN: hijau dominan -> hitam, lainnya putih"""
+    rgb = np.asarray(img.convert('RGB'), dtype=np.int16)
+    r, g, b = rgb[:, :, 0], rgb[:, :, 1], rgb[:, :, 2]
+    text = (g > r + dominance) & (g > b + dominance)
+    return np.where(text, 0, 255).astype(np.uint8)
+
+
+class PreprocessedCaptcha:
+    """Hasil preprocessing bersama untuk satu gambar CAPTCHA
+
+    Base image (grayscale + contrast + brightness) dihitung sekali saja
+    lalu dipakai oleh semua strategi.
+    """
+
+    def __init__(self, img):
+        self.img = img
+        self._base = None
+
+    @property
+    def base(self):
+        if self._base is None:
+            gray = to_gray_array(self.img)
+            self._base = enhance_brightness(enhance_contrast(gray, 2.0), 1.5)
+        return self._base
+
+
+def _color_filter_2x(captcha):
+    return green_mask(resize2x(captcha.img.convert('RGB')))
+
+
+def _smooth(captcha):
+    return threshold(smooth(captcha.base))
+
+
+def _threshold(captcha):
+    return threshold(captcha.base)
+
+
+def _median(captcha):
+    return threshold(median3(captcha.base))
+
+
+def _denoise_2x(captcha):
+    scaled = to_gray_array(resize2x(to_image(captcha.base)))
+    return threshold(median3(scaled), 140)
+
+
+def _sharpen(captcha):
+    return threshold(sharpen(captcha.base))
+
+
+# Urutan strategi sama dengan urutan historis di solve_image
+STRATEGIES = (
+    ('color_filter_2x', _color_filter_2x),   # Khusus teks hijau StarASN
+    ('smooth', _smooth),                     # Bagus untuk garis tersambung
+    ('threshold', _threshold),               # Fallback sederhana
+    ('median', _median),                     # Bagus untuk salt noise
+    ('denoise_2x', _denoise_2x),             # Gambar kecil dan noisy
+    ('sharpen', _sharpen),
+)
+
@@ -4,47 +4,118 @@ Menggunakan OCR untuk solve CAPTCHA sederhana
 """
 
 import io
+import itertools
+import os
 import re
-import requests
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+)
 from PIL import Image
 import logging
 
+from captcha_preprocess import (
+    STRATEGIES, PreprocessedCaptcha, smooth, threshold, to_gray_array, to_image
+)
+from captcha_cache import image_hash
+from captcha_templates import TemplateEngine
+from metrics import get_metrics
+from ocr_engines import get_engine
+from profiling import profile_phase
+
 logger = logging.getLogger(__name__)
 
+RECENT_SOLUTIONS = 64  # Solusi yang diingat sampai hasil loginnya dilaporkan
+
 class CaptchaSolver:
-    """CAPTCHA Solver menggunakan Tesseract OCR atau pytesseract"""
+    """CAPTCHA Solver menggunakan Tesseract OCR (tesserocr atau pytesseract)"""
     
-    def __init__(self):
-        """Initialize CAPTCHA solver"""
-        self.tesseract_available = self._check_tesseract()
+    def __init__(self, workers=1, engine='auto', templates=None, cache=None, stats=None):
+        """Initialize CAPTCHA solver
+
+        Args:
+            workers: Jumlah worker untuk menjalankan strategi OCR secara
+                paralel. 1 = sekuensial (default).
+            engine: Backend OCR ('auto', 'tesserocr', 'pytesseract').
+                'auto' memakai tesserocr jika ada, lalu pytesseract.
+            templates: Path index template StarASN (captcha_templates.npy).
+                Jika ada, engine template dicoba lebih dulu dan Tesseract
+                hanya dipakai sebagai fallback.
+            cache: CaptchaCache opsional. Jawaban dicari berdasarkan
+                hash mask teks gambar sebelum OCR dijalankan.
+            stats: StrategyStats opsional. Urutan strategi diatur ulang
+                berdasarkan strategi yang jawabannya berhasil dipakai login.
+        """
+        self.engine_name = engine
+        self.templates_path = templates
+        # Engine OCR dan template dimuat saat CAPTCHA pertama diselesaikan,
+        # jadi run tanpa CAPTCHA (Pusaka, sesi tersimpan) tidak memuatnya
+        self._engine = None
+        self._template_engine = None
+        self._engines_loaded = False
+        self._engines_lock = threading.Lock()
+        self.workers = max(1, int(workers))
+        self._executor = None
+        self.cache = cache
+        self.stats = stats
+        # Strategi yang dicoba/menang per gambar, menunggu report_answer
+        self._recent = OrderedDict()
+        self._recent_lock = threading.Lock()
     
-    def _check_tesseract(self):
-        """Check if Tesseract is available"""
-        try:
-            import pytesseract
-            # Set path explicitly for Windows
-            pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-            pytesseract.get_tesseract_version()
-            return True
-        except Exception:
+    def _load_engines(self):
+        with self._engines_lock:
+            if not self._engines_loaded:
+                self._engine = self._check_tesseract(self.engine_name)
+                self._template_engine = self._load_templates(self.templates_path)
+                self._engines_loaded = True
+
+    @property
+    def engine(self):
+        if not self._engines_loaded:
+            self._load_engines()
+        return self._engine
+
+    @property
+    def template_engine(self):
+        if not self._engines_loaded:
+            self._load_engines()
+        return self._template_engine
+
+    @property
+    def tesseract_available(self):
+        return self.engine is not None
+
+    def _check_tesseract(self, engine='auto'):
+        """Check if Tesseract is available, return shared OCR engine"""
+        ocr_engine = get_engine(engine)
+        if ocr_engine is None:
             logger.warning("Tesseract OCR tidak tersedia, menggunakan fallback basic OCR")
-            return False
+        return ocr_engine
     
+    def _load_templates(self, path):
+        """Load engine template jika file index tersedia"""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            template_engine = TemplateEngine.from_file(path)
+            logger.info(f"Template engine dimuat: {path} ({len(template_engine.index)} glyph)")
+            return template_engine
+        except Exception as e:
+            logger.warning(f"Gagal memuat template CAPTCHA {path}: {e}")
+            return None
+
     def preprocess_image(self, img):
         """Preprocess image for better OCR accuracy"""
         # Convert to grayscale
-        if img.mode != 'L':
-            img = img.convert('L')
+        arr = to_gray_array(img)
             
         # Add Smooth filter (Critical for StarASN captcha)
-        from PIL import ImageFilter
-        img = img.filter(ImageFilter.SMOOTH)
+        arr = smooth(arr)
         
         # Simple threshold
-        threshold = 128
-        img = img.point(lambda p: 255 if p > threshold else 0)
-        
-        return img
+        return to_image(threshold(arr, 128))
     
     def solve_from_url(self, url, cookies=None):
         """
@@ -57,6 +128,7 @@ class CaptchaSolver:
         Returns:
             str: Teks CAPTCHA yang terdeteksi, atau None jika gagal
         """
+        import requests
         try:
             # Download image
             headers = {
@@ -75,6 +147,103 @@ class CaptchaSolver:
             logger.error(f"Error downloading CAPTCHA: {e}")
             return None
     
+    def _run_ocr(self, image_obj, tag, debug_save_path=None, cancelled=None):
+        """Jalankan OCR (PSM 7, lalu 8/6) untuk satu bitmap strategi"""
+        if debug_save_path:
+            try:
+                image_obj.save(f"{debug_save_path}_{tag}.png")
+            except:
+                pass
+        
+        if not self.tesseract_available:
+            return None
+
+        # Try PSM 7 (Single line)
+        text = self.engine.recognize(image_obj, psm=7)
+        text = re.sub(r'[^A-Za-z0-9]', '', text).strip()
+        
+        # If PSM 7 is too short or too long, try PSM 8 (Single word) or PSM 6
+        if not (5 <= len(text) <= 6) and not (cancelled and cancelled.is_set()):
+            text_8 = self.engine.recognize(image_obj, psm=8)
+            text_8 = re.sub(r'[^A-Za-z0-9]', '', text_8).strip()
+            if 5 <= len(text_8) <= 6:
+                text = text_8
+            elif not text and not (cancelled and cancelled.is_set()):
+                 text_6 = self.engine.recognize(image_obj, psm=6)
+                 text = re.sub(r'[^A-Za-z0-9]', '', text_6).strip()
+        
+        logger.info(f"OCR Strategy {tag} Result: {text}")
+        return text
+
+    def _run_strategy(self, captcha, tag, build, debug_save_path=None, cancelled=None):
+        """Preprocess + OCR satu strategi, None jika gagal atau dibatalkan"""
+        if cancelled and cancelled.is_set():
+            return None
+        start = time.perf_counter()
+        try:
+            strategy_img = to_image(build(captcha))
+        except Exception as e:
+            logger.warning(f"Preprocessing {tag} failed: {e}")
+            return None
+        try:
+            text = self._run_ocr(strategy_img, tag, debug_save_path, cancelled)
+        except Exception as e:
+            # Tesseract crash/timeout: strategi ini dilewati, strategi lain tetap bersaing
+            logger.warning(f"OCR {tag} failed: {e}")
+            return None
+        if not (cancelled and cancelled.is_set()):
+            elapsed = time.perf_counter() - start
+            if self.stats is not None:
+                self.stats.record_cost(tag, elapsed * 1000)
+            get_metrics().record('captcha_strategy', elapsed, 'valid' if self._is_valid(text) else 'invalid',
+                                 strategy=tag)
+        return text
+
+    @staticmethod
+    def _is_valid(text):
+        return bool(text) and 5 <= len(text) <= 6
+
+    @staticmethod
+    def _best_result(results):
+        """Pilih tebakan terbaik jika tidak ada strategi yang panjangnya pas
+
+        Args:
+            results: List (tag, teks) sesuai urutan strategi
+
+        Returns:
+            tuple: (tag, teks) atau (None, None)
+        """
+        if not results:
+            return None, None
+
+        # Prefer length 6, then 5
+        results_6 = [r for r in results if len(r[1]) == 6]
+        if results_6:
+            return results_6[0]
+        results_5 = [r for r in results if len(r[1]) == 5]
+        if results_5:
+            return results_5[0]
+        
+        # Fallback to longest
+        best = max(results, key=lambda r: len(r[1]))
+        logger.info(f"Fallback to best result: {best[1]}")
+        return best
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix='captcha-ocr'
+            )
+        return self._executor
+
+    def close(self):
+        """Hentikan worker pool (jika ada) dan tulis perubahan cache"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self.cache is not None:
+            self.cache.flush()
+
     def solve_image(self, img, debug_save_path=None):
         """
         Solve CAPTCHA from PIL Image
@@ -86,144 +255,239 @@ class CaptchaSolver:
         Returns:
             str: Teks CAPTCHA atau None
         """
+        with profile_phase('solve_image'):
+            return self._solve_image(img, debug_save_path, concurrent=self.workers > 1)
+
+    def _solve_image(self, img, debug_save_path=None, concurrent=False):
+        start = time.perf_counter()
+        answer, source = None, None
         try:
-            results = []
-            
-            # Helper to run OCR
-            def run_ocr(image_obj, tag):
-                if debug_save_path:
-                    try:
-                        image_obj.save(f"{debug_save_path}_{tag}.png")
-                    except:
-                        pass
-                
-                if self.tesseract_available:
-                    import pytesseract
-                    
-                    # Try PSM 7 (Single line)
-                    custom_config = r'--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-                    text = pytesseract.image_to_string(image_obj, config=custom_config)
-                    text = re.sub(r'[^A-Za-z0-9]', '', text).strip()
-                    
-                    # If PSM 7 is too short or too long, try PSM 8 (Single word) or PSM 6
-                    if not (5 <= len(text) <= 6):
-                        custom_config_8 = r'--oem 3 --psm 8 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-                        text_8 = pytesseract.image_to_string(image_obj, config=custom_config_8)
-                        text_8 = re.sub(r'[^A-Za-z0-9]', '', text_8).strip()
-                        if 5 <= len(text_8) <= 6:
-                            text = text_8
-                        elif not text:
-                             custom_config_6 = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-                             text_6 = pytesseract.image_to_string(image_obj, config=custom_config_6)
-                             text = re.sub(r'[^A-Za-z0-9]', '', text_6).strip()
-                    
-                    logger.info(f"OCR Strategy {tag} Result: {text}")
-                    return text
-                return None
-
-            # Ensure grayscale
-            if img.mode != 'L':
-                base_img = img.convert('L')
-            else:
-                base_img = img.copy()
+            if self.cache is None and self.stats is None:
+                answer, _, winner = self._solve(img, debug_save_path, concurrent)
+                source = winner or 'template'
+                return answer
 
-            from PIL import ImageFilter, ImageEnhance
-            
-            # Enhance contrast
-            enhancer = ImageEnhance.Contrast(base_img)
-            base_img = enhancer.enhance(2.0)
-            
-            # Enhance brightness
-            enhancer = ImageEnhance.Brightness(base_img)
-            base_img = enhancer.enhance(1.5)
+            key = image_hash(img)
+            if self.cache is not None and not debug_save_path:
+                cached = self.cache.get(key)
+                if cached:
+                    logger.info(f"CAPTCHA cache hit: {cached}")
+                    answer, source = cached, 'cache'
+                    return cached
 
-            # Strategy 0: Color Filter (Specifically for StarASN's green text)
-            try:
-                rgb_img = img.convert('RGB')
-                # Resize first to 2x for better precision
-                rgb_img = rgb_img.resize((rgb_img.width * 2, rgb_img.height * 2), Image.Resampling.LANCZOS)
-                data = rgb_img.getdata()
-                new_data = []
-                for item in data:
-                    # If green is very dominant
-                    if item[1] > item[0] + 30 and item[1] > item[2] + 30:
-                        new_data.append(0) # Keep as black text
-                    else:
-                        new_data.append(255) # Make background white
-                
-                s0_img = Image.new('L', rgb_img.size)
-                s0_img.putdata(new_data)
-                res0 = run_ocr(s0_img, "color_filter_2x")
-                if res0 and 5 <= len(res0) <= 6:
-                    return res0
-                if res0: results.append(res0)
-            except Exception as e:
-                logger.warning(f"Color filter failed: {e}")
-
-            # Strategy 1: Smooth + Threshold (Best for connected lines)
-            s1_img = base_img.filter(ImageFilter.SMOOTH)
-            s1_img = s1_img.point(lambda p: 255 if p > 128 else 0)
-            res1 = run_ocr(s1_img, "smooth")
-            if res1 and 5 <= len(res1) <= 6:
-                return res1
-            if res1: results.append(res1)
-            
-            # Strategy 2: Simple Threshold (Fallback)
-            s2_img = base_img.point(lambda p: 255 if p > 128 else 0)
-            res2 = run_ocr(s2_img, "threshold")
-            if res2 and 5 <= len(res2) <= 6:
-                return res2
-            if res2: results.append(res2)
-
-            # Strategy 3: Median (Good for salt noise)
-            s3_img = base_img.filter(ImageFilter.MedianFilter(size=3))
-            s3_img = s3_img.point(lambda p: 255 if p > 128 else 0)
-            res3 = run_ocr(s3_img, "median")
-            if res3 and 5 <= len(res3) <= 6:
-                return res3
-            if res3: results.append(res3)
-
-            # Strategy 4: Rescale + Denoise (Good for small, noisy images)
-            # Resize image to 2x for better OCR
-            s4_img = base_img.resize((base_img.width * 2, base_img.height * 2), Image.Resampling.LANCZOS)
-            # Denoise
-            s4_img = s4_img.filter(ImageFilter.MedianFilter(size=3))
-            # Threshold
-            s4_img = s4_img.point(lambda p: 255 if p > 140 else 0)
-            res4 = run_ocr(s4_img, "denoise_2x")
-            if res4 and 5 <= len(res4) <= 6:
-                return res4
-            if res4: results.append(res4)
-
-            # Strategy 5: Sharpen + Threshold
-            s5_img = base_img.filter(ImageFilter.SHARPEN)
-            s5_img = s5_img.point(lambda p: 255 if p > 128 else 0)
-            res5 = run_ocr(s5_img, "sharpen")
-            if res5 and 5 <= len(res5) <= 6:
-                return res5
-            if res5: results.append(res5)
-
-            # If no strategy yielded perfect length, return the best guess (longest or first)
-            if results:
-                # Prefer length 6, then 5
-                results_6 = [r for r in results if len(r) == 6]
-                if results_6:
-                    return results_6[0]
-                results_5 = [r for r in results if len(r) == 5]
-                if results_5:
-                    return results_5[0]
-                
-                # Fallback to longest
-                best = max(results, key=len)
-                logger.info(f"Fallback to best result: {best}")
-                return best
-                
-            return None
+            answer, tried, winner = self._solve(img, debug_save_path, concurrent)
+            source = winner or 'template'
+            if answer:
+                # Tebakan fallback (panjang salah) tidak di-cache: tidak boleh jadi "hit"
+                if self.cache is not None and self._is_valid(answer):
+                    self.cache.put(key, answer)
+                if winner is not None:
+                    self._remember(key, tried, winner)
+            return answer
                 
         except Exception as e:
             logger.error(f"Error solving CAPTCHA: {e}")
             return None
+        finally:
+            # Sumber jawaban: strategi pemenang, 'template', 'cache', atau 'none'
+            get_metrics().record('captcha_solve', time.perf_counter() - start,
+                                 'solved' if self._is_valid(answer) else 'unsolved',
+                                 strategy=source if answer else 'none')
+
+    def _strategies(self):
+        """Strategi dalam urutan yang dipakai untuk solve ini"""
+        if self.stats is None:
+            return STRATEGIES
+        builders = dict(STRATEGIES)
+        return [(tag, builders[tag]) for tag in self.stats.order(builders)]
+
+    def _solve(self, img, debug_save_path=None, concurrent=False):
+        """Jalankan engine template lalu strategi OCR (tanpa cache)
+
+        Returns:
+            tuple: (jawaban, strategi yang dicoba, strategi pemenang)
+        """
+        # Engine template StarASN: hitungan milidetik, Tesseract jadi fallback
+        if self.template_engine is not None:
+            text = self.template_engine.solve(img)
+            if self._is_valid(text):
+                logger.info(f"Template engine Result: {text}")
+                return text, [], None
+
+        # Base image (grayscale + contrast + brightness) dihitung sekali
+        # dan dipakai bersama oleh semua strategi
+        captcha = PreprocessedCaptcha(img)
+        strategies = self._strategies()
+
+        if concurrent:
+            return self._solve_concurrent(captcha, strategies, debug_save_path)
+
+        results = []
+        tried = []
+        for tag, build in strategies:
+            res = self._run_strategy(captcha, tag, build, debug_save_path)
+            tried.append(tag)
+            if self._is_valid(res):
+                return res, tried, tag
+            if res: results.append((tag, res))
+
+        # If no strategy yielded perfect length, return the best guess (longest or first)
+        winner, answer = self._best_result(results)
+        return answer, tried, winner
+
+    def _remember(self, key, tried, winner):
+        with self._recent_lock:
+            self._recent[key] = (tried, winner)
+            while len(self._recent) > RECENT_SOLUTIONS:
+                self._recent.popitem(last=False)
+
+    def report_answer(self, img, accepted):
+        """Laporkan hasil login dengan jawaban CAPTCHA untuk gambar ini
+
+        Jawaban yang berhasil ditandai confirmed di cache, jawaban yang
+        ditolak langsung dihapus supaya gambar yang sama di-OCR ulang.
+        Strategi yang menghasilkan jawaban dicatat di statistik strategi.
+        """
+        if self.cache is None and self.stats is None:
+            return
+        key = image_hash(img)
+        if self.cache is not None:
+            if accepted:
+                self.cache.confirm(key)
+            else:
+                self.cache.reject(key)
+        if self.stats is not None:
+            with self._recent_lock:
+                solution = self._recent.pop(key, None)
+            if solution is not None:
+                tried, winner = solution
+                self.stats.record_result(tried, winner, accepted)
+
+    def _solve_concurrent(self, captcha, strategies, debug_save_path=None):
+        """Jalankan semua strategi paralel, hasil valid pertama menang
+
+        Strategi yang belum mulai dibatalkan, yang sedang berjalan berhenti
+        sebelum panggilan tesseract berikutnya. Jika tidak ada yang valid,
+        ranking fallback memakai urutan strategi (bukan urutan selesai).
+        """
+        captcha.base  # hitung sekali sebelum dibagi ke worker
+        cancelled = threading.Event()
+        executor = self._get_executor()
+        futures = {
+            executor.submit(self._run_strategy, captcha, tag, build, debug_save_path, cancelled): index
+            for index, (tag, build) in enumerate(strategies)
+        }
+
+        results = {}
+        tried = []
+        try:
+            for future in as_completed(futures):
+                res = future.result()
+                index = futures[future]
+                tag = strategies[index][0]
+                tried.append(tag)
+                if self._is_valid(res):
+                    return res, tried, tag
+                if res:
+                    results[index] = (tag, res)
+        finally:
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+
+        ranked = [results[i] for i in sorted(results)]
+        winner, answer = self._best_result(ranked)
+        return answer, tried, winner
     
+    def solve_many(self, items, workers=None, ordered=True, chunk_size=4,
+                   max_pending=None, processes=False):
+        """
+        Solve banyak CAPTCHA sekaligus dengan worker pool (generator)
+
+        Setiap gambar diselesaikan lewat alur yang sama dengan solve_image
+        (cache, template, lalu preprocessing + OCR per gambar); paralelisme
+        ada di level item. Input dibaca secara lazy dan jumlah item yang
+        sedang diproses dibatasi, sehingga memori tetap kecil untuk corpus
+        besar. Item dikirim ke worker per chunk untuk mengurangi overhead
+        submit/IPC per task.
+
+        Preprocessing tidak di-stack lintas gambar: resize LANCZOS PIL
+        (per gambar) mendominasi biayanya dan filter NumPy pada stack
+        N x H x W tidak lebih cepat dari per gambar untuk ukuran CAPTCHA.
+
+        Args:
+            items: Iterable PIL Image, path file, atau bytes gambar
+            workers: Jumlah worker (default: os.cpu_count())
+            ordered: True = hasil sesuai urutan input, False = sesuai selesai
+            chunk_size: Jumlah item per task worker
+            max_pending: Batas item yang belum di-yield (default 4 chunk per worker)
+            processes: True = ProcessPoolExecutor (satu solver per proses,
+                tanpa cache/statistik bersama), False = thread pool
+
+        Yields:
+            tuple: (index input, teks CAPTCHA atau None)
+        """
+        workers = workers or os.cpu_count() or 1
+        max_pending = max(max_pending or workers * chunk_size * 4, chunk_size)
+
+        if processes:
+            executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_batch_worker,
+                initargs=(self.engine_name, self.templates_path)
+            )
+            solve_chunk = _solve_batch_chunk
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='captcha-batch')
+            solve_chunk = self._solve_chunk
+
+        source = enumerate(items)
+        pending = set()
+        in_flight = 0  # Item yang sudah disubmit tapi belum di-yield
+        done = {}
+        next_index = 0
+        exhausted = False
+
+        try:
+            while True:
+                # Isi antrian sampai batas max_pending
+                while not exhausted and in_flight + chunk_size <= max_pending:
+                    chunk = list(itertools.islice(source, chunk_size))
+                    if not chunk:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(solve_chunk, chunk))
+                    in_flight += len(chunk)
+
+                if not pending:
+                    break
+
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    for index, answer in future.result():
+                        if ordered:
+                            done[index] = answer
+                        else:
+                            in_flight -= 1
+                            yield index, answer
+
+                while ordered and next_index in done:
+                    in_flight -= 1
+                    yield next_index, done.pop(next_index)
+                    next_index += 1
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _solve_chunk(self, chunk):
+        return [(index, self._solve_item(item)) for index, item in chunk]
+
+    def _solve_item(self, item):
+        try:
+            img = load_image(item)
+        except Exception as e:
+            logger.error(f"Error loading CAPTCHA: {e}")
+            return None
+        return self._solve_image(img)
+
     def solve_from_file(self, filepath):
         """
         Solve CAPTCHA from file path
@@ -242,6 +506,31 @@ class CaptchaSolver:
             return None
 
 
+def load_image(item):
+    """PIL Image dari Image, path file, atau bytes"""
+    if isinstance(item, Image.Image):
+        return item
+    if isinstance(item, (bytes, bytearray)):
+        img = Image.open(io.BytesIO(item))
+    else:
+        img = Image.open(item)
+    img.load()
+    return img
+
+
+# Solver per proses untuk solve_many(processes=True)
+_batch_solver = None
+
+
+def _init_batch_worker(engine, templates):
+    global _batch_solver
+    _batch_solver = CaptchaSolver(engine=engine, templates=templates)
+
+
+def _solve_batch_chunk(chunk):
+    return _batch_solver._solve_chunk(chunk)
+
+
 def manual_captcha_input():
     """
     Fungsi untuk input CAPTCHA manual dari user
@@ -260,3 +549,5 @@ if __name__ == "__main__":
     # Test
     solver = CaptchaSolver()
     print(f"Tesseract available: {solver.tesseract_available}")
+    if solver.engine is not None:
+        print(f"OCR engine: {solver.engine.name} (tesseract {solver.engine.version})")
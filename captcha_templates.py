@@ -0,0 +1,234 @@
+"""
+CAPTCHA Template Engine
+Engine OCR ringan khusus CAPTCHA StarASN (teks hijau, 5-6 karakter A-Z0-9).
+
+Mask hijau dipotong menjadi glyph per karakter, setiap glyph dinormalisasi
+ke bitmap GLYPH_SIZE x GLYPH_SIZE lalu diklasifikasi dengan nearest-neighbour
+(jarak Hamming) terhadap index template yang dibangun dari sampel berlabel.
+Index disimpan sebagai satu file .npy terstruktur yang bisa di-memory-map.
+
+Membangun index:
+    python captcha_templates.py build folder_sampel/ -o captcha_templates.npy
+
+Nama file sampel adalah labelnya, misal ``AB12C.png`` atau ``AB12C_003.png``.
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from captcha_preprocess import green_mask
+
+logger = logging.getLogger(__name__)
+
+GLYPH_SIZE = 16
+MIN_GLYPH_PIXELS = 8
+DEFAULT_MAX_DISTANCE = 0.25  # Fraksi pixel berbeda maksimum agar glyph diterima
+CAPTCHA_LENGTHS = (5, 6)
+
+INDEX_DTYPE = np.dtype([
+    ('label', 'U1'),
+    ('glyph', np.uint8, (GLYPH_SIZE * GLYPH_SIZE,)),
+])
+
+
+def _runs(flags):
+    """Daftar (start, stop) untuk setiap run True berurutan"""
+    padded = np.concatenate(([False], flags, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def despeckle(text_mask):
+    """Buang pixel teks yang tidak punya tetangga (noise titik)"""
+    padded = np.pad(text_mask.astype(np.uint8), 1)
+    h, w = text_mask.shape
+    neighbors = sum(
+        padded[dy:dy + h, dx:dx + w]
+        for dy in range(3) for dx in range(3) if (dy, dx) != (1, 1)
+    )
+    return text_mask & (neighbors > 0)
+
+
+def segment_glyphs(text_mask, expected=None):
+    """Potong mask teks (True = teks) menjadi bounding box glyph kiri-ke-kanan
+
+    Kolom kosong memisahkan glyph. Segmen yang terlalu kecil dianggap noise.
+    Jika jumlah glyph kurang dari ``expected``, segmen terlebar dibelah
+    (karakter yang menempel).
+    """
+    columns = text_mask.sum(axis=0)
+    segments = [
+        (start, stop) for start, stop in _runs(columns > 0)
+        if columns[start:stop].sum() >= MIN_GLYPH_PIXELS
+    ]
+
+    targets = (expected,) if expected else CAPTCHA_LENGTHS
+    while segments and len(segments) < min(targets):
+        widest = max(range(len(segments)), key=lambda i: segments[i][1] - segments[i][0])
+        start, stop = segments[widest]
+        if stop - start < 2:
+            break
+        middle = (start + stop) // 2
+        segments[widest:widest + 1] = [(start, middle), (middle, stop)]
+
+    boxes = []
+    for start, stop in segments:
+        rows = np.flatnonzero(text_mask[:, start:stop].any(axis=1))
+        if rows.size:
+            boxes.append((start, rows[0], stop, rows[-1] + 1))
+    return boxes
+
+
+def normalize_glyph(text_mask, box):
+    """Crop glyph dan skala ke vektor biner GLYPH_SIZE*GLYPH_SIZE (0/1)"""
+    left, top, right, bottom = box
+    crop = Image.fromarray(np.where(text_mask[top:bottom, left:right], 255, 0).astype(np.uint8), 'L')
+    crop = crop.resize((GLYPH_SIZE, GLYPH_SIZE), Image.Resampling.BILINEAR)
+    return (np.asarray(crop) > 127).astype(np.uint8).reshape(-1)
+
+
+def extract_glyphs(img, expected=None):
+    """Mask hijau -> matriks glyph (n, GLYPH_SIZE*GLYPH_SIZE)"""
+    text_mask = despeckle(green_mask(img) == 0)
+    boxes = segment_glyphs(text_mask, expected)
+    if not boxes:
+        return np.empty((0, GLYPH_SIZE * GLYPH_SIZE), dtype=np.uint8)
+    return np.stack([normalize_glyph(text_mask, box) for box in boxes])
+
+
+class TemplateIndex:
+    """Index nearest-neighbour glyph berlabel"""
+
+    def __init__(self, records):
+        self.records = records
+        self.labels = records['label']
+        self.glyphs = records['glyph']
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def load(cls, path):
+        """Load index dengan memory-map (tidak dibaca penuh ke RAM)
+
+        dtype index adalah versi formatnya (lebar label, GLYPH_SIZE); index
+        dengan dtype lain ditolak dan harus dibangun ulang.
+        """
+        records = np.load(path, mmap_mode='r')
+        if records.dtype != INDEX_DTYPE:
+            raise ValueError(f"Format index {path} tidak cocok ({records.dtype}), bangun ulang dengan "
+                             f"'python captcha_templates.py build'")
+        return cls(records)
+
+    def save(self, path):
+        """Simpan index secara atomik"""
+        path = Path(path)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent or '.', suffix='.npy')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.asarray(self.records))
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def build(cls, samples):
+        """Bangun index dari iterable (PIL Image, label)
+
+        Sampel yang jumlah glyph-nya tidak cocok dengan panjang label dilewati.
+        """
+        records = []
+        skipped = 0
+        for img, label in samples:
+            label = label.upper()
+            glyphs = extract_glyphs(img, expected=len(label))
+            if len(glyphs) != len(label):
+                skipped += 1
+                continue
+            records.extend(zip(label, glyphs))
+
+        if skipped:
+            logger.warning(f"{skipped} sampel dilewati (segmentasi tidak cocok dengan label)")
+
+        index = np.empty(len(records), dtype=INDEX_DTYPE)
+        for i, (char, glyph) in enumerate(records):
+            index[i] = (char, glyph)
+        return cls(index)
+
+    def classify(self, glyphs):
+        """Label dan jarak (fraksi pixel berbeda) tetangga terdekat per glyph"""
+        if len(self) == 0 or len(glyphs) == 0:
+            return [], np.empty(0)
+        # Jarak Hamming untuk semua pasangan glyph x template sekaligus
+        diff = (glyphs[:, None, :] != self.glyphs[None, :, :]).sum(axis=2)
+        nearest = diff.argmin(axis=1)
+        distances = diff[np.arange(len(glyphs)), nearest] / glyphs.shape[1]
+        return [str(self.labels[i]) for i in nearest], distances
+
+
+class TemplateEngine:
+    """Engine CAPTCHA StarASN berbasis template; None jika tidak yakin"""
+
+    name = 'templates'
+
+    def __init__(self, index, max_distance=DEFAULT_MAX_DISTANCE):
+        self.index = index
+        self.max_distance = max_distance
+
+    @classmethod
+    def from_file(cls, path, max_distance=DEFAULT_MAX_DISTANCE):
+        return cls(TemplateIndex.load(path), max_distance)
+
+    def solve(self, img):
+        glyphs = extract_glyphs(img)
+        if len(glyphs) not in CAPTCHA_LENGTHS:
+            return None
+
+        labels, distances = self.index.classify(glyphs)
+        if not labels or distances.max() > self.max_distance:
+            return None
+        return ''.join(labels)
+
+
+def load_labelled_samples(folder):
+    """Iterasi (PIL Image, label) dari folder; label = nama file sebelum '_'"""
+    for path in sorted(Path(folder).iterdir()):
+        if path.suffix.lower() not in ('.png', '.jpg', '.jpeg', '.gif', '.bmp'):
+            continue
+        label = path.stem.split('_')[0]
+        with Image.open(path) as img:
+            yield img.convert('RGB'), label
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CAPTCHA template index')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help='Bangun index dari sampel berlabel')
+    p_build.add_argument('samples', help='Folder gambar CAPTCHA berlabel')
+    p_build.add_argument('-o', '--output', default='captcha_templates.npy')
+
+    p_solve = sub.add_parser('solve', help='Solve satu gambar dengan index')
+    p_solve.add_argument('image')
+    p_solve.add_argument('--index', default='captcha_templates.npy')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        index = TemplateIndex.build(load_labelled_samples(args.samples))
+        index.save(args.output)
+        print(f"Index tersimpan: {args.output} ({len(index)} glyph, "
+              f"{len(set(index.labels.tolist()))} karakter)")
+    elif args.command == 'solve':
+        engine = TemplateEngine.from_file(args.index)
+        print(engine.solve(Image.open(args.image)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 
+import argparse
 import os
 import time
 import requests
@@ -7,6 +8,7 @@ from PIL import Image
 from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright
 from captcha_solver import CaptchaSolver
+from profiling import profile_phase, profile_run
 
 # Load env
 load_dotenv()
@@ -21,8 +23,9 @@ def debug_starasn_captcha():
         page = context.new_page()
         
         print("Navigating to StarASN Login...")
-        page.goto('https://star-asn.kemenimipas.go.id/authentication/login')
-        page.wait_for_timeout(2000)
+        with profile_phase('page.goto'):
+            page.goto('https://star-asn.kemenimipas.go.id/authentication/login')
+            page.wait_for_timeout(2000)
         
         # Handle modal
         try:
@@ -47,7 +50,8 @@ def debug_starasn_captcha():
         # Screenshot the element directly to ensure we have the exact image shown
         print("Capturing captcha element screenshot...")
         try:
-            captcha_img.screenshot(path="debug_captcha_original.png")
+            with profile_phase('page.captcha_screenshot'):
+                captcha_img.screenshot(path="debug_captcha_original.png")
             print("Saved debug_captcha_original.png via screenshot")
             img = Image.open("debug_captcha_original.png")
             
@@ -67,8 +71,9 @@ def debug_starasn_captcha():
                 print("No text solved, filling with DUMMY")
                 page.fill("input#kv-captcha", "DUMMY")
                 
-            page.click("button.btn-primary.d-grid.w-100")
-            page.wait_for_timeout(5000)
+            with profile_phase('page.login_submit'):
+                page.click("button.btn-primary.d-grid.w-100")
+                page.wait_for_timeout(5000)
             
             if 'login' not in page.url.lower():
                 print("LOGIN SUCCESS!")
@@ -91,9 +96,15 @@ def debug_starasn_captcha():
             browser.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Debug CAPTCHA Star-ASN')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profil CPU + alokasi memori per attempt, laporan di PROFILE_DIR (default profiles/)')
+    args = parser.parse_args()
+
     for i in range(10):
         print(f"\n--- Attempt {i+1} ---")
-        success = debug_starasn_captcha()
+        with profile_run(f'debug_starasn_attempt{i+1}', enabled=args.profile):
+            success = debug_starasn_captcha()
         if success:
             print(f"Stopping after {i+1} attempts.")
             break
@@ -0,0 +1,342 @@
+"""
+Fleet Runner
+Presensi banyak akun sekaligus di atas engine async.
+
+Setiap akun punya daftar site dan koordinat sendiri (file akun JSON, lihat
+accounts.json.example). Akun dijalankan oleh satu Chromium bersama dengan
+batas konkurensi global (jumlah akun yang diproses bersamaan) dan rate limit
+per site (login per menit), lalu hasil per akun ditulis ke laporan JSON
+beserta throughput fleet (akun per menit).
+
+Contoh:
+    python fleet_runner.py accounts.json --concurrency 8 --rate starasn=30 --headless
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from playwright.async_api import async_playwright
+
+from artifact_store import get_artifact_store, new_run_id
+from async_automation import DEFAULT_SITE_TIMEOUT, AsyncWebAutomation
+from log_setup import bind_log_context
+from metrics import get_metrics
+from site_config import SITE_URLS, create_captcha_solver, init
+
+logger = logging.getLogger(__name__)
+
+SITE_FIELDS = ('username', 'password', 'latitude', 'longitude')
+SITE_NAMES = {'pusaka': 'Pusaka', 'starasn': 'Star-ASN'}
+
+
+def load_accounts(path):
+    """Baca dan validasi file akun fleet
+
+    Returns:
+        list: [{'id', 'sites': {site_key: {username, password, latitude,
+        longitude}}, 'email_to'}]
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    accounts = []
+    seen = set()
+    for index, entry in enumerate(data.get('accounts', [])):
+        account_id = str(entry.get('id') or f"akun-{index + 1}")
+        if account_id in seen:
+            raise ValueError(f"ID akun duplikat: {account_id}")
+        seen.add(account_id)
+
+        sites = {}
+        for site_key, site in (entry.get('sites') or {}).items():
+            if site_key not in SITE_URLS:
+                raise ValueError(f"Akun {account_id}: site tidak dikenal '{site_key}'")
+            missing = [field for field in SITE_FIELDS if site.get(field) in (None, '')]
+            if missing:
+                raise ValueError(f"Akun {account_id}/{site_key}: field kosong {', '.join(missing)}")
+            sites[site_key] = {
+                'username': site['username'],
+                'password': site['password'],
+                'latitude': float(site['latitude']),
+                'longitude': float(site['longitude']),
+            }
+        if not sites:
+            raise ValueError(f"Akun {account_id}: tidak ada site")
+
+        accounts.append({
+            'id': account_id,
+            'sites': sites,
+            'email_to': entry.get('email_to'),
+            'schedule': _parse_schedule(account_id, entry.get('schedule')),
+        })
+    return accounts
+
+
+def _parse_schedule(account_id, schedule):
+    """{'morning': '06:00-07:30'} -> {'morning': (360, 450)}, None jika tidak diisi"""
+    if not schedule:
+        return None
+    windows = {}
+    for slot, window in schedule.items():
+        try:
+            times = [
+                (int(hour), int(minute))
+                for hour, minute in (part.strip().split(':') for part in window.split('-'))
+            ]
+            if not all(0 <= hour < 24 and 0 <= minute < 60 for hour, minute in times):
+                raise ValueError(window)
+            start, end = (hour * 60 + minute for hour, minute in times)
+        except (ValueError, AttributeError):
+            # AttributeError: jendela bukan string (mis. angka di JSON)
+            raise ValueError(f"Akun {account_id}: jendela jadwal tidak valid '{window}' (contoh: 06:00-07:30)")
+        if start > end:
+            raise ValueError(f"Akun {account_id}: jendela jadwal terbalik '{window}'")
+        windows[slot] = (start, end)
+    return windows
+
+
+class RateLimiter:
+    """Batas mulai operasi per menit (jarak rata antar start, tanpa burst)"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        # Tanpa await di antara baca-tulis _next, jadi aman antar task
+        now = time.monotonic()
+        wait = self._next - now
+        self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class FleetRunner:
+    """Jalankan presensi banyak akun dengan konkurensi dan rate limit terbatas"""
+
+    def __init__(self, accounts, headless=True, concurrency=4, site_rates=None,
+                 site_timeout=DEFAULT_SITE_TIMEOUT):
+        """
+        Args:
+            accounts: Daftar akun dari load_accounts()
+            concurrency: Jumlah akun maksimum yang diproses bersamaan
+            site_rates: {site_key: login per menit}, 0/None = tanpa batas
+            site_timeout: Timeout per site per akun (detik)
+        """
+        self.accounts = accounts
+        self.headless = headless
+        self.concurrency = max(1, concurrency)
+        self.site_rates = dict(site_rates or {})
+        self.site_timeout = site_timeout
+        # Satu solver untuk semua akun: engine OCR, cache, dan statistik dipakai bersama
+        # (tidak dibuat jika tidak ada akun Star-ASN yang butuh CAPTCHA)
+        needs_captcha = any('starasn' in account['sites'] for account in accounts)
+        self.captcha_solver = create_captcha_solver() if needs_captcha else None
+        self.metrics = get_metrics()
+        self.artifacts = get_artifact_store()
+        self._session_store = None
+        # Semaphore konkurensi, rate limiter dan browser dibuat per run (per
+        # event loop); run berurutan supaya batasnya tetap global
+        self._run_lock = threading.Lock()
+
+    def is_working_day(self):
+        return datetime.now().weekday() < 5
+
+    async def _run_account(self, account, site_keys, browser_factory, semaphore, limiters, run_id):
+        # Setiap akun berjalan di task sendiri: context log tidak bocor ke akun lain
+        with bind_log_context(run_id, account['id']):
+            return await self._run_account_bound(account, site_keys, browser_factory, semaphore, limiters, run_id)
+
+    async def _run_account_bound(self, account, site_keys, browser_factory, semaphore, limiters, run_id):
+        async with semaphore:
+            start = time.perf_counter()
+            automation = None
+            waits = {}
+            try:
+                automation = AsyncWebAutomation(
+                    headless=self.headless, site_timeout=self.site_timeout,
+                    account=account, captcha_solver=self.captcha_solver
+                )
+                # Artefak semua akun di satu direktori run fleet
+                automation.run_id = run_id
+                # SessionStore dipakai bersama semua akun (satu per direktori)
+                self._session_store = automation.session_store
+                results = await automation.run_sites(browser_factory, site_keys, limiters)
+                waits = automation.wait_timer.report()
+            except Exception as e:
+                logger.error(f"Error akun {account['id']}: {e}")
+                results = [(SITE_NAMES[site_key], False, str(e)) for site_key in site_keys]
+            finally:
+                if automation is not None and automation._http_session is not None:
+                    automation._http_session.close()
+
+            if automation is not None:
+                # Notifikasi ke email_to akun, atau EMAIL_TO global jika tidak diisi
+                # (lihat email_config_from_env), termasuk saat akun gagal dengan error
+                try:
+                    await asyncio.to_thread(automation._finish_run, results)
+                except Exception as e:
+                    logger.error(f"Gagal menyelesaikan run akun {account['id']}: {e}")
+
+            elapsed = time.perf_counter() - start
+            success = all(ok for _, ok, _ in results)
+            self.metrics.record('run', elapsed, 'ok' if success else 'failed',
+                                site='all' if len(site_keys) > 1 else site_keys[0], account=account['id'])
+            logger.info(f"Akun {account['id']} selesai dalam {elapsed:.1f}s "
+                        f"({'OK' if success else 'GAGAL'})")
+            return {
+                'id': account['id'],
+                'success': success,
+                'elapsed_s': round(elapsed, 2),
+                'idle_removed_ms': sum(e['removed_ms'] for e in waits.values()),
+                'sites': [{'site': name, 'success': ok, 'message': msg} for name, ok, msg in results],
+            }
+
+    async def run_async(self, site='all', account_ids=None):
+        """Jalankan seluruh fleet (atau hanya account_ids), kembalikan laporan (dict)"""
+        jobs = []
+        for account in self.accounts:
+            if account_ids is not None and account['id'] not in account_ids:
+                continue
+            site_keys = [key for key in account['sites'] if site in ('all', key)]
+            if site_keys:
+                jobs.append((account, site_keys))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        run_id = new_run_id()
+        limiters = {key: RateLimiter(rate) for key, rate in self.site_rates.items() if rate}
+        started_at = datetime.now()
+        start = time.perf_counter()
+        logger.info(f"Fleet: {len(jobs)} akun, konkurensi {self.concurrency}, "
+                    f"rate limit {self.site_rates or '-'}")
+
+        async with async_playwright() as p:
+            browser = None
+            launch_lock = asyncio.Lock()
+
+            async def browser_factory():
+                nonlocal browser
+                async with launch_lock:
+                    if browser is None or not browser.is_connected():
+                        async with self.metrics.span('browser_launch', mode='cold'):
+                            browser = await p.chromium.launch(headless=self.headless)
+                return browser
+
+            try:
+                accounts = await asyncio.gather(
+                    *(self._run_account(account, site_keys, browser_factory, semaphore, limiters, run_id)
+                      for account, site_keys in jobs)
+                )
+            finally:
+                if browser is not None:
+                    await browser.close()
+
+        wall = time.perf_counter() - start
+        self.metrics.write_textfile()
+        if self.artifacts is not None:
+            self.artifacts.end_run(run_id)
+        succeeded = sum(1 for a in accounts if a['success'])
+        report = {
+            'run_id': run_id,
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'wall_s': round(wall, 2),
+            'accounts': len(accounts),
+            'succeeded': succeeded,
+            'failed': len(accounts) - succeeded,
+            'accounts_per_minute': round(len(accounts) / (wall / 60), 2) if wall > 0 else 0.0,
+            'concurrency': self.concurrency,
+            'site_rates': self.site_rates,
+            'session_reuse': self._session_store.stats() if self._session_store else None,
+            'results': accounts,
+        }
+        logger.info(f"Fleet selesai: {succeeded}/{len(accounts)} akun berhasil dalam {wall:.1f}s "
+                    f"({report['accounts_per_minute']} akun/menit)")
+        return report
+
+    def run(self, site='all', account_ids=None):
+        with self._run_lock:
+            return asyncio.run(self.run_async(site, account_ids))
+
+    def run_automation(self, site='all', account_ids=None):
+        """Antarmuka yang sama dengan WebAutomation.run_automation (untuk scheduler)
+
+        Args:
+            account_ids: Hanya jalankan akun ini (job yang jatuh tempo bersamaan)
+
+        Returns:
+            list: [('<akun>/<site>', success)]
+        """
+        report = self.run(site, set(account_ids) if account_ids is not None else None)
+        write_report(report)
+        return [
+            (f"{account['id']}/{entry['site']}", entry['success'])
+            for account in report['results'] for entry in account['sites']
+        ]
+
+
+def write_report(report, path=None):
+    """Simpan laporan fleet ke JSON, kembalikan path-nya"""
+    if path is None:
+        path = f"fleet_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    logger.info(f"Laporan fleet disimpan ke {path}")
+    return path
+
+
+def parse_rates(values):
+    """['starasn=30', ...] -> {'starasn': 30.0}, default dari FLEET_RATE_<SITE>"""
+    rates = {
+        key: float(os.getenv(f'FLEET_RATE_{key.upper()}', '0'))
+        for key in SITE_URLS
+    }
+    for value in values or []:
+        key, _, rate = value.partition('=')
+        if key not in SITE_URLS or not rate:
+            raise argparse.ArgumentTypeError(f"Format rate tidak valid: {value} (contoh: starasn=30)")
+        rates[key] = float(rate)
+    return {key: rate for key, rate in rates.items() if rate}
+
+
+def main():
+    init()
+    parser = argparse.ArgumentParser(description='Fleet presensi banyak akun')
+    parser.add_argument('accounts', nargs='?', default=os.getenv('FLEET_ACCOUNTS_FILE', 'accounts.json'),
+                        help='File akun JSON (default: accounts.json)')
+    parser.add_argument('--site', choices=['all', 'pusaka', 'starasn'], default='all')
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('FLEET_CONCURRENCY', '4')),
+                        help='Jumlah akun yang diproses bersamaan')
+    parser.add_argument('--rate', action='append', metavar='SITE=PER_MENIT',
+                        help='Rate limit login per site, bisa diulang (contoh: starasn=30)')
+    parser.add_argument('--site-timeout', type=int, default=int(os.getenv('SITE_TIMEOUT', str(DEFAULT_SITE_TIMEOUT))))
+    parser.add_argument('--report', default=None, help='Path laporan JSON')
+    parser.add_argument('--headless', action='store_true')
+    args = parser.parse_args()
+
+    runner = FleetRunner(
+        load_accounts(args.accounts),
+        headless=args.headless,
+        concurrency=args.concurrency,
+        site_rates=parse_rates(args.rate),
+        site_timeout=args.site_timeout,
+    )
+    report = runner.run(args.site)
+    write_report(report, args.report)
+
+    print(f"\n=== HASIL FLEET ({report['accounts_per_minute']} akun/menit) ===")
+    for account in report['results']:
+        for entry in account['sites']:
+            status = "[OK]" if entry['success'] else "[FAIL]"
+            print(f"{account['id']} / {entry['site']}: {status} {entry['message']}")
+
+
+if __name__ == "__main__":
+    main()
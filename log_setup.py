@@ -0,0 +1,159 @@
+"""
+Log Setup Module
+Logging non-blocking untuk proses scheduler yang berjalan lama.
+
+Semua logger menulis ke QueueHandler (hanya memasukkan record ke antrean);
+satu QueueListener di background thread yang menulis ke file dan console.
+File dirotasi berdasarkan ukuran (atau waktu, LOG_ROTATE_WHEN) dan file
+hasil rotasi dikompres gzip di thread listener, sehingga disk lambat tidak
+pernah menahan thread browser/OCR dan pemakaian disk tetap terbatas.
+
+Record bisa ditulis sebagai JSON per baris (LOG_JSON=1) lengkap dengan
+run_id dan akun dari bind_log_context().
+
+Environment:
+    LOG_FILE=web_automation.log   LOG_LEVEL=INFO       LOG_JSON=0
+    LOG_MAX_MB=20                 LOG_BACKUPS=10
+    LOG_ROTATE_WHEN=              (mis. 'midnight': rotasi waktu, bukan ukuran)
+    LOG_QUEUE_SIZE=10000          record dibuang jika antrean penuh
+"""
+
+import atexit
+import contextvars
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+from contextlib import contextmanager
+from datetime import datetime
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_run_id = contextvars.ContextVar('log_run_id', default=None)
+_account = contextvars.ContextVar('log_account', default=None)
+
+_listener = None
+
+
+@contextmanager
+def bind_log_context(run_id=None, account=None):
+    """Tandai semua log di blok ini (thread/task ini) dengan run_id dan akun"""
+    tokens = [_run_id.set(run_id), _account.set(account)]
+    try:
+        yield
+    finally:
+        _account.reset(tokens[1])
+        _run_id.reset(tokens[0])
+
+
+class _ContextFilter(logging.Filter):
+    """Salin run_id/akun dari context pemanggil ke record (sebelum masuk antrean)"""
+
+    def filter(self, record):
+        record.run_id = _run_id.get()
+        record.account = _account.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Satu record JSON per baris"""
+
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'run_id': getattr(record, 'run_id', None),
+            'account': getattr(record, 'account', None),
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler yang membuang record saat antrean penuh (tidak pernah menunggu)"""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+def _gzip_rotator(source, dest):
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _file_handler(path, max_bytes, backups, when):
+    if when:
+        handler = logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backups, encoding='utf-8')
+    else:
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                                       encoding='utf-8')
+    handler.namer = lambda name: name + '.gz'
+    handler.rotator = _gzip_rotator
+    return handler
+
+
+def setup_logging(log_file=None, level=None, json_format=None):
+    """Pasang pipeline logging berbasis antrean ke root logger (sekali per proses)
+
+    Argumen None dibaca dari environment (lihat docstring modul).
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_file = log_file or os.getenv('LOG_FILE', 'web_automation.log')
+    level = level or os.getenv('LOG_LEVEL', 'INFO').upper()
+    if json_format is None:
+        json_format = os.getenv('LOG_JSON', '0') == '1'
+
+    file_handler = _file_handler(
+        log_file,
+        max_bytes=int(float(os.getenv('LOG_MAX_MB', '20')) * 1024 * 1024),
+        backups=int(os.getenv('LOG_BACKUPS', '10')),
+        when=os.getenv('LOG_ROTATE_WHEN') or None,
+    )
+    file_handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+    queue_handler = _DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler,
+                                               respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Tulis sisa antrean log lalu hentikan listener"""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    if _DroppingQueueHandler.dropped:
+        print(f"Log: {_DroppingQueueHandler.dropped} record dibuang karena antrean penuh")
@@ -0,0 +1,215 @@
+"""
+Metrics Module
+Span per fase otomatisasi (durasi, jumlah attempt, outcome) per site/akun.
+
+Setiap span yang selesai ditulis sebagai satu baris event JSON ke file
+JSONL dan diakumulasi ke histogram + counter in-memory yang diekspor ke file
+textfile collector Prometheus (node_exporter --collector.textfile.directory):
+
+    absensi_phase_duration_seconds{phase,site,account,...}   histogram
+    absensi_phase_outcomes_total{phase,...,outcome}           counter
+    absensi_phase_attempts_total{phase,...}                   counter
+
+Fase yang dicatat: run, browser_launch, goto, form_fill, login,
+login_submit, captcha_solve, captcha_strategy, presence, presence_click.
+
+Environment:
+    METRICS_EVENTS_FILE=metrics_events.jsonl   kosong = tanpa file event
+    METRICS_TEXTFILE=metrics.prom              kosong = tanpa textfile
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'absensi_phase'
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+class _Span:
+    """Satu fase yang diukur, dipakai dengan `with` maupun `async with`
+
+    Outcome default 'ok', atau 'error' jika blok melempar exception; bisa
+    diganti dengan set() di dalam blok.
+    """
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.outcome = None
+        self.attempts = None
+
+    def set(self, outcome=None, attempts=None):
+        if outcome is not None:
+            self.outcome = outcome
+        if attempts is not None:
+            self.attempts = attempts
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        outcome = self.outcome or ('error' if exc_type is not None else 'ok')
+        self.metrics.record(self.name, time.perf_counter() - self.start, outcome, self.attempts, **self.labels)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels)
+
+
+class Metrics:
+    """Akumulator span + penulis event JSONL dan textfile Prometheus"""
+
+    def __init__(self, events_path=None, textfile_path=None, buckets=DURATION_BUCKETS):
+        self.events_path = events_path
+        self.textfile_path = textfile_path
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._events = None
+        # (phase, labels) -> {'buckets': [...], 'sum', 'count', 'attempts'}
+        self._durations = {}
+        # (phase, labels, outcome) -> count
+        self._outcomes = {}
+
+    def span(self, name, **labels):
+        """Ukur blok sebagai fase `name` dengan label (site, account, ...)"""
+        return _Span(self, name, labels)
+
+    def record(self, name, duration_s, outcome='ok', attempts=None, **labels):
+        """Catat satu fase yang sudah diukur"""
+        key = (name, tuple(sorted(labels.items())))
+        event = {
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'phase': name,
+            'duration_ms': round(duration_s * 1000, 1),
+            'outcome': outcome,
+            **labels,
+        }
+        if attempts is not None:
+            event['attempts'] = attempts
+
+        with self._lock:
+            entry = self._durations.get(key)
+            if entry is None:
+                entry = self._durations[key] = {
+                    'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0, 'attempts': 0
+                }
+            for index, bound in enumerate(self.buckets):
+                if duration_s <= bound:
+                    entry['buckets'][index] += 1
+            entry['sum'] += duration_s
+            entry['count'] += 1
+            entry['attempts'] += attempts if attempts is not None else 1
+            self._outcomes[key + (outcome,)] = self._outcomes.get(key + (outcome,), 0) + 1
+            self._write_event(event)
+
+    def _write_event(self, event):
+        if not self.events_path:
+            return
+        try:
+            if self._events is None:
+                self._events = open(self.events_path, 'a', encoding='utf-8', buffering=1)
+            self._events.write(json.dumps(event, ensure_ascii=False) + '\n')
+        except Exception as e:
+            logger.warning(f"Gagal menulis event metrics {self.events_path}: {e}")
+            self.events_path = None
+
+    def render(self):
+        """Isi textfile Prometheus (format exposition teks)"""
+        with self._lock:
+            durations = {key: dict(entry, buckets=list(entry['buckets'])) for key, entry in self._durations.items()}
+            outcomes = dict(self._outcomes)
+
+        lines = [
+            f'# HELP {METRIC_PREFIX}_duration_seconds Durasi fase otomatisasi presensi',
+            f'# TYPE {METRIC_PREFIX}_duration_seconds histogram',
+        ]
+        for (name, labels), entry in sorted(durations.items()):
+            base = _format_labels((('phase', name),) + labels)
+            for bound, count in zip(self.buckets, entry['buckets']):
+                lines.append(f'{METRIC_PREFIX}_duration_seconds_bucket{{{base},le="{bound}"}} {count}')
+            lines.append(f'{METRIC_PREFIX}_duration_seconds_bucket{{{base},le="+Inf"}} {entry["count"]}')
+            lines.append(f'{METRIC_PREFIX}_duration_seconds_sum{{{base}}} {entry["sum"]:.6f}')
+            lines.append(f'{METRIC_PREFIX}_duration_seconds_count{{{base}}} {entry["count"]}')
+
+        lines.append(f'# HELP {METRIC_PREFIX}_outcomes_total Jumlah fase selesai per outcome')
+        lines.append(f'# TYPE {METRIC_PREFIX}_outcomes_total counter')
+        for (name, labels, outcome), count in sorted(outcomes.items()):
+            base = _format_labels((('phase', name),) + labels + (('outcome', outcome),))
+            lines.append(f'{METRIC_PREFIX}_outcomes_total{{{base}}} {count}')
+
+        lines.append(f'# HELP {METRIC_PREFIX}_attempts_total Jumlah attempt (mis. CAPTCHA login) per fase')
+        lines.append(f'# TYPE {METRIC_PREFIX}_attempts_total counter')
+        for (name, labels), entry in sorted(durations.items()):
+            base = _format_labels((('phase', name),) + labels)
+            lines.append(f'{METRIC_PREFIX}_attempts_total{{{base}}} {entry["attempts"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self):
+        """Tulis textfile Prometheus secara atomik (collector tidak membaca file setengah jadi)"""
+        if not self.textfile_path:
+            return
+        tmp_path = None
+        try:
+            directory = os.path.dirname(os.path.abspath(self.textfile_path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.replace(tmp_path, self.textfile_path)
+        except Exception as e:
+            logger.warning(f"Gagal menulis textfile metrics {self.textfile_path}: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def summary(self):
+        """{fase: {count, avg_ms}} untuk log akhir run"""
+        with self._lock:
+            totals = {}
+            for (name, _), entry in self._durations.items():
+                total = totals.setdefault(name, {'count': 0, 'sum': 0.0})
+                total['count'] += entry['count']
+                total['sum'] += entry['sum']
+        return {
+            name: {'count': t['count'], 'avg_ms': round(t['sum'] / t['count'] * 1000, 1)}
+            for name, t in totals.items()
+        }
+
+    def close(self):
+        with self._lock:
+            if self._events is not None:
+                self._events.close()
+                self._events = None
+
+
+def get_metrics():
+    """Metrics bersama (satu per proses, dipakai semua akun dan CaptchaSolver)"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(
+                events_path=os.getenv('METRICS_EVENTS_FILE', 'metrics_events.jsonl'),
+                textfile_path=os.getenv('METRICS_TEXTFILE', 'metrics.prom'),
+            )
+        return _metrics
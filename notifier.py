@@ -0,0 +1,359 @@
+"""
+Notifier Module
+Antrean notifikasi email di background.
+
+Run presensi hanya memasukkan notifikasi ke antrean (submit) lalu lanjut.
+Satu worker thread mengirimnya lewat satu koneksi SMTP yang sudah login dan
+dipakai ulang antar pesan (NOOP sebelum dipakai lagi setelah idle, koneksi
+ulang otomatis jika putus). Pengiriman yang gagal diulang dengan backoff
+eksponensial.
+
+Mode digest (NOTIFY_DIGEST_SECONDS > 0) menunggu sampai akhir jendela lalu
+menggabungkan semua notifikasi untuk penerima yang sama (banyak akun/site)
+menjadi satu email.
+
+Server SMTP diatur lewat environment, sehingga bisa diarahkan ke server
+SMTP lokal untuk pengujian:
+
+    python -m aiosmtpd -n -l localhost:1025
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=0 SMTP_AUTH=0 \\
+        python notifier.py --to saya@example.com
+"""
+
+import argparse
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+# smtplib dan email.mime diimpor di worker saat email pertama dikirim, bukan
+# saat modul diimpor oleh setiap run presensi
+
+logger = logging.getLogger(__name__)
+
+IDLE_CHECK_SECONDS = 60  # Koneksi idle lebih lama dari ini dicek dengan NOOP
+SMTP_TIMEOUT = 30
+CLOSE_TIMEOUT = 60  # Batas tunggu antrean dikosongkan saat proses selesai
+
+_STOP = object()
+
+_notifiers = {}
+_notifiers_lock = threading.Lock()
+
+
+def build_message(from_email, to_email, success, message, when=None):
+    """Email notifikasi satu hasil run (format lama send_email_notification)"""
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    when = when or datetime.now()
+    msg = MIMEMultipart()
+    msg['From'] = from_email
+    msg['To'] = to_email
+
+    if success:
+        msg['Subject'] = '✅ Absensi Otomatis Berhasil'
+        body = f"""
+Absensi otomatis telah berhasil diselesaikan!
+
+Waktu: {when.strftime('%Y-%m-%d %H:%M:%S')}
+
+{message}
+
+---
+Web Automation System
+                """
+    else:
+        msg['Subject'] = '❌ Absensi Otomatis Gagal'
+        body = f"""
+Absensi otomatis mengalami error!
+
+Waktu: {when.strftime('%Y-%m-%d %H:%M:%S')}
+
+Error: {message}
+
+---
+Web Automation System
+                """
+
+    msg.attach(MIMEText(body, 'plain', 'utf-8'))
+    return msg
+
+
+def build_digest(from_email, to_email, items):
+    """Satu email ringkasan untuk beberapa notifikasi (penerima yang sama)"""
+    if len(items) == 1:
+        item = items[0]
+        return build_message(from_email, to_email, item['success'], item['message'], item['when'])
+
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    failed = sum(1 for item in items if not item['success'])
+    msg = MIMEMultipart()
+    msg['From'] = from_email
+    msg['To'] = to_email
+    if failed:
+        msg['Subject'] = f'❌ Absensi Otomatis: {failed}/{len(items)} Gagal'
+    else:
+        msg['Subject'] = f'✅ Absensi Otomatis Berhasil ({len(items)} notifikasi)'
+
+    sections = []
+    for item in items:
+        status = 'Berhasil' if item['success'] else 'Gagal'
+        title = f"[{item['label']}] " if item['label'] else ''
+        sections.append(f"{title}{status} - {item['when'].strftime('%Y-%m-%d %H:%M:%S')}\n{item['message']}")
+    body = "Ringkasan absensi otomatis:\n\n" + "\n\n".join(sections) + "\n\n---\nWeb Automation System\n"
+
+    msg.attach(MIMEText(body, 'plain', 'utf-8'))
+    return msg
+
+
+class SmtpConnection:
+    """Satu koneksi SMTP terautentikasi yang dipakai ulang"""
+
+    def __init__(self, host, port, username=None, password=None, starttls=True, timeout=SMTP_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._server = None
+        self._last_used = 0.0
+        self.connects = 0
+
+    def _connect(self):
+        import smtplib
+
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        self._server = server
+        self.connects += 1
+        logger.debug(f"Koneksi SMTP {self.host}:{self.port} dibuka")
+
+    def _alive(self):
+        if self._server is None:
+            return False
+        import smtplib
+
+        if time.monotonic() - self._last_used < IDLE_CHECK_SECONDS:
+            return True
+        try:
+            return self._server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send(self, msg):
+        import smtplib
+
+        if not self._alive():
+            self.close()
+            self._connect()
+        try:
+            self._server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Koneksi lama diputus server di antara cek dan kirim: sekali koneksi ulang
+            self.close()
+            self._connect()
+            self._server.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._server is None:
+            return
+        import smtplib
+
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._server = None
+
+
+class Notifier:
+    """Antrean notifikasi + worker pengirim (satu per konfigurasi SMTP)"""
+
+    def __init__(self, connection, from_email, digest_seconds=0, max_retries=3, backoff=2.0):
+        """
+        Args:
+            connection: SmtpConnection
+            from_email: Alamat pengirim
+            digest_seconds: > 0 = gabungkan notifikasi per penerima per jendela
+            max_retries: Jumlah percobaan ulang setelah kegagalan pertama
+            backoff: Jeda awal (detik) sebelum percobaan ulang, berlipat dua
+        """
+        self.connection = connection
+        self.from_email = from_email
+        self.digest_seconds = digest_seconds
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sent = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name='notifier', daemon=True)
+        self._worker.start()
+
+    def submit(self, to_email, success, message, label=None):
+        """Masukkan notifikasi ke antrean (tidak menunggu pengiriman)"""
+        if self._closed:
+            logger.warning("Notifier sudah ditutup, notifikasi diabaikan")
+            return
+        self._queue.put({
+            'to_email': to_email,
+            'success': success,
+            'message': message,
+            'label': label,
+            'when': datetime.now(),
+        })
+        logger.info(f"Notifikasi email diantrekan ({self._queue.qsize()} dalam antrean)")
+
+    def _collect(self, first):
+        """Batch notifikasi: satu item, atau semua item dalam jendela digest
+
+        Returns:
+            tuple: (batch, stopping) - stopping True jika close() dipanggil
+        """
+        batch = [first]
+        if self.digest_seconds <= 0:
+            return batch, False
+        deadline = time.monotonic() + self.digest_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return batch, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, False
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+    def _deliver(self, msg, to_email, count):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.connection.send(msg)
+                self.sent += count
+                logger.info(f"Email notifikasi berhasil dikirim ke {to_email}"
+                            + (f" ({count} notifikasi digabung)" if count > 1 else ""))
+                return True
+            except Exception as e:
+                self.connection.close()
+                if attempt == self.max_retries:
+                    self.failed += count
+                    logger.error(f"Gagal mengirim email ke {to_email} setelah {attempt + 1} percobaan: {e}")
+                    return False
+                delay = self.backoff * (2 ** attempt)
+                logger.warning(f"Gagal mengirim email ({e}), coba lagi dalam {delay:.0f}s")
+                time.sleep(delay)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, stopping = self._collect(item)
+
+            by_recipient = {}
+            for entry in batch:
+                by_recipient.setdefault(entry['to_email'], []).append(entry)
+            for to_email, items in by_recipient.items():
+                self._deliver(build_digest(self.from_email, to_email, items), to_email, len(items))
+        self.connection.close()
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Kirim sisa antrean (jendela digest dipotong) lalu hentikan worker"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._worker.join(timeout)
+        if self._worker.is_alive():
+            logger.warning(f"Notifikasi belum terkirim saat keluar: {self._queue.qsize()} dalam antrean")
+
+    def stats(self):
+        return {'sent': self.sent, 'failed': self.failed, 'queued': self._queue.qsize(),
+                'connections': self.connection.connects}
+
+
+def get_notifier(email_config):
+    """Notifier bersama per pengirim (satu koneksi SMTP per proses), None jika
+    email tidak dikonfigurasi
+
+    Args:
+        email_config: dict dari WebAutomation (from_email, app_password,
+            smtp_host, smtp_port, smtp_starttls, smtp_auth, digest_seconds,
+            max_retries)
+    """
+    from_email = email_config.get('from_email')
+    if not from_email or (email_config.get('smtp_auth', True) and not email_config.get('app_password')):
+        return None
+
+    key = (email_config['smtp_host'], email_config['smtp_port'], from_email)
+    with _notifiers_lock:
+        notifier = _notifiers.get(key)
+        if notifier is None:
+            connection = SmtpConnection(
+                email_config['smtp_host'],
+                email_config['smtp_port'],
+                username=from_email if email_config.get('smtp_auth', True) else None,
+                password=email_config.get('app_password'),
+                starttls=email_config.get('smtp_starttls', True),
+            )
+            notifier = _notifiers[key] = Notifier(
+                connection,
+                from_email,
+                digest_seconds=email_config.get('digest_seconds', 0),
+                max_retries=email_config.get('max_retries', 3),
+            )
+            atexit.register(notifier.close)
+        return notifier
+
+
+def email_config_from_env(to_email=None):
+    """Konfigurasi email/SMTP dari environment"""
+    return {
+        'from_email': os.getenv('EMAIL_FROM'),
+        'to_email': to_email or os.getenv('EMAIL_TO', 'hakimarx@gmail.com'),
+        'app_password': os.getenv('EMAIL_APP_PASSWORD'),
+        'smtp_host': os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+        'smtp_port': int(os.getenv('SMTP_PORT', '587')),
+        'smtp_starttls': os.getenv('SMTP_STARTTLS', '1') == '1',
+        'smtp_auth': os.getenv('SMTP_AUTH', '1') == '1',
+        'digest_seconds': float(os.getenv('NOTIFY_DIGEST_SECONDS', '0')),
+        'max_retries': int(os.getenv('NOTIFY_MAX_RETRIES', '3')),
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Kirim notifikasi uji lewat antrean notifier')
+    parser.add_argument('--to', default=None, help='Penerima (default EMAIL_TO)')
+    parser.add_argument('--count', type=int, default=1, help='Jumlah notifikasi uji')
+    args = parser.parse_args()
+
+    config = email_config_from_env(args.to)
+    notifier = get_notifier(config)
+    if notifier is None:
+        print("Email tidak dikonfigurasi (EMAIL_FROM / EMAIL_APP_PASSWORD atau SMTP_AUTH=0)")
+        return
+
+    start = time.perf_counter()
+    for index in range(args.count):
+        notifier.submit(config['to_email'], True, f"- Uji notifikasi {index + 1}", label=f"uji-{index + 1}")
+    logger.info(f"{args.count} notifikasi diantrekan dalam {(time.perf_counter() - start) * 1000:.1f} ms")
+    notifier.close()
+    logger.info(f"Notifier: {notifier.stats()}")
+
+
+if __name__ == "__main__":
+    main()
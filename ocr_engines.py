@@ -0,0 +1,238 @@
+"""
+OCR Engines Module
+Backend OCR yang bisa dipilih untuk CaptchaSolver.
+
+- tesserocr: binding library Tesseract, engine tetap hangat di dalam proses
+  (model bahasa dimuat sekali, tanpa temp file dan fork per panggilan)
+- pytesseract: fallback, menjalankan binary tesseract per panggilan
+
+Binary tesseract untuk pytesseract dicari sekali (TESSERACT_CMD, PATH, lalu
+lokasi instalasi umum Linux/macOS/Windows) dan hasilnya disimpan ke
+TESSERACT_CACHE_FILE (default tesseract_cache.json) bersama versinya.
+Proses berikutnya hanya mencocokkan ukuran + mtime binary; `tesseract
+--version` dijalankan ulang hanya jika binary berubah (mis. upgrade).
+"""
+
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+CHAR_WHITELIST = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+KNOWN_TESSERACT_PATHS = (
+    '/usr/bin/tesseract',
+    '/usr/local/bin/tesseract',
+    '/opt/homebrew/bin/tesseract',
+    r'C:\Program Files\Tesseract-OCR\tesseract.exe',
+    r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
+)
+VERSION_TIMEOUT = 10
+
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def _probe_version(cmd):
+    """Versi dari `tesseract --version` (None jika binary tidak bisa dijalankan)"""
+    try:
+        result = subprocess.run([cmd, '--version'], capture_output=True, text=True, timeout=VERSION_TIMEOUT)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"tesseract {cmd} tidak bisa dijalankan: {e}")
+        return None
+    # Tesseract lama menulis versi ke stderr
+    match = re.search(r'tesseract\s+v?(\d[\w.-]*)', result.stdout + result.stderr)
+    return match.group(1) if match else None
+
+
+def _load_tesseract_cache(path):
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Gagal memuat cache tesseract {path}: {e}")
+        return None
+
+
+def _save_tesseract_cache(path, entry):
+    """Tulis cache secara atomik (beberapa proses OCR bisa mulai bersamaan)"""
+    if not path:
+        return
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Gagal menyimpan cache tesseract {path}: {e}")
+
+
+def _tesseract_candidates():
+    env_cmd = os.getenv('TESSERACT_CMD')
+    if env_cmd:
+        # Path eksplisit: jangan diam-diam memakai binary lain
+        return [env_cmd]
+    candidates = [shutil.which('tesseract')] + list(KNOWN_TESSERACT_PATHS)
+    return [path for path in dict.fromkeys(candidates) if path]
+
+
+def find_tesseract(cache_path=None):
+    """Cari binary tesseract, memakai cache di disk jika binary belum berubah
+
+    Args:
+        cache_path: File cache (default TESSERACT_CACHE_FILE atau
+            'tesseract_cache.json'; string kosong = tanpa cache)
+
+    Returns:
+        tuple: (path binary, versi) atau None jika tidak ditemukan
+    """
+    if cache_path is None:
+        cache_path = os.getenv('TESSERACT_CACHE_FILE', 'tesseract_cache.json')
+    candidates = _tesseract_candidates()
+
+    cached = _load_tesseract_cache(cache_path)
+    if cached and cached.get('cmd') in candidates:
+        try:
+            if _fingerprint(cached['cmd']) == {'size': cached.get('size'), 'mtime': cached.get('mtime')}:
+                return cached['cmd'], cached['version']
+        except OSError:
+            pass
+        logger.info(f"Binary tesseract berubah atau hilang sejak di-cache: {cached.get('cmd')}")
+
+    for cmd in candidates:
+        if not os.path.isfile(cmd):
+            continue
+        version = _probe_version(cmd)
+        if version is None:
+            continue
+        _save_tesseract_cache(cache_path, dict(cmd=cmd, version=version, **_fingerprint(cmd)))
+        logger.info(f"Binary tesseract ditemukan: {cmd} (versi {version})")
+        return cmd, version
+    return None
+
+
+class PytesseractEngine:
+    """Backend fallback: satu subprocess tesseract per panggilan"""
+
+    name = 'pytesseract'
+
+    def __init__(self):
+        found = find_tesseract()
+        if found is None:
+            raise RuntimeError("binary tesseract tidak ditemukan (atur TESSERACT_CMD)")
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd, self.version = found
+        self._pytesseract = pytesseract
+
+    def recognize(self, image, psm):
+        config = f'--oem 3 --psm {psm} -c tessedit_char_whitelist={CHAR_WHITELIST}'
+        return self._pytesseract.image_to_string(image, config=config)
+
+    def close(self):
+        pass
+
+
+class TesserocrEngine:
+    """Backend in-process: pool PyTessBaseAPI yang dipakai ulang
+
+    Satu instance API tidak thread-safe, jadi setiap panggilan meminjam
+    instance dari pool. Instance baru dibuat bila pool kosong, sehingga
+    jumlahnya mengikuti jumlah worker OCR yang benar-benar aktif.
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self, lang='eng'):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self.lang = lang
+        self.version = tesserocr.tesseract_version().split()[1]
+        self._pool = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        # Muat model sekali sekarang supaya error langsung ketahuan
+        self._release(self._create())
+
+    def _create(self):
+        api = self._tesserocr.PyTessBaseAPI(lang=self.lang, oem=self._tesserocr.OEM.DEFAULT)
+        api.SetVariable('tessedit_char_whitelist', CHAR_WHITELIST)
+        with self._lock:
+            self._all.append(api)
+        return api
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._create()
+
+    def _release(self, api):
+        self._pool.put(api)
+
+    def recognize(self, image, psm):
+        api = self._acquire()
+        try:
+            api.SetPageSegMode(psm)
+            api.SetImage(image)
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            self._release(api)
+
+    def close(self):
+        with self._lock:
+            for api in self._all:
+                api.End()
+            self._all.clear()
+        self._pool = queue.LifoQueue()
+
+
+ENGINES = {
+    'tesserocr': TesserocrEngine,
+    'pytesseract': PytesseractEngine,
+}
+
+# Urutan percobaan untuk mode 'auto': engine hangat dulu, pytesseract terakhir
+AUTO_ORDER = ('tesserocr', 'pytesseract')
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(name='auto'):
+    """Ambil engine OCR bersama untuk seluruh proses (None jika tidak ada)
+
+    Engine dibuat sekali per proses, sehingga membuat CaptchaSolver baru
+    tidak lagi memuat model atau menjalankan tesseract --version ulang.
+    """
+    names = AUTO_ORDER if name == 'auto' else (name,)
+
+    with _engines_lock:
+        for engine_name in names:
+            if engine_name not in ENGINES:
+                raise ValueError(f"OCR engine tidak dikenal: {engine_name}")
+            if engine_name in _engines:
+                engine = _engines[engine_name]
+            else:
+                try:
+                    engine = ENGINES[engine_name]()
+                    logger.info(f"OCR engine {engine_name} siap (tesseract {engine.version})")
+                except Exception as e:
+                    logger.debug(f"OCR engine {engine_name} tidak tersedia: {e}")
+                    engine = None
+                _engines[engine_name] = engine
+            if engine is not None:
+                return engine
+
+    return None
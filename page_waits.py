@@ -0,0 +1,123 @@
+"""
+Page Waits Module
+Batas waktu tunggu berbasis kondisi halaman dan pencatat waktu tunggu per
+fase.
+
+Setiap sleep tetap (page.wait_for_timeout) diganti kondisi yang sebenarnya
+ditunggu (selector tampil, URL berubah, respons XHR) dengan batas atas
+(ceiling) di bawah. WaitTimer mencatat durasi tunggu nyata per fase
+dibandingkan sleep tetap yang digantikannya, sehingga waktu idle yang
+dihilangkan bisa dilaporkan.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Ceiling (ms) per jenis kondisi
+FORM_TIMEOUT = 10000       # Form/halaman siap setelah goto
+LOGIN_RESPONSE_TIMEOUT = 15000  # Respons XHR login / navigasi setelah submit
+REDIRECT_TIMEOUT = 10000   # Redirect ke dashboard setelah login sukses
+ACTION_TIMEOUT = 8000      # Respons server setelah klik presensi
+SHORT_TIMEOUT = 3000       # Modal tertutup, gambar CAPTCHA baru
+
+# Selector yang menandakan halaman presensi Pusaka sudah dirender
+PUSAKA_PRESENCE_READY = (
+    "button:has-text('Presensi Masuk'), button:has-text('Absen Masuk'), "
+    "button:has-text('Presensi Pulang'), button:has-text('Absen Pulang'), "
+    "button:has-text('Simpan'), :text('Sudah Presensi'), "
+    ":text('Anda sudah melakukan presensi')"
+)
+STARASN_DASHBOARD_READY = "div.card:has-text('PRESENSI MASUK'), div.card:has-text('PRESENSI PULANG')"
+
+# Script kondisi: gambar CAPTCHA sudah selesai dimuat
+CAPTCHA_LOADED_JS = (
+    "() => { const img = document.querySelector('img#kv-image');"
+    " return !!img && img.complete && img.naturalWidth > 0; }"
+)
+
+
+def is_login_response(response):
+    """XHR POST login Star-ASN"""
+    return response.request.method == 'POST' and '/authentication/login' in response.url
+
+
+def is_captcha_response(response):
+    """Gambar CAPTCHA baru Star-ASN (/authentication/captcha?t=...)"""
+    return '/authentication/captcha' in response.url
+
+
+def is_action_response(response):
+    """Respons submit presensi: request yang mengubah data atau navigasi halaman"""
+    request = response.request
+    return request.method in ('POST', 'PUT', 'PATCH') or request.is_navigation_request()
+
+
+class _Span:
+    """Pengukur satu fase, bisa dipakai dengan `with` maupun `async with`"""
+
+    def __init__(self, timer, phase, replaced_ms):
+        self.timer = timer
+        self.phase = phase
+        self.replaced_ms = replaced_ms
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(self.phase, self.replaced_ms, (time.perf_counter() - self.start) * 1000)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+
+class WaitTimer:
+    """Catat waktu tunggu nyata vs sleep tetap yang digantikan, per fase"""
+
+    def __init__(self):
+        self._phases = {}
+        self._lock = threading.Lock()
+
+    def phase(self, name, replaced_ms):
+        """Ukur blok tunggu `name` yang menggantikan sleep `replaced_ms`"""
+        return _Span(self, name, replaced_ms)
+
+    def record(self, name, replaced_ms, waited_ms):
+        with self._lock:
+            entry = self._phases.setdefault(name, {'count': 0, 'replaced_ms': 0.0, 'waited_ms': 0.0})
+            entry['count'] += 1
+            entry['replaced_ms'] += replaced_ms
+            entry['waited_ms'] += waited_ms
+
+    def report(self):
+        """{fase: {count, replaced_ms, waited_ms, removed_ms}} lalu reset"""
+        with self._lock:
+            phases, self._phases = self._phases, {}
+        return {
+            name: {
+                'count': e['count'],
+                'replaced_ms': round(e['replaced_ms']),
+                'waited_ms': round(e['waited_ms']),
+                'removed_ms': round(e['replaced_ms'] - e['waited_ms']),
+            }
+            for name, e in phases.items()
+        }
+
+    def log_report(self):
+        report = self.report()
+        if not report:
+            return report
+        logger.info("Waktu tunggu per fase (sleep lama -> tunggu kondisi):")
+        for name, e in report.items():
+            logger.info(f"  {name:<28} {e['count']}x {e['replaced_ms']:>6} ms -> {e['waited_ms']:>6} ms "
+                        f"(hemat {e['removed_ms']} ms)")
+        removed = sum(e['removed_ms'] for e in report.values())
+        logger.info(f"  Total idle dihilangkan: {removed / 1000:.1f}s")
+        return report
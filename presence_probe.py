@@ -0,0 +1,162 @@
+"""
+Presence Probe Module
+Status halaman presensi dibaca dengan satu page.evaluate.
+
+Setiap site punya spec deklaratif (tombol, card, marker teks). Script probe
+mengevaluasi seluruh spec di dalam halaman dan mengembalikan snapshot:
+
+    {'buttons': {'masuk': True, ...},
+     'cards': {'masuk': {'found': True, 'text': '...', 'has_action': True}, ...},
+     'markers': {'sudah': False, ...}}
+
+Pencocokan teks mengikuti :has-text Playwright (tidak peka huruf besar,
+spasi dinormalkan, elemen pertama dalam urutan dokumen) atas teks yang
+terlihat (innerText): isi script/style dan elemen tersembunyi diabaikan.
+Elemen yang bisa diklik ditandai atribut data-presence-probe, sehingga aksi
+cukup memakai probe_selector() tanpa query ulang. Keputusan presensi (decide_*) murni
+Python dari snapshot.
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+PROBE_ATTRIBUTE = 'data-presence-probe'
+
+PRESENCE_SPECS = {
+    'pusaka': {
+        'buttons': {
+            'masuk': {'selector': 'button', 'texts': ['Presensi Masuk', 'Absen Masuk']},
+            'pulang': {'selector': 'button', 'texts': ['Presensi Pulang', 'Absen Pulang', 'Simpan']},
+        },
+        'cards': {},
+        'markers': {
+            'sudah': ['Sudah Presensi', 'Anda sudah melakukan presensi'],
+        },
+    },
+    'starasn': {
+        'buttons': {},
+        'cards': {
+            'masuk': {'selector': 'div.card', 'title': 'PRESENSI MASUK', 'action': 'a.btn, button.btn'},
+            'pulang': {'selector': 'div.card', 'title': 'PRESENSI PULANG', 'action': 'a.btn, button.btn'},
+        },
+        'markers': {},
+    },
+}
+
+PROBE_JS = """
+([spec, attr, site]) => {
+    const norm = (s) => (s || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+    // Teks yang terlihat saja: innerText melewati script/style dan elemen
+    // tersembunyi di dalamnya; elemen yang tidak dirender sama sekali
+    // (display:none, innerText-nya jatuh ke textContent) dianggap kosong
+    const text = (el) => (el && el.getClientRects().length ? el.innerText : '');
+    const mark = (el, key) => el.setAttribute(attr, site + '.' + key);
+    document.querySelectorAll('[' + attr + ']').forEach((el) => el.removeAttribute(attr));
+
+    const snapshot = {buttons: {}, cards: {}, markers: {}};
+    for (const [key, rule] of Object.entries(spec.buttons)) {
+        const texts = rule.texts.map(norm);
+        const el = Array.from(document.querySelectorAll(rule.selector))
+            .find((e) => texts.some((t) => norm(text(e)).includes(t)));
+        snapshot.buttons[key] = !!el;
+        if (el) mark(el, key);
+    }
+    for (const [key, rule] of Object.entries(spec.cards)) {
+        const title = norm(rule.title);
+        const card = Array.from(document.querySelectorAll(rule.selector))
+            .find((e) => norm(text(e)).includes(title));
+        const action = card ? card.querySelector(rule.action) : null;
+        snapshot.cards[key] = {
+            found: !!card,
+            text: text(card),
+            has_action: !!action,
+        };
+        if (action) mark(action, key);
+    }
+    const body = norm(text(document.body));
+    for (const [key, texts] of Object.entries(spec.markers)) {
+        snapshot.markers[key] = texts.some((t) => body.includes(norm(t)));
+    }
+    return snapshot;
+}
+"""
+
+
+def probe_selector(site_key, key):
+    """Selector elemen yang ditandai probe terakhir"""
+    return f"[{PROBE_ATTRIBUTE}='{site_key}.{key}']"
+
+
+class ProbeStats:
+    """Latensi deteksi status presensi (satu page.evaluate per probe)"""
+
+    def __init__(self):
+        self.samples = []
+
+    def record(self, site_key, elapsed_ms):
+        self.samples.append((site_key, elapsed_ms))
+        logger.info(f"Deteksi status presensi {site_key}: {elapsed_ms:.1f} ms")
+
+    def report(self):
+        """{site: {probes, avg_ms, max_ms}} lalu reset"""
+        samples, self.samples = self.samples, []
+        result = {}
+        for site_key, elapsed_ms in samples:
+            entry = result.setdefault(site_key, {'probes': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['probes'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], round(elapsed_ms, 1))
+        for entry in result.values():
+            entry['avg_ms'] = round(entry.pop('total_ms') / entry['probes'], 1)
+        return result
+
+
+def probe(page, site_key, stats=None):
+    """Snapshot status halaman presensi (Playwright sync, satu round trip)"""
+    start = time.perf_counter()
+    snapshot = page.evaluate(PROBE_JS, [PRESENCE_SPECS[site_key], PROBE_ATTRIBUTE, site_key])
+    if stats is not None:
+        stats.record(site_key, (time.perf_counter() - start) * 1000)
+    return snapshot
+
+
+async def probe_async(page, site_key, stats=None):
+    """Versi async probe()"""
+    start = time.perf_counter()
+    snapshot = await page.evaluate(PROBE_JS, [PRESENCE_SPECS[site_key], PROBE_ATTRIBUTE, site_key])
+    if stats is not None:
+        stats.record(site_key, (time.perf_counter() - start) * 1000)
+    return snapshot
+
+
+def decide_pusaka(snapshot, hour):
+    """Keputusan presensi Pusaka dari snapshot
+
+    Returns:
+        tuple: (key tombol yang diklik atau None, success, message)
+    """
+    if snapshot['buttons']['masuk']:
+        return 'masuk', True, "Presensi Masuk berhasil diklik"
+    if snapshot['buttons']['pulang']:
+        if hour >= 16:
+            return 'pulang', True, "Presensi Pulang berhasil diklik"
+        return None, True, "Menunggu jam pulang (Tombol Pulang sudah ada)"
+    if snapshot['markers']['sudah']:
+        return None, True, "Sudah melakukan presensi sebelumnya"
+    return None, False, "Tombol Presensi tidak ditemukan"
+
+
+def decide_starasn(snapshot, hour):
+    """Keputusan presensi Star-ASN dari snapshot (lihat decide_pusaka)"""
+    masuk = snapshot['cards']['masuk']
+    if masuk['found'] and masuk['has_action'] and "Belum Presensi" in masuk['text']:
+        return 'masuk', True, "Presensi Masuk berhasil diklik"
+
+    pulang = snapshot['cards']['pulang']
+    if pulang['found'] and pulang['has_action'] and "Belum Presensi" in pulang['text']:
+        if hour >= 16:
+            return 'pulang', True, "Presensi Pulang berhasil diklik"
+        return None, True, "Menunggu jam pulang"
+    return None, True, "Status OK / Sudah Presensi"
@@ -0,0 +1,231 @@
+"""
+Profiling Module
+Profil CPU (cProfile) dan alokasi memori (tracemalloc) untuk satu run.
+
+    with profile_run('run_starasn'):
+        automation.run_automation(site='starasn')
+
+menulis ke PROFILE_DIR (default 'profiles'):
+    <waktu>_<label>.prof   data pstats mentah (snakeviz / python -m pstats)
+    <waktu>_<label>.txt    laporan: fungsi teratas per waktu kumulatif dan
+                           tottime, waktu per modul, puncak alokasi per fase
+                           dan lokasi alokasi terbesar
+
+Fase (solve_image, penanganan page per site) ditandai dengan
+profile_phase(name). Jika tidak ada profil yang aktif, profile_phase hanya
+mengecek satu variabel global dan mengembalikan context manager kosong,
+jadi instrumentasinya gratis saat --profile tidak dipakai.
+
+Catatan: cProfile hanya mengukur thread yang memanggil profile_run (OCR
+yang dijalankan lewat asyncio.to_thread / worker pool tidak ikut), sedangkan
+tracemalloc mencatat alokasi semua thread. Puncak sebuah fase adalah puncak
+memori proses selama fase itu terbuka, jadi fase yang tumpang tindih (task
+async / thread lain) bisa ikut menghitung alokasi satu sama lain.
+"""
+
+import io
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 15
+TRACE_FRAMES = 5
+
+_active = None  # _Session yang sedang berjalan, None = profiling nonaktif
+
+
+class _Session:
+    """Data fase untuk satu profile_run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.open = set()  # _Phase yang sedang berjalan (semua task/thread)
+        self.run_peak = 0  # reset_peak dipakai per fase, puncak seluruh run disimpan di sini
+        self.phases = {}  # name -> {count, total_ms, max_peak_kb}
+
+    def _fold(self):
+        """Bagikan puncak sejak reset terakhir ke setiap fase yang masih terbuka
+
+        Puncak disimpan per fase (bukan stack bersama), sehingga fase async
+        yang tumpang tindih dan selesai tidak berurutan tidak saling menukar
+        puncak. Fase induk masih terbuka selama fase anak, jadi puncak anak
+        otomatis ikut ke induk.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        self.run_peak = max(self.run_peak, peak)
+        for phase in self.open:
+            phase.peak = max(phase.peak, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def enter(self, phase):
+        with self.lock:
+            phase.base = phase.peak = self._fold()
+            self.open.add(phase)
+
+    def exit(self, phase, elapsed_ms):
+        with self.lock:
+            self._fold()
+            self.open.discard(phase)
+
+            entry = self.phases.setdefault(phase.name, {'count': 0, 'total_ms': 0.0, 'max_peak_kb': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_peak_kb'] = max(entry['max_peak_kb'], (phase.peak - phase.base) / 1024)
+
+
+class _Phase:
+    def __init__(self, session, name):
+        self.session = session
+        self.name = name
+        self.base = self.peak = 0
+
+    def __enter__(self):
+        self.session.enter(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.session.exit(self, (time.perf_counter() - self.start) * 1000)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+
+class _NullPhase:
+    """Context manager kosong untuk `with` dan `async with`"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def profile_phase(name):
+    """Tandai fase untuk laporan puncak alokasi (tanpa biaya jika profil nonaktif)"""
+    session = _active
+    if session is None:
+        return _NULL_PHASE
+    return _Phase(session, name)
+
+
+def _module_totals(stats):
+    """tottime per file (modul repo, playwright, subprocess, builtin, ...)"""
+    totals = {}
+    for (filename, _, _), (_, _, tottime, _, _) in stats.stats.items():
+        if filename == '~':
+            key = '(builtin)'
+        elif 'site-packages' in filename:
+            key = filename.split('site-packages')[-1].lstrip(os.sep).split(os.sep)[0]
+        else:
+            key = os.path.basename(filename)
+        totals[key] = totals.get(key, 0.0) + tottime
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def _write_report(path, label, wall_s, stats, phases, snapshot, peak):
+    import pstats
+
+    out = io.StringIO()
+    out.write(f"Profil: {label}\n")
+    out.write(f"Waktu : {datetime.now().isoformat(timespec='seconds')}\n")
+    out.write(f"Durasi: {wall_s:.2f}s, puncak memori (tracemalloc): {peak / 1024 / 1024:.1f} MB\n\n")
+
+    out.write("== Fase (durasi, puncak alokasi di atas awal fase) ==\n")
+    if phases:
+        out.write(f"{'fase':<32} {'jumlah':>6} {'total ms':>10} {'puncak KB':>10}\n")
+        for name, entry in sorted(phases.items(), key=lambda item: item[1]['total_ms'], reverse=True):
+            out.write(f"{name:<32} {entry['count']:>6} {entry['total_ms']:>10.0f} {entry['max_peak_kb']:>10.0f}\n")
+    else:
+        out.write("(tidak ada fase)\n")
+
+    out.write("\n== Waktu sendiri (tottime) per modul ==\n")
+    for module, tottime in _module_totals(stats)[:20]:
+        out.write(f"{module:<40} {tottime:>8.3f}s\n")
+
+    out.write(f"\n== {TOP_FUNCTIONS} fungsi teratas (kumulatif) ==\n")
+    stats.stream = out
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+    out.write(f"\n== {TOP_FUNCTIONS} fungsi teratas (tottime) ==\n")
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(TOP_FUNCTIONS)
+
+    out.write(f"\n== {TOP_ALLOCATIONS} lokasi alokasi terbesar (masih hidup di akhir run) ==\n")
+    for stat in snapshot.statistics('traceback')[:TOP_ALLOCATIONS]:
+        out.write(f"{stat.size / 1024:>10.1f} KB  {stat.count:>7} blok\n")
+        for line in stat.traceback.format(limit=TRACE_FRAMES):
+            out.write(f"    {line}\n")
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(out.getvalue())
+
+
+@contextmanager
+def profile_run(label, enabled=True, output_dir=None):
+    """Profil CPU + alokasi satu run, laporan ditulis saat blok selesai
+
+    Args:
+        label: Nama run di nama file laporan
+        enabled: False = tidak melakukan apa-apa
+        output_dir: Direktori laporan (default PROFILE_DIR atau 'profiles')
+    """
+    global _active
+    if not enabled:
+        yield None
+        return
+    if _active is not None:
+        # Profil bersarang: cukup dihitung oleh profil terluar
+        yield None
+        return
+    # cProfile/pstats hanya diimpor jika profil benar-benar dijalankan
+    import cProfile
+    import pstats
+
+    output_dir = output_dir or os.getenv('PROFILE_DIR', 'profiles')
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{label}")
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACE_FRAMES)
+    session = _active = _Session()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield base
+    finally:
+        profiler.disable()
+        wall_s = time.perf_counter() - start
+        _active = None
+        snapshot = tracemalloc.take_snapshot()
+        peak = max(session.run_peak, tracemalloc.get_traced_memory()[1])
+        if started_tracing:
+            tracemalloc.stop()
+
+        try:
+            profiler.dump_stats(base + '.prof')
+            _write_report(base + '.txt', label, wall_s, pstats.Stats(profiler), session.phases, snapshot, peak)
+            logger.info(f"Laporan profil disimpan: {base}.txt (data pstats: {base}.prof)")
+        except Exception as e:
+            logger.error(f"Gagal menulis laporan profil: {e}")
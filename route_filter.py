@@ -0,0 +1,192 @@
+"""
+Route Filter Module
+Blokir resource yang tidak dibutuhkan alur login/presensi di level context
+Playwright (gambar, font, media, analytics, ...).
+
+Yang dibutuhkan hanya HTML, script, XHR login/presensi, dan gambar CAPTCHA
+(img#kv-image). Endpoint CAPTCHA selalu diizinkan meskipun tipe resource
+'image' diblokir. Aturan per site bisa diubah lewat environment:
+
+    ROUTE_FILTER=0                     nonaktifkan filter
+    <SITE>_BLOCK_TYPES=image,font      tipe resource yang diblokir
+    <SITE>_BLOCK_PATTERNS=a.com,/ads/  substring URL yang diblokir
+    <SITE>_ALLOW_PATTERNS=/captcha     substring URL yang selalu diizinkan
+
+Benchmark dengan vs tanpa filter (byte ditransfer dan waktu halaman siap):
+    python route_filter.py --site starasn --runs 3
+"""
+
+import argparse
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_TYPES = ('image', 'media', 'font')
+DEFAULT_BLOCK_PATTERNS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+    'facebook.net', 'hotjar.com', 'clarity.ms', 'fonts.googleapis.com',
+    'fonts.gstatic.com',
+)
+
+SITE_RULES = {
+    'pusaka': {
+        'block_types': DEFAULT_BLOCK_TYPES,
+        'block_patterns': DEFAULT_BLOCK_PATTERNS,
+        'allow_patterns': (),
+    },
+    'starasn': {
+        'block_types': DEFAULT_BLOCK_TYPES,
+        'block_patterns': DEFAULT_BLOCK_PATTERNS,
+        'allow_patterns': ('/authentication/captcha',),
+    },
+}
+
+# URL halaman dan selector "siap" untuk benchmark
+BENCH_PAGES = {
+    'pusaka': ('https://pusaka-v3.kemenag.go.id/login', "input[placeholder='Username']"),
+    'starasn': ('https://star-asn.kemenimipas.go.id/authentication/login', "img#kv-image"),
+}
+
+
+class RouteFilter:
+    """Aturan blokir request untuk satu site"""
+
+    def __init__(self, block_types=(), block_patterns=(), allow_patterns=()):
+        self.block_types = frozenset(block_types)
+        self.block_patterns = tuple(block_patterns)
+        self.allow_patterns = tuple(allow_patterns)
+        self.blocked = 0
+        self.passed = 0
+
+    def should_block(self, url, resource_type):
+        if any(pattern in url for pattern in self.allow_patterns):
+            return False
+        return resource_type in self.block_types or any(pattern in url for pattern in self.block_patterns)
+
+    def handle(self, route):
+        """Handler context.route (Playwright sync)"""
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked += 1
+            route.abort('blockedbyclient')
+        else:
+            self.passed += 1
+            route.continue_()
+
+    async def handle_async(self, route):
+        """Handler context.route (Playwright async)"""
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked += 1
+            await route.abort('blockedbyclient')
+        else:
+            self.passed += 1
+            await route.continue_()
+
+    def attach(self, context):
+        context.route('**/*', self.handle)
+
+    async def attach_async(self, context):
+        await context.route('**/*', self.handle_async)
+
+    def stats(self):
+        return {'blocked': self.blocked, 'passed': self.passed}
+
+    def report(self):
+        """Jumlah request diblokir/diteruskan sejak report terakhir, lalu reset"""
+        counts = self.stats()
+        self.blocked = 0
+        self.passed = 0
+        return counts
+
+
+def _env_list(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return tuple(item.strip() for item in value.split(',') if item.strip())
+
+
+def load_route_filters(force=False):
+    """RouteFilter per site dari SITE_RULES + override environment
+
+    Args:
+        force: Abaikan ROUTE_FILTER=0 (benchmark selalu butuh filter untuk pass 'on')
+
+    Returns:
+        dict: {site_key: RouteFilter}, kosong jika ROUTE_FILTER=0 (tanpa force)
+    """
+    if not force and os.getenv('ROUTE_FILTER', '1') != '1':
+        return {}
+    filters = {}
+    for site_key, rules in SITE_RULES.items():
+        prefix = site_key.upper()
+        filters[site_key] = RouteFilter(
+            block_types=_env_list(f'{prefix}_BLOCK_TYPES', rules['block_types']),
+            block_patterns=_env_list(f'{prefix}_BLOCK_PATTERNS', rules['block_patterns']),
+            allow_patterns=_env_list(f'{prefix}_ALLOW_PATTERNS', rules['allow_patterns']),
+        )
+    return filters
+
+
+def _measure(browser, site_key, route_filter):
+    """Satu load halaman login di context baru: (bytes, request, ready_ms)"""
+    url, ready_selector = BENCH_PAGES[site_key]
+    context = browser.new_context()
+    totals = {'bytes': 0, 'requests': 0}
+
+    def on_finished(request):
+        sizes = request.sizes()
+        totals['bytes'] += sizes['responseBodySize'] + sizes['responseHeadersSize']
+        totals['requests'] += 1
+
+    try:
+        if route_filter is not None:
+            route_filter.attach(context)
+        page = context.new_page()
+        page.on('requestfinished', on_finished)
+        start = time.perf_counter()
+        page.goto(url, timeout=30000, wait_until='domcontentloaded')
+        page.wait_for_selector(ready_selector, state='visible', timeout=30000)
+        ready_ms = (time.perf_counter() - start) * 1000
+        page.wait_for_load_state('networkidle', timeout=30000)
+    finally:
+        context.close()
+    return totals['bytes'], totals['requests'], ready_ms
+
+
+def main():
+    from playwright.sync_api import sync_playwright
+
+    parser = argparse.ArgumentParser(description='Benchmark route filter (dengan vs tanpa)')
+    parser.add_argument('--site', choices=['all', 'pusaka', 'starasn'], default='all')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    if os.getenv('ROUTE_FILTER', '1') != '1':
+        print("ROUTE_FILTER=0 diabaikan: pass 'on' tetap memakai filter (override *_BLOCK_* tetap berlaku)")
+    filters = load_route_filters(force=True)
+    sites = [key for key in BENCH_PAGES if args.site in ('all', key)]
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            print(f"{'site':<8} {'filter':<6} {'KB':>8} {'request':>8} {'siap (ms)':>10} {'blokir':>7}")
+            for site_key in sites:
+                for label, route_filter in (('off', None), ('on', filters[site_key])):
+                    if route_filter is not None:
+                        route_filter.report()
+                    samples = [_measure(browser, site_key, route_filter) for _ in range(args.runs)]
+                    kb = sum(s[0] for s in samples) / len(samples) / 1024
+                    requests_count = sum(s[1] for s in samples) / len(samples)
+                    ready = sorted(s[2] for s in samples)[len(samples) // 2]
+                    blocked = route_filter.report()['blocked'] / args.runs if route_filter else 0
+                    print(f"{site_key:<8} {label:<6} {kb:>8.1f} {requests_count:>8.1f} {ready:>10.0f} {blocked:>7.1f}")
+        finally:
+            browser.close()
+
+
+if __name__ == "__main__":
+    main()
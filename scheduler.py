@@ -0,0 +1,260 @@
+"""
+Scheduler Module
+Penjadwal berbasis heap untuk jadwal absen banyak akun.
+
+Di awal hari, waktu absen setiap akun (jendela random pagi/sore) dihitung
+sekali dan dimasukkan ke priority queue. Loop tidur tepat sampai job
+berikutnya jatuh tempo (paling lama MAX_SLEEP agar lompatan jam sistem
+tetap terdeteksi), lalu semua job yang jatuh tempo pada saat yang sama
+dikirim bersama ke executor terbatas.
+
+Rencana hari ini disimpan ke file JSON (ditulis sekali per hari, atomik)
+dan job yang sudah dijalankan dicatat append-only di file .done, sehingga
+restart di hari yang sama melanjutkan rencana yang sama tanpa mengulang
+job yang selesai. Job yang terlewat (restart/lompatan jam) langsung
+dijalankan, sama seperti loop polling lama.
+"""
+
+import heapq
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+MAX_SLEEP = 60.0         # Detik; batas tidur untuk mendeteksi lompatan jam
+CLOCK_JUMP_TOLERANCE = 5.0  # Selisih jam dinding vs monotonic yang dianggap lompatan
+
+SLOT_LABELS = {'morning': 'MASUK', 'afternoon': 'PULANG'}
+
+
+class DayPlan:
+    """Waktu absen semua akun untuk satu tanggal"""
+
+    def __init__(self, day, jobs, done=None):
+        """
+        Args:
+            day: datetime.date
+            jobs: [(due_timestamp, account_id, slot)]
+            done: set((account_id, slot)) yang sudah dijalankan
+        """
+        self.day = day
+        self.jobs = jobs
+        self.done = done or set()
+
+    @classmethod
+    def generate(cls, day, accounts, random_times, working_day=True):
+        """Rencana baru: random_times(account) -> {slot: {'hour', 'minute'}}"""
+        jobs = []
+        if working_day:
+            midnight = datetime.combine(day, datetime.min.time())
+            for account in accounts:
+                for slot, at in random_times(account).items():
+                    due = midnight + timedelta(hours=at['hour'], minutes=at['minute'])
+                    jobs.append((due.timestamp(), account['id'], slot))
+        return cls(day, jobs)
+
+    def pending(self):
+        return [job for job in self.jobs if (job[1], job[2]) not in self.done]
+
+    def to_dict(self):
+        return {
+            'date': self.day.isoformat(),
+            'jobs': [
+                {'account': account_id, 'slot': slot, 'due': datetime.fromtimestamp(due).isoformat(timespec='seconds')}
+                for due, account_id, slot in sorted(self.jobs)
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        jobs = [
+            (datetime.fromisoformat(job['due']).timestamp(), job['account'], job['slot'])
+            for job in data['jobs']
+        ]
+        return cls(date.fromisoformat(data['date']), jobs)
+
+
+class PlanStore:
+    """Rencana harian di disk: JSON (sekali per hari) + log job selesai"""
+
+    def __init__(self, path='schedule_plan.json'):
+        self.path = path
+        self.done_path = path + '.done'
+        self._lock = threading.Lock()
+
+    def load(self, day):
+        """Rencana tersimpan untuk tanggal ini, atau None"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                plan = DayPlan.from_dict(json.load(f))
+        except Exception as e:
+            logger.warning(f"Gagal memuat rencana jadwal {self.path}: {e}")
+            return None
+        if plan.day != day:
+            return None
+        if os.path.exists(self.done_path):
+            with open(self.done_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    account_id, _, slot = line.rstrip('\n').partition('\t')
+                    if slot:
+                        plan.done.add((account_id, slot))
+        return plan
+
+    def save(self, plan):
+        """Tulis rencana baru secara atomik dan kosongkan log job selesai"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(plan.to_dict(), f, indent=1)
+        os.replace(tmp_path, self.path)
+        with open(self.done_path, 'w', encoding='utf-8'):
+            pass
+
+    def mark_done(self, account_id, slot):
+        """Catat job selesai (append satu baris, tanpa menulis ulang rencana)"""
+        with self._lock:
+            with open(self.done_path, 'a', encoding='utf-8') as f:
+                f.write(f"{account_id}\t{slot}\n")
+
+
+class Scheduler:
+    """Heap job jatuh tempo + executor terbatas"""
+
+    def __init__(self, accounts, handler, random_times, working_day=None,
+                 plan_store=None, workers=1, clock=time.time):
+        """
+        Args:
+            accounts: [{'id': ...}] akun yang dijadwalkan
+            handler: handler(account_ids, slot) dijalankan di executor untuk
+                sekelompok job yang jatuh tempo bersamaan
+            random_times: random_times(account) -> {slot: {'hour', 'minute'}}
+            working_day: working_day(date) -> bool (default Senin-Jumat)
+            plan_store: PlanStore untuk persistensi (None = tidak disimpan)
+            workers: Jumlah batch yang boleh berjalan bersamaan
+        """
+        self.accounts = accounts
+        self.handler = handler
+        self.random_times = random_times
+        self.working_day = working_day or (lambda day: day.weekday() < 5)
+        self.plan_store = plan_store
+        self.workers = max(1, workers)
+        self.clock = clock
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scheduler')
+        # Batas batch yang menunggu/berjalan, supaya antrean executor tidak tumbuh tanpa batas
+        self._slots = threading.BoundedSemaphore(self.workers * 2)
+        self._stop = threading.Event()
+        self._done_lock = threading.Lock()
+        self._heap = []
+        self.plan = None
+
+    def _load_plan(self, day):
+        plan = self.plan_store.load(day) if self.plan_store else None
+        if plan is not None:
+            logger.info(f"Rencana jadwal {day} dilanjutkan dari {self.plan_store.path} "
+                        f"({len(plan.done)} job sudah selesai)")
+            return plan
+
+        plan = DayPlan.generate(day, self.accounts, self.random_times, self.working_day(day))
+        if self.plan_store:
+            self.plan_store.save(plan)
+        return plan
+
+    def _start_day(self, day):
+        # Di bawah _done_lock: batch hari sebelumnya yang masih berjalan tidak
+        # boleh menulis ke log .done rencana baru (lihat _run_batch)
+        with self._done_lock:
+            self.plan = self._load_plan(day)
+        self._heap = self.plan.pending()
+        heapq.heapify(self._heap)
+
+        logger.info(f"\n{'='*50}")
+        logger.info(f"Hari Baru: {day.strftime('%A, %d %B %Y')}")
+        if not self.plan.jobs:
+            logger.info(f"Hari ini bukan hari kerja ({day.strftime('%A')}). Skip.")
+        elif len(self.accounts) == 1:
+            for due, _, slot in sorted(self.plan.jobs):
+                label = 'Masuk ' if slot == 'morning' else 'Pulang'
+                logger.info(f"Waktu Absen {label}: {datetime.fromtimestamp(due).strftime('%H:%M')} WIB")
+        else:
+            first = datetime.fromtimestamp(min(self.plan.jobs)[0]).strftime('%H:%M')
+            last = datetime.fromtimestamp(max(self.plan.jobs)[0]).strftime('%H:%M')
+            logger.info(f"{len(self._heap)} job dijadwalkan untuk {len(self.accounts)} akun ({first} - {last})")
+        logger.info(f"{'='*50}\n")
+
+    def _pop_due(self, now):
+        """Semua job yang sudah jatuh tempo, dikelompokkan per slot"""
+        batches = {}
+        while self._heap and self._heap[0][0] <= now:
+            _, account_id, slot = heapq.heappop(self._heap)
+            batches.setdefault(slot, []).append(account_id)
+        return batches
+
+    def _run_batch(self, plan, account_ids, slot):
+        """Jalankan satu batch milik `plan` (rencana saat batch dikirim)"""
+        try:
+            self.handler(account_ids, slot)
+        except Exception as e:
+            logger.error(f"Scheduler error: {e}")
+        finally:
+            with self._done_lock:
+                # Hari sudah berganti: log .done di disk milik rencana baru
+                stored = plan is self.plan
+                for account_id in account_ids:
+                    plan.done.add((account_id, slot))
+                    if self.plan_store and stored:
+                        self.plan_store.mark_done(account_id, slot)
+                finished = stored and len(plan.done) >= len(plan.jobs)
+            self._slots.release()
+            if not stored:
+                logger.info(f"Batch {slot} tanggal {plan.day} selesai setelah hari berganti")
+            elif finished:
+                logger.info("✅ Absen hari ini selesai. Menunggu hari berikutnya...")
+
+    def _dispatch(self, batches):
+        plan = self.plan
+        for slot, account_ids in batches.items():
+            label = SLOT_LABELS.get(slot, slot.upper())
+            logger.info(f"⏰ Waktu Absen {label}! ({datetime.now().strftime('%H:%M')}, {len(account_ids)} akun)")
+            self._slots.acquire()
+            self.executor.submit(self._run_batch, plan, account_ids, slot)
+
+    def _next_midnight(self, day):
+        return datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+
+    def run_forever(self):
+        """Loop utama sampai stop() dipanggil"""
+        day = datetime.fromtimestamp(self.clock()).date()
+        self._start_day(day)
+
+        while not self._stop.is_set():
+            now = self.clock()
+            today = datetime.fromtimestamp(now).date()
+            if today != day:
+                # Hari berganti (normal, atau jam sistem melompat)
+                day = today
+                self._start_day(day)
+                continue
+
+            self._dispatch(self._pop_due(now))
+
+            next_due = self._heap[0][0] if self._heap else self._next_midnight(day)
+            timeout = min(max(next_due - now, 0.0), MAX_SLEEP)
+            started_wall, started_mono = self.clock(), time.monotonic()
+            self._stop.wait(timeout)
+            drift = (self.clock() - started_wall) - (time.monotonic() - started_mono)
+            if abs(drift) > CLOCK_JUMP_TOLERANCE:
+                # Hanya peringatan: waktu jadwal tetap; job yang jadi terlewat
+                # dijalankan di iterasi berikutnya, pergantian hari ditangani di atas
+                logger.warning(f"Jam sistem melompat {drift:+.0f}s (waktu jadwal tidak diubah)")
+
+    def stop(self, wait=True):
+        self._stop.set()
+        self.executor.shutdown(wait=wait)
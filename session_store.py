@@ -0,0 +1,188 @@
+"""
+Session Store Module
+Menyimpan storage state (cookie + localStorage) per akun per site setelah
+login berhasil, supaya run berikutnya bisa melewati login dan CAPTCHA selama
+sesi di server masih berlaku.
+
+Format file sama dengan storage state Playwright, sehingga bisa langsung
+dipakai browser.new_context(storage_state=...) dan juga diubah ke cookie
+jar requests untuk alur HTTP Star-ASN.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STATS_FILE = 'stats.json'
+TIME_SMOOTHING = 0.2  # Bobot EWMA untuk rata-rata waktu login/cek sesi
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _atomic_write_json(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def cookies_to_session(cookies, session):
+    """Masukkan cookie storage state Playwright ke requests.Session"""
+    for cookie in cookies:
+        session.cookies.set(cookie['name'], cookie['value'],
+                            domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+
+
+def session_to_state(session):
+    """Storage state (format Playwright) dari cookie jar requests.Session"""
+    cookies = []
+    for cookie in session.cookies:
+        cookies.append({
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'expires': cookie.expires if cookie.expires else -1,
+            'httpOnly': cookie.has_nonstandard_attr('HttpOnly'),
+            'secure': cookie.secure,
+            'sameSite': 'Lax',
+        })
+    return {'cookies': cookies, 'origins': []}
+
+
+class SessionStore:
+    """Storage state per (akun, site) di satu direktori, plus statistik hit"""
+
+    def __init__(self, directory='sessions', max_age_hours=12):
+        """
+        Args:
+            directory: Direktori file sesi (dibuat jika belum ada)
+            max_age_hours: State yang lebih tua dari ini tidak dipakai (0 = tanpa batas)
+        """
+        self.directory = directory
+        self.max_age = max_age_hours * 3600
+        self._stats = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_stats()
+
+    def _path(self, site_key, account_id=None):
+        return os.path.join(self.directory, f"{account_id or 'default'}_{site_key}.json")
+
+    def load(self, site_key, account_id=None):
+        """Storage state tersimpan, atau None jika tidak ada / kedaluwarsa"""
+        path = self._path(site_key, account_id)
+        if not os.path.exists(path):
+            return None
+        if self.max_age and time.time() - os.path.getmtime(path) > self.max_age:
+            logger.info(f"Sesi {site_key} tersimpan sudah kedaluwarsa, login ulang")
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Gagal memuat sesi {path}: {e}")
+            return None
+
+    def save(self, site_key, state, account_id=None):
+        """Simpan storage state secara atomik"""
+        path = self._path(site_key, account_id)
+        try:
+            _atomic_write_json(path, state)
+        except Exception as e:
+            logger.warning(f"Gagal menyimpan sesi {path}: {e}")
+
+    def discard(self, site_key, account_id=None):
+        """Hapus state yang terbukti tidak valid"""
+        try:
+            os.remove(self._path(site_key, account_id))
+        except FileNotFoundError:
+            pass
+
+    def _entry(self, site_key):
+        return self._stats.setdefault(site_key, {
+            'hits': 0, 'misses': 0, 'login_s': None, 'check_s': None, 'saved_s': 0.0
+        })
+
+    @staticmethod
+    def _smooth(old, value):
+        return value if old is None else old + TIME_SMOOTHING * (value - old)
+
+    def record_hit(self, site_key, check_seconds):
+        """Sesi valid: login dilewati. Kembalikan perkiraan waktu yang dihemat"""
+        with self._lock:
+            entry = self._entry(site_key)
+            entry['hits'] += 1
+            entry['check_s'] = self._smooth(entry['check_s'], check_seconds)
+            saved = max((entry['login_s'] or 0.0) - check_seconds, 0.0)
+            entry['saved_s'] += saved
+        self._save_stats()
+        return saved
+
+    def record_miss(self, site_key):
+        with self._lock:
+            self._entry(site_key)['misses'] += 1
+        self._save_stats()
+
+    def record_login(self, site_key, seconds):
+        """Catat durasi login penuh (dasar perhitungan waktu yang dihemat)"""
+        with self._lock:
+            entry = self._entry(site_key)
+            entry['login_s'] = self._smooth(entry['login_s'], seconds)
+        self._save_stats()
+
+    def stats(self):
+        with self._lock:
+            result = {}
+            for site_key, entry in self._stats.items():
+                lookups = entry['hits'] + entry['misses']
+                result[site_key] = {
+                    'hits': entry['hits'],
+                    'misses': entry['misses'],
+                    'hit_rate': round(entry['hits'] / lookups, 4) if lookups else 0.0,
+                    'avg_login_s': round(entry['login_s'] or 0.0, 2),
+                    'avg_check_s': round(entry['check_s'] or 0.0, 2),
+                    'saved_s': round(entry['saved_s'], 1),
+                }
+            return result
+
+    def _load_stats(self):
+        path = os.path.join(self.directory, STATS_FILE)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for site_key, entry in json.load(f).items():
+                    self._entry(site_key).update(entry)
+        except Exception as e:
+            logger.warning(f"Gagal memuat statistik sesi {path}: {e}")
+
+    def _save_stats(self):
+        with self._lock:
+            data = {site_key: dict(entry) for site_key, entry in self._stats.items()}
+        path = os.path.join(self.directory, STATS_FILE)
+        try:
+            _atomic_write_json(path, data)
+        except Exception as e:
+            logger.warning(f"Gagal menyimpan statistik sesi {path}: {e}")
+
+
+def get_session_store(directory='sessions', max_age_hours=12):
+    """SessionStore bersama per direktori (satu per proses, dipakai semua akun)"""
+    key = os.path.abspath(directory)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SessionStore(directory, max_age_hours)
+        return store
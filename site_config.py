@@ -0,0 +1,78 @@
+"""
+Site Config Module
+Konfigurasi site, pembuatan CaptchaSolver, dan inisialisasi proses (.env +
+logging) yang dipakai bersama oleh web_automation, async_automation, dan
+fleet_runner.
+
+Modul ini sengaja tidak mengimpor web_automation: saat web_automation.py
+dijalankan sebagai script, modul lain yang butuh konstanta ini tidak memicu
+impor kedua web_automation (load_dotenv/logging ganda, kelas duplikat).
+"""
+
+import os
+
+from starasn_http import STATUS_URL as STARASN_STATUS_URL
+
+# URL login per site
+SITE_URLS = {
+    'pusaka': {
+        'url': 'https://pusaka-v3.kemenag.go.id',
+        'login_url': 'https://pusaka-v3.kemenag.go.id/login'
+    },
+    'starasn': {
+        'url': 'https://star-asn.kemenimipas.go.id',
+        'login_url': 'https://star-asn.kemenimipas.go.id/authentication/login'
+    }
+}
+
+# Site yang punya alur HTTP tanpa browser
+HTTP_SITES = ('starasn',)
+
+# Cek murah sesi tersimpan per site: GET url tanpa redirect harus 200 (dan
+# berisi marker). open_page: buka url tsb di page karena presensi tidak
+# membuka halamannya sendiri.
+SESSION_CHECKS = {
+    'pusaka': {'url': 'https://pusaka-v3.kemenag.go.id/profile/presence', 'marker': None, 'open_page': False},
+    'starasn': {'url': STARASN_STATUS_URL, 'marker': 'PRESENSI MASUK', 'open_page': True},
+}
+
+
+def init():
+    """Muat .env lalu pasang logging (antrean + writer background dengan rotasi)
+
+    Dipanggil entry point (main() web_automation dan fleet_runner), bukan
+    saat impor. Pemakai programatik memanggilnya sebelum membuat
+    WebAutomation karena konfigurasi dibaca dari environment.
+    """
+    from dotenv import load_dotenv
+
+    from log_setup import setup_logging
+
+    load_dotenv()
+    setup_logging()
+
+
+def create_captcha_solver():
+    """CaptchaSolver sesuai konfigurasi environment (bisa dipakai bersama banyak akun)
+
+    Stack CAPTCHA (numpy, PIL) baru diimpor di sini, saat jalurnya dipakai.
+    """
+    from captcha_cache import CaptchaCache
+    from captcha_preprocess import STRATEGIES as CAPTCHA_STRATEGIES
+    from captcha_solver import CaptchaSolver
+    from strategy_stats import StrategyStats
+
+    return CaptchaSolver(
+        workers=int(os.getenv('CAPTCHA_WORKERS', '1')),
+        engine=os.getenv('OCR_ENGINE', 'auto'),
+        templates=os.getenv('CAPTCHA_TEMPLATES', 'captcha_templates.npy'),
+        cache=CaptchaCache(
+            max_size=int(os.getenv('CAPTCHA_CACHE_SIZE', '1024')),
+            path=os.getenv('CAPTCHA_CACHE_FILE', 'captcha_cache.json') or None
+        ),
+        stats=StrategyStats(
+            default_order=[tag for tag, _ in CAPTCHA_STRATEGIES],
+            path=os.getenv('CAPTCHA_STATS_FILE', 'captcha_strategy_stats.json') or None,
+            explore=float(os.getenv('CAPTCHA_EXPLORE', '0.1'))
+        )
+    )
@@ -0,0 +1,180 @@
+"""
+Site Flow Module
+Logika keputusan alur login dan presensi yang dipakai bersama oleh engine
+sync (WebAutomation) dan async (AsyncWebAutomation).
+
+Engine hanya menjalankan panggilan Playwright (dengan atau tanpa await);
+apa arti URL/respons, kapan retry, pesan log, dan artefak mana yang
+disimpan diputuskan di sini dari data biasa, sehingga kedua engine tidak
+bisa berbeda perilaku. Pola sama dengan presence_probe.decide_*.
+"""
+
+import io
+import logging
+
+from starasn_http import LOGIN_OUTCOME_TEXT, LOGIN_RETRYABLE, LOGIN_SUCCESS, classify_login_response
+
+logger = logging.getLogger(__name__)
+
+MAX_CAPTCHA_ATTEMPTS = 7
+MIN_CAPTCHA_LENGTH = 4
+
+# Substring URL yang berarti masih di halaman login
+LOGIN_URL_MARKERS = {
+    'pusaka': ('login',),
+    'starasn': ('login', 'authentication'),
+}
+
+# Hasil satu attempt login Star-ASN
+ATTEMPT_SUCCESS = 'success'
+ATTEMPT_STOP = 'stop'
+ATTEMPT_RETRY = 'retry'
+
+# Langkah alur sesi tersimpan, lihat session_steps()
+STEP_CHECK = 'check'      # cek sesi murah, engine mengirim balik bool
+STEP_REUSE = 'reuse'      # sesi valid dipakai, login dilewati
+STEP_DISCARD = 'discard'  # sesi tidak valid: buang state tersimpan + cookie
+STEP_LOGIN = 'login'      # login penuh, engine mengirim balik bool
+STEP_SAVE = 'save'        # simpan storage state hasil login
+
+
+def logged_in(site_key, url):
+    """True jika URL sudah keluar dari halaman login site"""
+    url = url.lower()
+    return not any(marker in url for marker in LOGIN_URL_MARKERS[site_key])
+
+
+def session_steps(has_store, restored):
+    """Langkah pakai-ulang-sesi-atau-login sebagai generator
+
+    Engine menjalankan setiap STEP_* (langsung atau dengan await) dan mengirim
+    hasil STEP_CHECK/STEP_LOGIN lewat send(); nilai return generator
+    (StopIteration.value) adalah True jika site sudah login.
+
+    Args:
+        has_store: SessionStore aktif
+        restored: Storage state tersimpan sudah dipulihkan ke context/session
+    """
+    if has_store and restored:
+        if (yield STEP_CHECK):
+            yield STEP_REUSE
+            return True
+        yield STEP_DISCARD
+    if not (yield STEP_LOGIN):
+        return False
+    if has_store:
+        yield STEP_SAVE
+    return True
+
+
+def decode_captcha(captcha_bytes):
+    """Gambar PIL dari byte CAPTCHA, atau None jika tidak bisa dibaca"""
+    from PIL import Image
+
+    try:
+        img = Image.open(io.BytesIO(captcha_bytes))
+        img.load()
+        return img
+    except Exception as e:
+        logger.error(f"Error saat processing captcha: {e}")
+        return None
+
+
+def captcha_text_valid(text):
+    return bool(text) and len(text) >= MIN_CAPTCHA_LENGTH
+
+
+def read_login_response(status_code, payload):
+    """Outcome dan pesan dari respons XHR login Star-ASN
+
+    Returns:
+        tuple: (konstanta LOGIN_* atau None jika bukan JSON/form POST biasa, pesan server)
+    """
+    if payload is None and status_code < 400:
+        return None, ''
+    message = payload.get('message', '') if isinstance(payload, dict) else ''
+    return classify_login_response(status_code, payload), message
+
+
+def should_prefetch_captcha(outcome):
+    """Server sudah memeriksa jawaban: CAPTCHA berikutnya bisa diunduh sekarang"""
+    return outcome in LOGIN_RETRYABLE
+
+
+def should_wait_redirect(outcome):
+    """Sukses, atau bukan JSON (form POST biasa): tunggu redirect keluar login"""
+    return outcome is None or outcome == LOGIN_SUCCESS
+
+
+def submit_outcome(outcome, timed_out):
+    """Label outcome span 'login_submit'"""
+    return outcome or ('timeout' if timed_out else 'redirect')
+
+
+def should_recheck_session(url, outcome):
+    """Server menjawab sukses tapi redirect belum keluar login (timeout): cek sesi dulu"""
+    return outcome == LOGIN_SUCCESS and not logged_in('starasn', url)
+
+
+def judge_login_attempt(url, outcome, session_valid=False):
+    """ATTEMPT_* untuk satu attempt login Star-ASN setelah submit
+
+    Args:
+        session_valid: Hasil cek sesi ulang bila should_recheck_session()
+    """
+    if logged_in('starasn', url) or (outcome == LOGIN_SUCCESS and session_valid):
+        return ATTEMPT_SUCCESS
+    if outcome is not None and outcome not in LOGIN_RETRYABLE and outcome != LOGIN_SUCCESS:
+        # Kredensial salah / rate limit / error server: retry tidak akan membantu
+        return ATTEMPT_STOP
+    return ATTEMPT_RETRY
+
+
+def captcha_accepted(verdict, outcome):
+    """Umpan balik untuk solver: CAPTCHA diterima jika login sukses, atau server
+    sudah menjawab sukses walau redirect/sesi belum selesai (jawaban tetap benar)"""
+    return verdict == ATTEMPT_SUCCESS or outcome == LOGIN_SUCCESS
+
+
+def retry_reason(outcome):
+    if outcome == LOGIN_SUCCESS:
+        return 'login diterima server tapi sesi belum aktif'
+    return LOGIN_OUTCOME_TEXT.get(outcome, 'masih di halaman login')
+
+
+def announce_presence(site_key, decision):
+    """Log keputusan presensi sebelum aksi dijalankan"""
+    key, _, message = decision
+    if site_key == 'pusaka':
+        if key == 'masuk':
+            logger.info("Tombol Presensi Masuk ditemukan. Melakukan klik...")
+        elif key == 'pulang':
+            logger.info("Tombol Presensi Pulang ditemukan dan sudah waktunya. Melakukan klik...")
+    elif key == 'masuk':
+        logger.info("Ditemukan tombol PRESENSI MASUK. Melakukan klik...")
+    elif key == 'pulang':
+        logger.info("Ditemukan tombol PRESENSI PULANG dan sudah waktunya. Melakukan klik...")
+    elif message == "Menunggu jam pulang":
+        logger.info("Tombol Pulang ada, tapi belum waktunya (Wait until > 16:00)")
+    else:
+        logger.info("Tidak ada aksi presensi yang diperlukan saat ini.")
+
+
+def presence_artifact(site_key, decision, snapshot):
+    """Log hasil presensi dan nama artefak yang perlu disimpan
+
+    Returns:
+        str | None: nama artefak (tanpa prefix site), None jika tidak perlu
+    """
+    key, success, _ = decision
+    if site_key == 'starasn':
+        return f'presence_result_{key}' if key is not None else None
+    if key is not None:
+        logger.info(f"✅ Klik Presensi {key.capitalize()} berhasil dilakukan")
+        return 'presence_result'
+    if not success:
+        logger.warning("❌ Tidak ditemukan tombol presensi apapun")
+        return 'presence_failed'
+    if snapshot['markers']['sudah'] and not snapshot['buttons']['pulang']:
+        logger.info("Info: Sudah melakukan presensi hari ini")
+    return None
@@ -0,0 +1,394 @@
+"""
+Star-ASN HTTP Client
+Login dan presensi Star-ASN tanpa browser, alur yang sama dengan
+starasn_system/StarAsnService.php (csrf-token + tkv, captcha, login XHR
+dengan header KV-TOKEN, lalu /presence/save).
+"""
+
+import io
+import logging
+import re
+import time
+from datetime import datetime
+from html.parser import HTMLParser
+
+# requests dan PIL diimpor saat dipakai: modul ini juga diimpor hanya untuk
+# konstantanya (web_automation, captcha_capture)
+
+from presence_probe import PRESENCE_SPECS, decide_starasn
+from session_store import cookies_to_session, session_to_state
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = 'https://star-asn.kemenimipas.go.id'
+LOGIN_URL = f'{BASE_URL}/authentication/login'
+CAPTCHA_URL = f'{BASE_URL}/authentication/captcha'
+STATUS_URL = f'{BASE_URL}/statistic'
+PRESENCE_URL = f'{BASE_URL}/presence/save'
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+CSRF_PATTERN = re.compile(r'content="([^"]+)" name="csrf-token"')
+TKV_PATTERN = re.compile(r'name="tkv" value="([^"]+)"')
+
+# Hasil klasifikasi respons XHR login
+LOGIN_SUCCESS = 'success'
+LOGIN_CAPTCHA_REJECTED = 'captcha_rejected'
+LOGIN_CREDENTIAL_ERROR = 'credential_error'
+LOGIN_RATE_LIMITED = 'rate_limited'
+LOGIN_SERVER_ERROR = 'server_error'
+LOGIN_UNKNOWN = 'unknown'
+
+# Hanya CAPTCHA salah (dan pesan yang belum dikenal) yang layak dicoba ulang
+LOGIN_RETRYABLE = (LOGIN_CAPTCHA_REJECTED, LOGIN_UNKNOWN)
+
+# Kata kunci pesan error login (huruf kecil), dicek berurutan
+CAPTCHA_KEYWORDS = ('captcha', 'kode keamanan', 'kode verifikasi', 'security code')
+RATE_LIMIT_KEYWORDS = ('terlalu banyak', 'too many', 'coba lagi nanti', 'diblokir sementara')
+CREDENTIAL_KEYWORDS = ('password', 'kata sandi', 'username', 'pengguna', 'akun', 'nip', 'credential')
+
+LOGIN_OUTCOME_TEXT = {
+    LOGIN_CAPTCHA_REJECTED: 'CAPTCHA ditolak',
+    LOGIN_CREDENTIAL_ERROR: 'username/password salah',
+    LOGIN_RATE_LIMITED: 'dibatasi server (rate limit)',
+    LOGIN_SERVER_ERROR: 'error server',
+    LOGIN_UNKNOWN: 'respons tidak dikenal',
+}
+
+
+def classify_login_response(status_code, payload):
+    """Klasifikasi respons XHR login Star-ASN
+
+    Args:
+        status_code: HTTP status respons
+        payload: JSON respons (dict), atau None jika bukan JSON
+
+    Returns:
+        str: Salah satu konstanta LOGIN_*
+    """
+    if status_code == 429:
+        return LOGIN_RATE_LIMITED
+    if status_code >= 500 or not isinstance(payload, dict):
+        return LOGIN_SERVER_ERROR
+    if payload.get('status') == 'success':
+        return LOGIN_SUCCESS
+
+    message = str(payload.get('message', '')).lower()
+    if any(keyword in message for keyword in CAPTCHA_KEYWORDS):
+        return LOGIN_CAPTCHA_REJECTED
+    if any(keyword in message for keyword in RATE_LIMIT_KEYWORDS):
+        return LOGIN_RATE_LIMITED
+    if any(keyword in message for keyword in CREDENTIAL_KEYWORDS):
+        return LOGIN_CREDENTIAL_ERROR
+    return LOGIN_UNKNOWN
+
+
+VOID_TAGS = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                       'param', 'source', 'track', 'wbr'))
+
+
+# Teks di dalam tag ini tidak pernah terlihat di halaman
+INVISIBLE_TAGS = frozenset(('script', 'style', 'noscript', 'template'))
+
+
+def _hidden(tag, attrs):
+    """Elemen yang teksnya tidak terlihat (padanan kasar innerText di PROBE_JS)"""
+    if tag in INVISIBLE_TAGS or 'hidden' in attrs:
+        return True
+    style = (attrs.get('style') or '').replace(' ', '').lower()
+    return 'display:none' in style or 'visibility:hidden' in style
+
+
+class _CardParser(HTMLParser):
+    """Kumpulkan teks terlihat setiap div.card (urutan dokumen)
+
+    Padanan HTML statis dari selector card PRESENCE_SPECS['starasn']; teks
+    script/style dan elemen tersembunyi (atribut hidden, display:none inline)
+    dilewati seperti innerText di browser.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.cards = []
+        self._stack = []  # (tag, card atau None, tersembunyi)
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        attrs = dict(attrs)
+        card = None
+        if tag == 'div' and 'card' in (attrs.get('class') or '').split():
+            card = []
+            self.cards.append(card)
+        hidden = _hidden(tag, attrs)
+        if hidden:
+            self._skip += 1
+        self._stack.append((tag, card, hidden))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        # Tag yang tidak ditutup (HTML longgar) ikut ditutup sampai tag ini
+        if not any(open_tag == tag for open_tag, _, _ in self._stack):
+            return
+        while self._stack:
+            open_tag, _, hidden = self._stack.pop()
+            if hidden:
+                self._skip -= 1
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        for _, card, _ in self._stack:
+            if card is not None:
+                card.append(data)
+
+
+def _norm(text):
+    return ' '.join(text.split()).lower()
+
+
+def parse_status_cards(html):
+    """Card PRESENSI MASUK/PULANG dari HTML halaman statistik
+
+    Returns:
+        dict: {'masuk': {'found': bool, 'text': str}, 'pulang': {...}};
+        card pertama (urutan dokumen) yang teksnya memuat judul
+    """
+    parser = _CardParser()
+    parser.feed(html)
+    parser.close()
+    texts = [''.join(parts) for parts in parser.cards]
+
+    cards = {}
+    for key, rule in PRESENCE_SPECS['starasn']['cards'].items():
+        title = _norm(rule['title'])
+        text = next((t for t in texts if title in _norm(t)), None)
+        cards[key] = {'found': text is not None, 'text': text or ''}
+    return cards
+
+
+class StarAsnHttpError(Exception):
+    """Alur HTTP Star-ASN gagal (halaman/format respons tidak sesuai)"""
+
+
+class StarAsnHttpTimeout(StarAsnHttpError):
+    """Batas waktu (deadline) alur HTTP Star-ASN habis"""
+
+
+def create_session(pool_size=10, retries=2):
+    """requests.Session dengan connection pool dan retry untuk error koneksi"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5,
+                  status_forcelist=(502, 503, 504), allowed_methods=('GET',))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+class StarAsnHttpClient:
+    """Client HTTP Star-ASN untuk satu akun (cookie jar per session)"""
+
+    def __init__(self, captcha_solver, session=None, timeout=15, deadline=None):
+        """
+        Args:
+            timeout: Timeout per request (detik)
+            deadline: Batas waktu seluruh alur (time.monotonic()), None = tanpa
+                batas; request berikutnya dibatasi sisa waktunya dan setelah
+                lewat StarAsnHttpTimeout dilempar
+        """
+        self.captcha_solver = captcha_solver
+        self.session = session or create_session()
+        self.timeout = timeout
+        self.deadline = deadline
+        self.csrf_token = ''
+        self.tkv = ''
+        self.last_outcome = None
+        self.attempts = 0
+
+    def _request_timeout(self):
+        """Timeout request berikutnya: timeout biasa, dipotong sisa waktu deadline"""
+        if self.deadline is None:
+            return self.timeout
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise StarAsnHttpTimeout("Batas waktu alur HTTP Star-ASN habis")
+        return min(self.timeout, remaining)
+
+    def get_login_page(self):
+        """Buka halaman login dan ambil csrf-token + tkv"""
+        logger.info("Membuka halaman login Star-ASN (HTTP)...")
+        response = self.session.get(LOGIN_URL, timeout=self._request_timeout())
+        response.raise_for_status()
+        html = response.text
+
+        csrf = CSRF_PATTERN.search(html)
+        tkv = TKV_PATTERN.search(html)
+        if not csrf or not tkv:
+            raise StarAsnHttpError("csrf-token / tkv tidak ditemukan di halaman login")
+        self.csrf_token = csrf.group(1)
+        self.tkv = tkv.group(1)
+        return html
+
+    def fetch_captcha(self):
+        """Ambil gambar CAPTCHA baru sebagai bytes"""
+        response = self.session.get(
+            CAPTCHA_URL, params={'t': int(time.time() * 1000)}, timeout=self._request_timeout()
+        )
+        response.raise_for_status()
+        if not response.content:
+            raise StarAsnHttpError("Gambar CAPTCHA kosong")
+        return response.content
+
+    def _xhr_headers(self):
+        return {'X-Requested-With': 'XMLHttpRequest', 'KV-TOKEN': self.csrf_token}
+
+    def submit_login(self, username, password, captcha):
+        """POST login
+
+        Returns:
+            tuple: (klasifikasi LOGIN_*, dict JSON respons atau {})
+        """
+        response = self.session.post(
+            LOGIN_URL,
+            data={'tkv': self.tkv, 'username': username, 'password': password, 'kv-captcha': captcha},
+            headers=self._xhr_headers(),
+            timeout=self._request_timeout(),
+        )
+        try:
+            payload = response.json()
+        except ValueError:
+            if response.status_code < 400:
+                # Halaman HTML biasa: alur HTTP tidak cocok lagi dengan situs
+                raise StarAsnHttpError(f"Respons login bukan JSON (HTTP {response.status_code})")
+            payload = None
+        return classify_login_response(response.status_code, payload), payload or {}
+
+    def login(self, username, password, max_attempts=7):
+        """Login dengan CAPTCHA solver, True jika berhasil
+
+        Hanya CAPTCHA yang ditolak yang dicoba ulang; error kredensial, rate
+        limit dan error server menghentikan login (alasan di last_outcome).
+        """
+        from PIL import Image
+
+        self.last_outcome = None
+        for attempt in range(max_attempts):
+            self.attempts = attempt + 1
+            self.get_login_page()
+            img = Image.open(io.BytesIO(self.fetch_captcha()))
+            captcha_text = self.captcha_solver.solve_image(img)
+            if not captcha_text or len(captcha_text) < 4:
+                logger.warning(f"OCR gagal (attempt {attempt + 1}), ambil captcha baru...")
+                continue
+
+            logger.info(f"CAPTCHA OCR result: {captcha_text}")
+            outcome, result = self.submit_login(username, password, captcha_text)
+            self.last_outcome = outcome
+            if outcome == LOGIN_SUCCESS:
+                self.captcha_solver.report_answer(img, accepted=True)
+                logger.info("✅ Login Star-ASN (HTTP) berhasil!")
+                return True
+
+            logger.warning(f"❌ Login Star-ASN (HTTP) gagal (attempt {attempt + 1}): "
+                           f"{LOGIN_OUTCOME_TEXT[outcome]} - {result.get('message', 'Gagal')}")
+            if outcome not in LOGIN_RETRYABLE:
+                logger.error("Login Star-ASN (HTTP) dihentikan, percobaan ulang tidak akan berhasil")
+                return False
+            self.captcha_solver.report_answer(img, accepted=False)
+
+        logger.error("❌ Login Star-ASN (HTTP) gagal setelah semua percobaan")
+        return False
+
+    def restore_state(self, state):
+        """Pulihkan cookie dari storage state tersimpan (lihat SessionStore)"""
+        cookies_to_session(state.get('cookies', []), self.session)
+
+    def export_state(self):
+        """Storage state sesi saat ini untuk disimpan"""
+        return session_to_state(self.session)
+
+    def session_valid(self):
+        """Cek murah apakah cookie sesi masih login (satu GET halaman statistik)"""
+        import requests
+
+        try:
+            html = self.check_status()
+        except (requests.RequestException, StarAsnHttpError):
+            return False
+        # KV-TOKEN untuk /presence/save diambil dari halaman yang sama
+        csrf = CSRF_PATTERN.search(html)
+        if csrf:
+            self.csrf_token = csrf.group(1)
+        return True
+
+    def check_status(self):
+        """HTML halaman statistik presensi (berisi card PRESENSI MASUK/PULANG)"""
+        response = self.session.get(STATUS_URL, timeout=self._request_timeout())
+        response.raise_for_status()
+        html = response.text
+        if 'PRESENSI MASUK' not in html:
+            raise StarAsnHttpError("Modul presensi tidak ditemukan (sesi tidak valid?)")
+        return html
+
+    def submit_presence(self, presence_type, coords):
+        """POST presensi 'masuk' / 'pulang', True hanya jika server menjawab status success"""
+        response = self.session.post(
+            PRESENCE_URL,
+            data={'latitude': coords['latitude'], 'longitude': coords['longitude'], 'type': presence_type},
+            headers=self._xhr_headers(),
+            timeout=self._request_timeout(),
+        )
+        response.raise_for_status()
+        try:
+            result = response.json()
+        except ValueError:
+            logger.warning(f"Respons presensi {presence_type} bukan JSON (HTTP {response.status_code})")
+            return False
+        status = result.get('status') if isinstance(result, dict) else None
+        if status != 'success':
+            logger.warning(f"Presensi {presence_type} tidak dikonfirmasi server: {result}")
+            return False
+        return True
+
+    def do_presence(self, coords):
+        """Presensi berdasarkan status card, keputusan sama dengan do_presence_starasn
+
+        Returns:
+            tuple: (success, message)
+        """
+        cards = parse_status_cards(self.check_status())
+        if not any(card['found'] for card in cards.values()):
+            # Struktur halaman berubah: biarkan run_starasn_http fallback ke browser
+            raise StarAsnHttpError("Card PRESENSI MASUK/PULANG tidak ditemukan di halaman statistik")
+        # Presensi dikirim langsung lewat POST, jadi card tidak perlu punya tombol
+        snapshot = {'buttons': {}, 'markers': {},
+                    'cards': {key: dict(card, has_action=card['found']) for key, card in cards.items()}}
+        key, success, message = decide_starasn(snapshot, datetime.now().hour)
+
+        if key is not None:
+            logger.info(f"Status PRESENSI {key.upper()}: Belum Presensi. Mengirim presensi {key}...")
+            if self.submit_presence(key, coords):
+                return True, message
+            return False, f"Presensi {key.capitalize()} ditolak server"
+
+        if message == "Menunggu jam pulang":
+            logger.info("Presensi Pulang belum waktunya (Wait until > 16:00)")
+        else:
+            logger.info("Tidak ada aksi presensi yang diperlukan saat ini.")
+        return success, message
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,150 @@
+"""
+Strategy Stats Module
+Statistik kemenangan strategi OCR CaptchaSolver untuk mengatur urutan
+strategi secara adaptif.
+
+Setiap strategi punya perkiraan peluang benar p (jawaban yang dipakai login
+dan diterima server) dan biaya rata-rata c (ms). Untuk pencarian sekuensial
+yang berhenti di jawaban pertama, urutan dengan p/c terbesar lebih dulu
+meminimalkan perkiraan waktu sampai jawaban benar. Sebagian kecil solve
+memakai urutan acak (eksplorasi) supaya urutan tetap beradaptasi ketika gaya
+CAPTCHA di situs berubah.
+
+Sebelum ada data, prior peluang menurun mengikuti urutan historis strategi,
+sehingga urutan awal sama dengan urutan lama di solve_image.
+"""
+
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+PRIOR_TRIALS = 2.0    # Bobot prior (pseudo-trial) per strategi
+COST_SMOOTHING = 0.2  # Bobot EWMA untuk biaya (ms) per strategi
+
+
+class StrategyStats:
+    """Statistik win-rate dan biaya per strategi, opsional disimpan ke JSON"""
+
+    def __init__(self, default_order=(), path=None, explore=0.1, prune_below=0.02,
+                 min_trials=30, seed=None):
+        """
+        Args:
+            default_order: Urutan historis strategi (menentukan prior)
+            path: File JSON untuk menyimpan statistik antar proses
+            explore: Peluang memakai urutan acak (termasuk strategi yang di-prune)
+            prune_below: Strategi dengan win-rate di bawah ini dilewati...
+            min_trials: ...setelah dicoba minimal sebanyak ini
+        """
+        self.path = path
+        self.explore = explore
+        self.prune_below = prune_below
+        self.min_trials = min_trials
+        self._random = random.Random(seed)
+        count = len(default_order)
+        self._prior = {tag: 1 - rank / (count + 1) for rank, tag in enumerate(default_order)}
+        self._stats = {}
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def _entry(self, tag):
+        return self._stats.setdefault(tag, {'trials': 0, 'wins': 0, 'cost_ms': None})
+
+    def win_rate(self, tag):
+        entry = self._stats.get(tag, {'trials': 0, 'wins': 0})
+        prior = self._prior.get(tag, 0.5)
+        return (entry['wins'] + prior * PRIOR_TRIALS) / (entry['trials'] + PRIOR_TRIALS)
+
+    def _score(self, tag):
+        costs = [e['cost_ms'] for e in self._stats.values() if e['cost_ms']]
+        # Strategi yang belum pernah diukur memakai biaya rata-rata
+        default_cost = sum(costs) / len(costs) if costs else 1.0
+        cost = self._stats.get(tag, {}).get('cost_ms') or default_cost
+        return self.win_rate(tag) / max(cost, 0.001)
+
+    def _pruned(self, tag):
+        entry = self._stats.get(tag)
+        return (
+            entry is not None
+            and entry['trials'] >= self.min_trials
+            and entry['wins'] / entry['trials'] < self.prune_below
+        )
+
+    def order(self, tags):
+        """Urutan strategi untuk satu solve"""
+        tags = list(tags)
+        with self._lock:
+            if self.explore and self._random.random() < self.explore:
+                self._random.shuffle(tags)
+                return tags
+
+            ordered = sorted(tags, key=self._score, reverse=True)
+            kept = [tag for tag in ordered if not self._pruned(tag)]
+        # Jangan pernah mem-prune semua strategi
+        return kept or ordered
+
+    def record_cost(self, tag, elapsed_ms):
+        """Catat waktu jalan satu strategi (EWMA)"""
+        with self._lock:
+            entry = self._entry(tag)
+            if entry['cost_ms'] is None:
+                entry['cost_ms'] = elapsed_ms
+            else:
+                entry['cost_ms'] += COST_SMOOTHING * (elapsed_ms - entry['cost_ms'])
+
+    def record_result(self, tried, winner, accepted):
+        """Catat hasil login untuk satu solve
+
+        Args:
+            tried: Strategi yang sempat dijalankan untuk gambar tersebut
+            winner: Strategi yang menghasilkan jawaban yang dikirim
+            accepted: True jika server menerima jawaban
+        """
+        with self._lock:
+            for tag in tried:
+                entry = self._entry(tag)
+                entry['trials'] += 1
+                if accepted and tag == winner:
+                    entry['wins'] += 1
+        self._save()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                tag: dict(entry, win_rate=round(self.win_rate(tag), 4), pruned=self._pruned(tag))
+                for tag, entry in self._stats.items()
+            }
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for tag, entry in json.load(f).items():
+                    self._stats[tag] = {
+                        'trials': int(entry.get('trials', 0)),
+                        'wins': int(entry.get('wins', 0)),
+                        'cost_ms': entry.get('cost_ms'),
+                    }
+        except Exception as e:
+            logger.warning(f"Gagal memuat statistik strategi {self.path}: {e}")
+
+    def _save(self):
+        """Tulis statistik ke disk secara atomik"""
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self._stats, indent=2)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Gagal menyimpan statistik strategi {self.path}: {e}")
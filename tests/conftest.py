@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Modul repo berada di root (tanpa package)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Test tidak menulis file metrics/artefak produksi
+os.environ.setdefault('METRICS_EVENTS_FILE', '')
+os.environ.setdefault('METRICS_TEXTFILE', '')
+os.environ.setdefault('ARTIFACTS', '0')
@@ -0,0 +1,89 @@
+import gzip
+import os
+import time
+
+import pytest
+
+from artifact_store import ArtifactStore, _safe_name
+
+DAY = 86400
+
+
+def _run_dir(root, name, age_days, size=0):
+    path = root / name
+    path.mkdir(parents=True)
+    if size:
+        (path / 'shot.jpg').write_bytes(b'x' * size)
+    mtime = time.time() - age_days * DAY
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _runs(root):
+    return sorted(entry.name for entry in os.scandir(root) if entry.is_dir())
+
+
+def _retain(root, **limits):
+    """Jalankan retensi lewat worker (saat start dan saat close)"""
+    limits = {'max_runs': 50, 'max_age_days': 14, 'max_bytes': 10 ** 9, **limits}
+    store = ArtifactStore(str(root), **limits)
+    store.close()
+    return store
+
+
+def test_age_cut_off(tmp_path):
+    _run_dir(tmp_path, 'run_new', 1)
+    _run_dir(tmp_path, 'run_edge', 13.9)
+    _run_dir(tmp_path, 'run_old', 14.1)
+    _run_dir(tmp_path, 'run_older', 30)
+    store = _retain(tmp_path)
+    assert _runs(tmp_path) == ['run_edge', 'run_new']
+    assert store.stats()['removed_runs'] == 2
+
+
+def test_max_runs_keeps_newest(tmp_path):
+    for index in range(5):
+        _run_dir(tmp_path, f'run_{index}', index)  # run_0 terbaru
+    _retain(tmp_path, max_runs=3)
+    assert _runs(tmp_path) == ['run_0', 'run_1', 'run_2']
+
+
+def test_size_limit_removes_oldest_first(tmp_path):
+    for index in range(4):
+        _run_dir(tmp_path, f'run_{index}', index, size=1000)
+    _retain(tmp_path, max_bytes=2500)
+    assert _runs(tmp_path) == ['run_0', 'run_1']
+
+
+def test_active_run_is_never_removed(tmp_path):
+    _run_dir(tmp_path, 'run_old', 30)
+    _run_dir(tmp_path, 'run_active', 30, size=5000)
+    # Batas longgar selama worker berjalan, diperketat setelah close()
+    store = ArtifactStore(str(tmp_path), max_age_days=365, max_bytes=10 ** 9)
+    store.save('run_active', 'akun', 'starasn_login_failed', b'jpeg')  # menandai run aktif
+    store.close()
+
+    store.max_age_s = 14 * DAY
+    store.max_bytes = 1000
+    store.enforce_retention()
+    assert _runs(tmp_path) == ['run_active']
+
+    store.end_run('run_active')
+    store.enforce_retention()
+    assert _runs(tmp_path) == []
+
+
+def test_save_writes_jpeg_and_gzipped_html(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    store.save('20240101_070000_abcd', 'akun/1', 'starasn_login_failed', b'\xff\xd8jpeg', '<html>é</html>', 2)
+    store.close()
+
+    base = tmp_path / '20240101_070000_abcd' / _safe_name('akun/1') / 'starasn_login_failed_attempt2'
+    assert base.with_suffix('.jpg').read_bytes() == b'\xff\xd8jpeg'
+    assert gzip.decompress(base.with_suffix('.html.gz').read_bytes()).decode('utf-8') == '<html>é</html>'
+    assert store.stats()['saved'] == 1
+
+
+@pytest.mark.parametrize('value, expected', [('akun/1', 'akun_1'), ('', 'default'), ('a b..c', 'a_b..c')])
+def test_safe_name(value, expected):
+    assert _safe_name(value) == expected
@@ -0,0 +1,61 @@
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+psutil = pytest.importorskip('psutil')
+
+from browser_manager import _browser_pids, _tree_rss_mb
+
+
+@pytest.fixture
+def spawn():
+    procs = []
+
+    def start(*args):
+        proc = subprocess.Popen(args)
+        procs.append(proc)
+        return proc
+
+    yield start
+    for proc in procs:
+        proc.kill()
+        proc.wait()
+
+
+def _fake_browser(tmp_path, spawn):
+    """Proses bernama headless_shell yang punya satu anak (seperti renderer)"""
+    exe = tmp_path / 'headless_shell'
+    shutil.copy(sys.executable, exe)
+    script = 'import subprocess, sys, time; subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"]); time.sleep(30)'
+    proc = spawn(str(exe), '-c', script)
+    for _ in range(100):
+        if psutil.Process(proc.pid).children():
+            break
+        time.sleep(0.05)
+    return proc
+
+
+def test_browser_pids_ignores_non_browser_children(tmp_path, spawn):
+    browser = _fake_browser(tmp_path, spawn)
+    spawn(sys.executable, '-c', 'import time; time.sleep(30)')  # mis. worker OCR
+
+    assert _browser_pids() == {browser.pid}
+
+
+def test_tree_rss_counts_browser_and_descendants_only(tmp_path, spawn):
+    browser = _fake_browser(tmp_path, spawn)
+    spawn(sys.executable, '-c', 'import time; time.sleep(30)')
+
+    tree = [psutil.Process(browser.pid)] + psutil.Process(browser.pid).children(recursive=True)
+    assert len(tree) == 2
+    expected = sum(p.memory_info().rss for p in tree) / (1024 * 1024)
+    rss = _tree_rss_mb({browser.pid})
+    assert rss == pytest.approx(expected, rel=0.2)
+
+
+def test_tree_rss_unmeasurable():
+    assert _tree_rss_mb(set()) is None
+    assert _tree_rss_mb({2 ** 22 + 1}) is None
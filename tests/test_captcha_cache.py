@@ -0,0 +1,140 @@
+import io
+import json
+import random
+
+from PIL import Image
+
+from bench_captcha import CAPTCHA_ALPHABET, synthetic_captcha
+from captcha_cache import CaptchaCache, image_hash
+from captcha_solver import CaptchaSolver
+
+
+def png_round_trip(img):
+    buffer = io.BytesIO()
+    img.save(buffer, 'PNG')
+    return Image.open(io.BytesIO(buffer.getvalue()))
+
+
+def test_same_image_same_hash():
+    img = synthetic_captcha('AB12CD', seed=4)
+    assert image_hash(img) == image_hash(synthetic_captcha('AB12CD', seed=4))
+    assert image_hash(img) == image_hash(png_round_trip(img))
+
+
+def test_one_glyph_difference_never_hits():
+    rnd = random.Random(0)
+    cache = CaptchaCache(max_size=4096)
+    pairs = []
+    for seed in range(60):
+        text = ''.join(rnd.choice(CAPTCHA_ALPHABET) for _ in range(6))
+        pos = rnd.randrange(len(text))
+        other = text[:pos] + rnd.choice([c for c in CAPTCHA_ALPHABET if c != text[pos]]) + text[pos + 1:]
+        # Background (noise + garis) sama, hanya satu glyph berbeda
+        pairs.append((synthetic_captcha(text, seed=seed), synthetic_captcha(other, seed=seed), text))
+    for img, _, text in pairs:
+        cache.put(image_hash(img), text)
+    for _, other_img, text in pairs:
+        assert cache.get(image_hash(other_img)) != text
+
+
+def test_similar_glyphs_do_not_collide():
+    for a, b in (('O', '0'), ('8', 'B'), ('1', 'I')):
+        assert image_hash(synthetic_captcha(f'AB{a}2CD', seed=9)) != image_hash(synthetic_captcha(f'AB{b}2CD', seed=9))
+
+
+def test_hit_and_miss_are_counted():
+    cache = CaptchaCache(max_size=4)
+    assert cache.get('aa') is None
+    cache.put('aa', 'X1')
+    assert cache.get('aa') == 'X1'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = CaptchaCache(max_size=2)
+    cache.put('01', 'A')
+    cache.put('02', 'B')
+    cache.get('01')
+    cache.put('03', 'C')
+    assert cache.get('02') is None
+    assert cache.get('01') == 'A'
+    assert cache.get('03') == 'C'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_reject_removes_and_confirm_marks():
+    cache = CaptchaCache()
+    cache.put('01', 'A')
+    cache.put('02', 'B')
+    cache.confirm('01')
+    cache.reject('02')
+    assert cache.get('02') is None
+    assert cache.stats()['confirmed'] == 1
+
+
+def test_persisted_round_trip(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    cache = CaptchaCache(path=path)
+    cache.put('01', 'A')
+    cache.confirm('01')
+    cache.put('02', 'B')
+    cache.flush()
+
+    loaded = CaptchaCache(path=path)
+    assert loaded.get('01') == 'A'
+    assert loaded.get('02') == 'B'
+    assert loaded.stats()['confirmed'] == 1
+
+
+def test_old_format_file_is_ignored(tmp_path):
+    path = tmp_path / 'cache.json'
+    path.write_text(json.dumps({'entries': [['ff00', 'A', True]]}))
+    assert len(CaptchaCache(path=str(path))) == 0
+
+
+def test_writes_are_batched(tmp_path):
+    path = tmp_path / 'cache.json'
+    cache = CaptchaCache(path=str(path), flush_every=3)
+    cache.put('01', 'A')
+    cache.confirm('01')
+    assert not path.exists()
+    cache.put('02', 'B')
+    assert len(json.loads(path.read_text())['entries']) == 2
+
+    cache.reject('02')
+    assert len(json.loads(path.read_text())['entries']) == 2
+    cache.flush()
+    assert json.loads(path.read_text())['entries'] == [['01', 'A', True]]
+
+
+def test_stale_changes_are_written_on_next_change(tmp_path):
+    path = tmp_path / 'cache.json'
+    cache = CaptchaCache(path=str(path), flush_every=100, flush_interval=0)
+    cache.put('01', 'A')
+    assert path.exists()
+
+
+def test_failed_write_removes_temp_file(tmp_path):
+    target = tmp_path / 'cache.json'
+    target.mkdir()  # os.replace ke direktori gagal
+    cache = CaptchaCache(path=str(target), flush_every=1)
+    cache.put('01', 'A')
+    assert [p.name for p in tmp_path.iterdir()] == ['cache.json']
+    assert cache.get('01') == 'A'
+    target.rmdir()
+    cache.flush()  # perubahan yang gagal ditulis dicoba lagi
+    assert json.loads(target.read_text())['entries'] == [['01', 'A', False]]
+
+
+def test_solver_caches_only_valid_length_answers():
+    solver = CaptchaSolver(cache=CaptchaCache())
+    img = synthetic_captcha('AB12CD', seed=1)
+    # Tidak ada strategi dengan panjang valid: fallback 'ABC' dikembalikan tapi tidak di-cache
+    solver._solve = lambda img, debug_save_path=None, concurrent=False: ('ABC', ['threshold'], 'threshold')
+    assert solver.solve_image(img) == 'ABC'
+    assert len(solver.cache) == 0
+
+    solver._solve = lambda img, debug_save_path=None, concurrent=False: ('AB12CD', ['threshold'], 'threshold')
+    assert solver.solve_image(img) == 'AB12CD'
+    assert solver.cache.get(image_hash(img)) == 'AB12CD'
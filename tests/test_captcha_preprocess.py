@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import captcha_preprocess as cp
+from bench_captcha import _legacy_strategies, synthetic_captcha
+
+TAGS = [tag for tag, _ in cp.STRATEGIES]
+
+
+@pytest.mark.parametrize('seed', [0, 1, 7])
+@pytest.mark.parametrize('tag', TAGS)
+def test_strategy_matches_legacy_pil(tag, seed):
+    img = synthetic_captcha(seed=seed)
+    legacy = _legacy_strategies(img)[tag]()
+    arr = dict(cp.STRATEGIES)[tag](cp.PreprocessedCaptcha(img))
+    assert cp.to_image(arr).tobytes() == legacy.tobytes()
+
+
+@pytest.mark.parametrize('tag', TAGS)
+def test_odd_size_grayscale_matches_legacy(tag):
+    img = synthetic_captcha(seed=3, size=(97, 31)).convert('L')
+    legacy = _legacy_strategies(img)[tag]()
+    arr = dict(cp.STRATEGIES)[tag](cp.PreprocessedCaptcha(img))
+    assert cp.to_image(arr).tobytes() == legacy.tobytes()
+
+
+def test_kernel_on_tiny_image_is_identity():
+    arr = np.arange(4, dtype=np.uint8).reshape(2, 2)
+    assert np.array_equal(cp.smooth(arr), arr)
+    assert np.array_equal(cp.sharpen(arr), arr)
+
+
+def test_green_mask_marks_only_dominant_green():
+    img = Image.new('RGB', (2, 1))
+    img.putpixel((0, 0), (10, 200, 10))
+    img.putpixel((1, 0), (120, 140, 120))
+    assert cp.green_mask(img).tolist() == [[0, 255]]
@@ -0,0 +1,109 @@
+import hashlib
+import threading
+import time
+
+from PIL import Image
+
+from bench_captcha import synthetic_captcha
+from captcha_solver import CaptchaSolver
+
+
+def _solver(answers):
+    solver = CaptchaSolver()
+    solver._solve_image = lambda img, **kwargs: answers[img.info['index']]
+    return solver
+
+
+def _images(count, pulled=None):
+    for index in range(count):
+        if pulled is not None:
+            pulled.append(index)
+        img = Image.new('RGB', (4, 4))
+        img.info['index'] = index
+        yield img
+
+
+def test_solve_many_keeps_input_order():
+    answers = [f'A{index:04d}' for index in range(23)]
+    results = list(_solver(answers).solve_many(_images(23), workers=3, chunk_size=4))
+    assert results == list(enumerate(answers))
+
+
+def test_solve_many_unordered_yields_every_item():
+    answers = [f'A{index:04d}' for index in range(10)]
+    results = _solver(answers).solve_many(_images(10), workers=2, ordered=False, chunk_size=3)
+    assert sorted(results) == list(enumerate(answers))
+
+
+def test_solve_many_reads_input_lazily():
+    release = threading.Event()
+    solver = CaptchaSolver()
+    solver._solve_image = lambda img, **kwargs: release.wait(5) and 'ABCDE'
+    pulled = []
+    results = solver.solve_many(_images(100, pulled), workers=2, chunk_size=2, max_pending=4)
+    assert pulled == []
+    release.set()
+    assert next(results) == (0, 'ABCDE')
+    assert len(pulled) <= 4
+    results.close()
+
+
+class FlakyEngine:
+    """Engine OCR palsu: crash untuk gambar selebar width, baca gambar lain"""
+
+    def __init__(self, width):
+        self.width = width
+
+    def recognize(self, image, psm=7):
+        if image.width == self.width:
+            raise RuntimeError('tesseract crashed')
+        time.sleep(0.05)  # strategi yang crash selesai lebih dulu
+        return 'ABCDE'
+
+
+def _ocr_solver(workers, crash_width=40):
+    solver = CaptchaSolver(workers=workers)
+    solver._engine = FlakyEngine(width=crash_width)
+    solver._engines_loaded = True
+    return solver
+
+
+def test_ocr_crash_skips_strategy_in_concurrent_solve():
+    solver = _ocr_solver(workers=6)
+    try:
+        assert solver.solve_image(Image.new('RGB', (40, 20), 'white')) == 'ABCDE'
+    finally:
+        solver.close()
+
+
+def test_ocr_crash_skips_strategy_in_sequential_solve():
+    # Strategi 2x (color_filter_2x pertama) crash, strategi ukuran asli membaca
+    assert _ocr_solver(workers=1, crash_width=80).solve_image(Image.new('RGB', (40, 20), 'white')) == 'ABCDE'
+
+
+class DigestEngine:
+    """Engine OCR palsu: 'teks' = digest bitmap, jadi hasil membandingkan bitmap"""
+
+    def recognize(self, image, psm=7):
+        return hashlib.sha1(image.tobytes()).hexdigest()[:6].upper()
+
+
+def _engine_solver(engine):
+    solver = CaptchaSolver()
+    solver._engine = engine
+    solver._engines_loaded = True
+    return solver
+
+
+def test_solve_many_matches_solve_image():
+    images = [synthetic_captcha(seed=seed) for seed in range(6)]
+    images.append(synthetic_captcha(seed=9, size=(97, 31)).convert('L'))
+    solver = _engine_solver(DigestEngine())
+    expected = [solver.solve_image(img) for img in images]
+    assert list(solver.solve_many(images, workers=2, chunk_size=4)) == list(enumerate(expected))
+
+
+def test_solve_many_reports_unreadable_items():
+    solver = _engine_solver(DigestEngine())
+    results = dict(solver.solve_many([b'bukan gambar', synthetic_captcha(seed=1)], workers=1))
+    assert results[0] is None and results[1]
@@ -0,0 +1,79 @@
+import random
+
+import numpy as np
+import pytest
+
+from bench_captcha import CAPTCHA_ALPHABET, synthetic_captcha
+from captcha_solver import CaptchaSolver
+from captcha_templates import GLYPH_SIZE, INDEX_DTYPE, TemplateEngine, TemplateIndex, extract_glyphs
+
+
+def _samples(count, seed):
+    rnd = random.Random(seed)
+    samples = []
+    for i in range(count):
+        text = ''.join(rnd.choice(CAPTCHA_ALPHABET) for _ in range(6))
+        samples.append((synthetic_captcha(text, seed=seed * 1000 + i), text))
+    return samples
+
+
+@pytest.fixture(scope='module')
+def index_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp('templates') / 'captcha_templates.npy'
+    TemplateIndex.build(_samples(150, seed=1)).save(path)
+    return path
+
+
+def test_index_round_trip_through_mmap(index_path):
+    index = TemplateIndex.load(index_path)
+    assert isinstance(index.records, np.memmap)
+    assert index.records.dtype == INDEX_DTYPE
+    assert len(index) == 150 * 6
+    assert set(index.labels.tolist()) == set(CAPTCHA_ALPHABET)
+    assert index.glyphs.shape == (len(index), GLYPH_SIZE * GLYPH_SIZE)
+    assert set(np.unique(index.glyphs).tolist()) <= {0, 1}
+
+
+def test_engine_recognizes_training_strings(index_path):
+    engine = TemplateEngine.from_file(index_path)
+    for img, text in _samples(10, seed=1):
+        assert engine.solve(img) == text
+
+
+def test_engine_recognizes_unseen_strings(index_path):
+    engine = TemplateEngine.from_file(index_path)
+    answers = [(engine.solve(img), text) for img, text in _samples(30, seed=2)]
+    assert sum(answer == text for answer, text in answers) >= 25
+    chars = [a == b for answer, text in answers if answer for a, b in zip(answer, text)]
+    assert sum(chars) / len(chars) >= 0.95
+
+
+def test_engine_rejects_wrong_glyph_count(index_path):
+    engine = TemplateEngine.from_file(index_path)
+    assert engine.solve(synthetic_captcha('AB', seed=5)) is None
+
+
+def test_build_skips_samples_with_mismatched_label():
+    img, text = _samples(1, seed=3)[0]
+    # Glyph yang menempel bisa dibelah, tapi tidak bisa digabung: label 3 karakter dilewati
+    index = TemplateIndex.build([(img, text[:3]), (img, text.lower())])
+    assert len(index) == len(text)
+    assert ''.join(index.labels.tolist()) == text
+    assert len(extract_glyphs(img, expected=len(text))) == len(text)
+
+
+def test_atomic_save_leaves_no_temp_files(index_path):
+    assert [p.name for p in index_path.parent.iterdir()] == [index_path.name]
+
+
+@pytest.mark.parametrize('records', [
+    np.zeros(3, dtype=[('label', 'U1'), ('glyph', np.uint8, (8 * 8,))]),   # GLYPH_SIZE lama
+    np.zeros((3, GLYPH_SIZE * GLYPH_SIZE), dtype=np.uint8),                # bukan index terstruktur
+])
+def test_load_rejects_other_formats(tmp_path, records):
+    path = tmp_path / 'old.npy'
+    np.save(path, records)
+    with pytest.raises(ValueError, match='bangun ulang'):
+        TemplateIndex.load(path)
+    # CaptchaSolver jatuh ke Tesseract alih-alih gagal
+    assert CaptchaSolver()._load_templates(str(path)) is None
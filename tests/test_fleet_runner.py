@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+
+import fleet_runner
+from fleet_runner import RateLimiter, _parse_schedule, load_accounts, parse_rates
+
+SITE = {'username': 'u', 'password': 'p', 'latitude': '-7.5', 'longitude': 112.7}
+
+
+def _write(tmp_path, accounts):
+    path = tmp_path / 'accounts.json'
+    path.write_text(json.dumps({'accounts': accounts}))
+    return str(path)
+
+
+def test_load_accounts(tmp_path):
+    accounts = load_accounts(_write(tmp_path, [
+        {'id': 'a', 'email_to': 'a@example.com', 'sites': {'starasn': SITE},
+         'schedule': {'morning': '06:30-07:15'}},
+        {'sites': {'pusaka': SITE}},
+    ]))
+    assert accounts[0] == {
+        'id': 'a',
+        'sites': {'starasn': {'username': 'u', 'password': 'p', 'latitude': -7.5, 'longitude': 112.7}},
+        'email_to': 'a@example.com',
+        'schedule': {'morning': (390, 435)},
+    }
+    # Tanpa id: nomor urut, tanpa jadwal: None (jendela default)
+    assert accounts[1]['id'] == 'akun-2'
+    assert accounts[1]['schedule'] is None and accounts[1]['email_to'] is None
+
+
+@pytest.mark.parametrize('accounts, error', [
+    ([{'id': 'a', 'sites': {'pusaka': SITE}}, {'id': 'a', 'sites': {'pusaka': SITE}}], 'duplikat'),
+    ([{'id': 'a', 'sites': {'siasn': SITE}}], 'tidak dikenal'),
+    ([{'id': 'a', 'sites': {'pusaka': dict(SITE, password='')}}], 'password'),
+    ([{'id': 'a', 'sites': {'pusaka': {'username': 'u'}}}], 'latitude'),
+    ([{'id': 'a', 'sites': {}}], 'tidak ada site'),
+    ([{'id': 'a', 'sites': {'pusaka': SITE}, 'schedule': {'morning': '7-8'}}], 'tidak valid'),
+])
+def test_load_accounts_rejects_invalid(tmp_path, accounts, error):
+    with pytest.raises(ValueError, match=error):
+        load_accounts(_write(tmp_path, accounts))
+
+
+@pytest.mark.parametrize('schedule, expected', [
+    (None, None),
+    ({}, None),
+    ({'morning': '06:00-07:30'}, {'morning': (360, 450)}),
+    ({'morning': ' 06:00 - 06:00 ', 'afternoon': '16:45-23:59'}, {'morning': (360, 360), 'afternoon': (1005, 1439)}),
+])
+def test_parse_schedule(schedule, expected):
+    assert _parse_schedule('a', schedule) == expected
+
+
+@pytest.mark.parametrize('window', ['06:00', '06:00-07:00-08:00', '6-7', 'pagi', '06:00-24:00', '06:60-07:00',
+                                    '', 630])
+def test_parse_schedule_invalid_window(window):
+    with pytest.raises(ValueError, match='tidak valid'):
+        _parse_schedule('a', {'morning': window})
+
+
+def test_parse_schedule_reversed_window():
+    with pytest.raises(ValueError, match='terbalik'):
+        _parse_schedule('a', {'morning': '08:00-07:00'})
+
+
+def test_parse_rates(monkeypatch):
+    monkeypatch.setenv('FLEET_RATE_PUSAKA', '10')
+    monkeypatch.delenv('FLEET_RATE_STARASN', raising=False)
+    assert parse_rates(None) == {'pusaka': 10.0}
+    assert parse_rates(['starasn=30', 'pusaka=0']) == {'starasn': 30.0}
+    with pytest.raises(Exception, match='tidak valid'):
+        parse_rates(['siasn=5'])
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """asyncio.sleep yang hanya mencatat durasi (tanpa menunggu)"""
+    recorded = []
+
+    async def fake_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr(fleet_runner.asyncio, 'sleep', fake_sleep)
+    return recorded
+
+
+def test_rate_limiter_spaces_starts_evenly(sleeps):
+    limiter = RateLimiter(per_minute=2)
+
+    async def run():
+        await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+
+    asyncio.run(run())
+    # Start pertama langsung, berikutnya berjarak 30s (tanpa burst)
+    assert len(sleeps) == 2
+    assert sleeps[0] == pytest.approx(30, abs=0.5)
+    assert sleeps[1] == pytest.approx(60, abs=0.5)
+
+
+def test_rate_limiter_disabled(sleeps):
+    limiter = RateLimiter(per_minute=0)
+    asyncio.run(limiter.acquire())
+    asyncio.run(limiter.acquire())
+    assert sleeps == []
@@ -0,0 +1,57 @@
+import gzip
+import logging
+import os
+import time
+
+from log_setup import _file_handler
+
+
+def _logger(handler):
+    logger = logging.getLogger(f'test_log_setup.{id(handler)}')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    return logger
+
+
+def _read_gz(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_size_rotation_gzips_backups(tmp_path):
+    path = tmp_path / 'app.log'
+    handler = _file_handler(str(path), max_bytes=200, backups=2, when=None)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger = _logger(handler)
+    for index in range(12):
+        logger.info(f'baris {index:02d} ' + 'x' * 40)
+    handler.close()
+
+    names = sorted(os.listdir(tmp_path))
+    assert names == ['app.log', 'app.log.1.gz', 'app.log.2.gz']
+    newest, oldest = _read_gz(tmp_path / 'app.log.1.gz'), _read_gz(tmp_path / 'app.log.2.gz')
+    # Backup berurutan: .1 lebih baru dari .2, file aktif paling baru, tidak ada baris hilang di tengah
+    lines = (oldest + newest + path.read_text(encoding='utf-8')).splitlines()
+    numbers = [int(line.split()[1]) for line in lines]
+    assert numbers == list(range(numbers[0], 12))
+
+
+def test_timed_rotation_gzips_and_prunes(tmp_path):
+    path = tmp_path / 'app.log'
+    handler = _file_handler(str(path), max_bytes=0, backups=2, when='S')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger = _logger(handler)
+    logger.info('awal')
+    start = int(time.time()) - 100
+    for index in range(4):
+        # Rotasi dipaksa; nama backup = waktu rolloverAt - 1 detik, unik per rotasi
+        handler.rolloverAt = start + index
+        logger.info(f'rotasi {index}')
+    handler.close()
+
+    backups = sorted(name for name in os.listdir(tmp_path) if name != 'app.log')
+    assert len(backups) == 2 and all(name.endswith('.gz') for name in backups)
+    # Backup tertua sudah dihapus, sisanya isi dua periode sebelum file aktif
+    assert [_read_gz(tmp_path / name).strip() for name in backups] == ['rotasi 1', 'rotasi 2']
+    assert path.read_text(encoding='utf-8').strip() == 'rotasi 3'
@@ -0,0 +1,94 @@
+import json
+import re
+
+import pytest
+
+from metrics import METRIC_PREFIX, Metrics
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\{((?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*)\} (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def _parse(text):
+    """Parser kecil format exposition teks: {family: (type, [(name, labels, value)])}"""
+    assert text.endswith('\n')
+    families = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            continue
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            assert name not in families, f"TYPE ganda untuk {name}"
+            families[name] = (kind, [])
+            current = name
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"baris tidak valid: {line!r}"
+        name, labels, value = match.groups()
+        assert name.startswith(current), f"sampel {name} di luar family {current}"
+        families[current][1].append((name, dict(LABEL.findall(labels)), float(value)))
+    return families
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics(buckets=(0.5, 1, 5))
+    metrics.record('login', 0.2, 'ok', attempts=3, site='starasn', account='a')
+    metrics.record('login', 2.0, 'failed', attempts=7, site='starasn', account='a')
+    metrics.record('goto', 9.0, site='pusaka', account='b "x"\n')
+    return metrics
+
+
+def test_textfile_is_valid_exposition_format(metrics):
+    families = _parse(metrics.render())
+    assert {name: kind for name, (kind, _) in families.items()} == {
+        f'{METRIC_PREFIX}_duration_seconds': 'histogram',
+        f'{METRIC_PREFIX}_outcomes_total': 'counter',
+        f'{METRIC_PREFIX}_attempts_total': 'counter',
+    }
+
+
+def test_histogram_buckets_are_cumulative(metrics):
+    _, samples = _parse(metrics.render())[f'{METRIC_PREFIX}_duration_seconds']
+    login = {'phase': 'login', 'site': 'starasn', 'account': 'a'}
+    buckets = [(labels['le'], value) for name, labels, value in samples
+               if name.endswith('_bucket') and {k: v for k, v in labels.items() if k != 'le'} == login]
+    assert buckets == [('0.5', 1), ('1', 1), ('5', 2), ('+Inf', 2)]
+    values = {name.rsplit('_', 1)[-1]: value for name, labels, value in samples
+              if labels == login and not name.endswith('_bucket')}
+    assert values == {'sum': pytest.approx(2.2), 'count': 2}
+
+
+def test_counters_and_label_escaping(metrics):
+    families = _parse(metrics.render())
+    outcomes = {(labels['phase'], labels['outcome']): value
+                for _, labels, value in families[f'{METRIC_PREFIX}_outcomes_total'][1]}
+    assert outcomes == {('login', 'ok'): 1, ('login', 'failed'): 1, ('goto', 'ok'): 1}
+    attempts = {labels['phase']: value for _, labels, value in families[f'{METRIC_PREFIX}_attempts_total'][1]}
+    # Fase tanpa attempts dihitung satu attempt per span
+    assert attempts == {'login': 10, 'goto': 1}
+    assert 'account="b \\"x\\"\\n"' in metrics.render()
+
+
+def test_write_textfile_and_events(tmp_path, metrics):
+    textfile = tmp_path / 'metrics.prom'
+    events = tmp_path / 'events.jsonl'
+    metrics.textfile_path = str(textfile)
+    metrics.events_path = str(events)
+    metrics.record('presence', 1.5, 'ok', site='starasn', account='a')
+    metrics.write_textfile()
+    metrics.close()
+
+    assert textfile.read_text(encoding='utf-8') == metrics.render()
+    event, = [json.loads(line) for line in events.read_text(encoding='utf-8').splitlines()]
+    assert event['phase'] == 'presence' and event['duration_ms'] == 1500.0 and event['site'] == 'starasn'
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_failed_textfile_write_leaves_no_temp_file(tmp_path, metrics):
+    target = tmp_path / 'metrics.prom'
+    target.mkdir()  # os.replace ke direktori gagal
+    metrics.textfile_path = str(target)
+    metrics.write_textfile()
+    assert not list(tmp_path.glob('*.tmp'))
@@ -0,0 +1,126 @@
+import email
+import socket
+import socketserver
+import threading
+
+import pytest
+
+import notifier
+from notifier import Notifier, SmtpConnection, build_message
+
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    """Server SMTP minimal: cukup untuk smtplib tanpa STARTTLS/AUTH"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.opened(self.connection)
+        self.reply('220 localhost ESMTP test')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 localhost')
+            elif command.startswith(('MAIL', 'RCPT', 'RSET', 'NOOP')):
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for data in iter(self.rfile.readline, b''):
+                    if data in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data)
+                self.server.messages.append(b''.join(lines))
+                self.reply('250 OK queued')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('500 Unknown command')
+
+
+class SmtpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SmtpHandler)
+        self.lock = threading.Lock()
+        self.connections = []
+        self.messages = []
+
+    def opened(self, connection):
+        with self.lock:
+            self.connections.append(connection)
+
+    def drop_connections(self):
+        """Putus semua koneksi dari sisi server (seperti timeout idle server SMTP)"""
+        with self.lock:
+            for connection in self.connections:
+                try:
+                    connection.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+@pytest.fixture
+def smtp_server():
+    server = SmtpServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _connection(server):
+    host, port = server.server_address
+    return SmtpConnection(host, port, starttls=False, timeout=5)
+
+
+def _message(text):
+    return build_message('bot@example.com', 'saya@example.com', True, text)
+
+
+def _body(raw):
+    return email.message_from_bytes(raw).get_payload()[0].get_payload(decode=True).decode()
+
+
+def test_connection_is_reused_between_messages(smtp_server):
+    connection = _connection(smtp_server)
+    for index in range(3):
+        connection.send(_message(f'pesan {index}'))
+    connection.close()
+
+    assert connection.connects == 1
+    assert len(smtp_server.connections) == 1
+    assert len(smtp_server.messages) == 3
+
+
+@pytest.mark.parametrize('idle_check', [notifier.IDLE_CHECK_SECONDS, 0])
+def test_reconnects_after_server_drops_connection(smtp_server, monkeypatch, idle_check):
+    # idle_check 0: putus terdeteksi oleh NOOP; default: oleh kegagalan kirim
+    monkeypatch.setattr(notifier, 'IDLE_CHECK_SECONDS', idle_check)
+    connection = _connection(smtp_server)
+    connection.send(_message('sebelum putus'))
+    smtp_server.drop_connections()
+    connection.send(_message('setelah putus'))
+    connection.close()
+
+    assert connection.connects == 2
+    assert len(smtp_server.connections) == 2
+    assert ['setelah putus' in _body(raw) for raw in smtp_server.messages] == [False, True]
+
+
+def test_notifier_delivers_queue_over_one_connection(smtp_server):
+    sender = Notifier(_connection(smtp_server), 'bot@example.com', backoff=0)
+    sender.submit('a@example.com', True, 'Pusaka OK')
+    sender.submit('b@example.com', False, 'Star-ASN gagal')
+    sender.close(timeout=10)
+
+    assert sender.stats() == {'sent': 2, 'failed': 0, 'queued': 0, 'connections': 1}
+    assert len(smtp_server.messages) == 2
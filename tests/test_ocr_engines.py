@@ -0,0 +1,65 @@
+import json
+import os
+import stat
+
+import pytest
+
+import ocr_engines
+
+
+def _fake_tesseract(path, version, calls):
+    """Script tesseract palsu yang mencatat setiap pemanggilan --version"""
+    path.write_text(f"#!/bin/sh\necho run >> {calls}\necho 'tesseract {version}'\n")
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+def _calls(path):
+    return len(path.read_text().splitlines()) if path.exists() else 0
+
+
+@pytest.fixture
+def setup(tmp_path, monkeypatch):
+    if os.name != 'posix':
+        pytest.skip('script shell butuh POSIX')
+    calls = tmp_path / 'calls.log'
+    cmd = _fake_tesseract(tmp_path / 'tesseract', '5.3.0', calls)
+    monkeypatch.setenv('TESSERACT_CMD', cmd)
+    return tmp_path, cmd, calls, str(tmp_path / 'cache.json')
+
+
+def test_second_lookup_uses_disk_cache(setup):
+    _, cmd, calls, cache = setup
+    assert ocr_engines.find_tesseract(cache) == (cmd, '5.3.0')
+    assert ocr_engines.find_tesseract(cache) == (cmd, '5.3.0')
+    assert _calls(calls) == 1
+    with open(cache, encoding='utf-8') as f:
+        entry = json.load(f)
+    assert entry['cmd'] == cmd and entry['version'] == '5.3.0'
+    assert entry['size'] == os.stat(cmd).st_size
+
+
+def test_changed_binary_is_probed_again(setup):
+    tmp_path, cmd, calls, cache = setup
+    ocr_engines.find_tesseract(cache)
+    # Upgrade: isi (dan ukuran) binary berubah
+    _fake_tesseract(tmp_path / 'tesseract', '5.4.10-upgraded', calls)
+    assert ocr_engines.find_tesseract(cache) == (cmd, '5.4.10-upgraded')
+    assert _calls(calls) == 2
+    assert ocr_engines.find_tesseract(cache) == (cmd, '5.4.10-upgraded')
+    assert _calls(calls) == 2
+
+
+def test_cached_binary_outside_candidates_is_ignored(setup, monkeypatch):
+    tmp_path, _, calls, cache = setup
+    ocr_engines.find_tesseract(cache)
+    other = _fake_tesseract(tmp_path / 'tesseract-other', '4.1.1', tmp_path / 'other.log')
+    monkeypatch.setenv('TESSERACT_CMD', other)
+    assert ocr_engines.find_tesseract(cache) == (other, '4.1.1')
+    assert _calls(calls) == 1
+
+
+def test_missing_binary_returns_none(tmp_path, monkeypatch):
+    monkeypatch.setenv('TESSERACT_CMD', str(tmp_path / 'tidak-ada'))
+    assert ocr_engines.find_tesseract(str(tmp_path / 'cache.json')) is None
+    assert not (tmp_path / 'cache.json').exists()
@@ -0,0 +1,51 @@
+import pytest
+
+from presence_probe import ProbeStats, decide_pusaka, decide_starasn
+
+
+def pusaka(masuk=False, pulang=False, sudah=False):
+    return {'buttons': {'masuk': masuk, 'pulang': pulang}, 'cards': {}, 'markers': {'sudah': sudah}}
+
+
+def card(found=True, text='Belum Presensi', has_action=True):
+    return {'found': found, 'text': text, 'has_action': has_action}
+
+
+def starasn(masuk=None, pulang=None):
+    missing = card(found=False, text='', has_action=False)
+    return {'buttons': {}, 'cards': {'masuk': masuk or missing, 'pulang': pulang or missing}, 'markers': {}}
+
+
+@pytest.mark.parametrize('snapshot, hour, expected', [
+    (pusaka(masuk=True), 7, ('masuk', True)),
+    (pusaka(masuk=True, pulang=True), 17, ('masuk', True)),
+    (pusaka(pulang=True), 17, ('pulang', True)),
+    (pusaka(pulang=True), 15, (None, True)),
+    (pusaka(sudah=True), 10, (None, True)),
+    (pusaka(), 10, (None, False)),
+])
+def test_decide_pusaka(snapshot, hour, expected):
+    assert decide_pusaka(snapshot, hour)[:2] == expected
+
+
+@pytest.mark.parametrize('snapshot, hour, expected', [
+    (starasn(masuk=card()), 7, ('masuk', True)),
+    (starasn(masuk=card(text='Sudah Presensi'), pulang=card()), 17, ('pulang', True)),
+    (starasn(masuk=card(text='Sudah Presensi'), pulang=card()), 15, (None, True)),
+    (starasn(masuk=card(has_action=False)), 7, (None, True)),
+    (starasn(), 7, (None, True)),
+])
+def test_decide_starasn(snapshot, hour, expected):
+    assert decide_starasn(snapshot, hour)[:2] == expected
+
+
+def test_probe_stats_report_aggregates_and_resets():
+    stats = ProbeStats()
+    stats.record('pusaka', 10.0)
+    stats.record('pusaka', 30.0)
+    stats.record('starasn', 5.0)
+    assert stats.report() == {
+        'pusaka': {'probes': 2, 'avg_ms': 20.0, 'max_ms': 30.0},
+        'starasn': {'probes': 1, 'avg_ms': 5.0, 'max_ms': 5.0},
+    }
+    assert stats.report() == {}
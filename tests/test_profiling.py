@@ -0,0 +1,56 @@
+import asyncio
+import tracemalloc
+
+import pytest
+
+import profiling
+from profiling import _Session, profile_phase
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def session(monkeypatch):
+    tracemalloc.start()
+    session = _Session()
+    monkeypatch.setattr(profiling, '_active', session)
+    yield session
+    tracemalloc.stop()
+
+
+def _peak_kb(session, name):
+    return session.phases[name]['max_peak_kb']
+
+
+def test_nested_phase_peak_counts_for_parent(session):
+    with profile_phase('parent'):
+        with profile_phase('child'):
+            buffer = bytearray(4 * MB)
+            del buffer
+    assert _peak_kb(session, 'child') > 3 * 1024
+    assert _peak_kb(session, 'parent') >= _peak_kb(session, 'child')
+
+
+def test_interleaved_async_phases_keep_own_peaks(session):
+    """Fase yang selesai tidak berurutan (task async) tidak saling menukar puncak"""
+    async def large(started, release):
+        async with profile_phase('large'):
+            buffer = bytearray(8 * MB)
+            del buffer
+            started.set()
+            await release.wait()
+
+    async def small(started, release):
+        await started.wait()
+        async with profile_phase('small'):
+            release.set()
+            await asyncio.sleep(0)  # 'large' selesai lebih dulu
+
+    async def run():
+        started, release = asyncio.Event(), asyncio.Event()
+        await asyncio.gather(large(started, release), small(started, release))
+
+    asyncio.run(run())
+    assert _peak_kb(session, 'large') > 7 * 1024
+    assert _peak_kb(session, 'small') < 1024
+    assert not session.open
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+from route_filter import SITE_RULES, RouteFilter, load_route_filters
+
+
+class FakeRoute:
+    def __init__(self, url, resource_type):
+        self.request = SimpleNamespace(url=url, resource_type=resource_type)
+        self.outcome = None
+
+    def abort(self, reason):
+        self.outcome = 'abort'
+
+    def continue_(self):
+        self.outcome = 'continue'
+
+
+def _starasn_filter():
+    return RouteFilter(**SITE_RULES['starasn'])
+
+
+def test_blocks_images_but_allows_captcha():
+    route_filter = _starasn_filter()
+    assert route_filter.should_block('https://x/logo.png', 'image')
+    assert not route_filter.should_block('https://x/authentication/captcha?v=1', 'image')
+    assert not route_filter.should_block('https://x/authentication/login', 'document')
+    assert route_filter.should_block('https://www.googletagmanager.com/gtm.js', 'script')
+
+
+def test_report_counts_only_since_last_report():
+    route_filter = _starasn_filter()
+    for url, kind in (('https://x/a.png', 'image'), ('https://x/login', 'document')):
+        route_filter.handle(FakeRoute(url, kind))
+    assert route_filter.report() == {'blocked': 1, 'passed': 1}
+
+    route_filter.handle(FakeRoute('https://x/login', 'document'))
+    assert route_filter.report() == {'blocked': 0, 'passed': 1}
+    assert route_filter.stats() == {'blocked': 0, 'passed': 0}
+
+
+def test_route_filter_disabled_unless_forced(monkeypatch):
+    monkeypatch.setenv('ROUTE_FILTER', '0')
+    monkeypatch.setenv('STARASN_BLOCK_TYPES', 'font')
+    assert load_route_filters() == {}
+
+    filters = load_route_filters(force=True)
+    assert set(filters) == set(SITE_RULES)
+    assert filters['starasn'].should_block('https://x/a.woff2', 'font')
+    assert not filters['starasn'].should_block('https://x/logo.png', 'image')
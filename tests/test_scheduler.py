@@ -0,0 +1,89 @@
+from datetime import date, datetime, timedelta
+
+from scheduler import DayPlan, PlanStore, Scheduler
+
+DAY = date(2026, 3, 2)  # Senin
+ACCOUNTS = [{'id': 'a'}, {'id': 'b'}]
+
+
+def fixed_times(account):
+    return {'morning': {'hour': 7, 'minute': 15}, 'afternoon': {'hour': 16, 'minute': 30}}
+
+
+def test_generate_due_times():
+    plan = DayPlan.generate(DAY, ACCOUNTS, fixed_times)
+    assert len(plan.jobs) == 4
+    due = {(account_id, slot): datetime.fromtimestamp(ts) for ts, account_id, slot in plan.jobs}
+    assert due[('a', 'morning')] == datetime(2026, 3, 2, 7, 15)
+    assert due[('b', 'afternoon')] == datetime(2026, 3, 2, 16, 30)
+
+
+def test_non_working_day_has_no_jobs():
+    assert DayPlan.generate(DAY, ACCOUNTS, fixed_times, working_day=False).jobs == []
+
+
+def test_pending_skips_done():
+    plan = DayPlan.generate(DAY, ACCOUNTS, fixed_times)
+    plan.done.add(('a', 'morning'))
+    assert ('a', 'morning') not in {(job[1], job[2]) for job in plan.pending()}
+    assert len(plan.pending()) == 3
+
+
+def test_dict_round_trip():
+    plan = DayPlan.generate(DAY, ACCOUNTS, fixed_times)
+    loaded = DayPlan.from_dict(plan.to_dict())
+    assert loaded.day == DAY
+    assert sorted(loaded.jobs) == sorted(plan.jobs)
+
+
+def test_store_round_trip_with_done(tmp_path):
+    store = PlanStore(str(tmp_path / 'plan.json'))
+    store.save(DayPlan.generate(DAY, ACCOUNTS, fixed_times))
+    store.mark_done('a', 'morning')
+
+    loaded = store.load(DAY)
+    assert loaded.done == {('a', 'morning')}
+    assert len(loaded.pending()) == 3
+
+
+def test_store_ignores_other_day_and_save_truncates_done(tmp_path):
+    store = PlanStore(str(tmp_path / 'plan.json'))
+    store.save(DayPlan.generate(DAY, ACCOUNTS, fixed_times))
+    store.mark_done('a', 'morning')
+    assert store.load(date(2026, 3, 3)) is None
+
+    store.save(DayPlan.generate(date(2026, 3, 3), ACCOUNTS, fixed_times))
+    assert store.load(date(2026, 3, 3)).done == set()
+
+
+def test_batch_finishing_after_midnight_does_not_touch_new_plan(tmp_path):
+    store = PlanStore(str(tmp_path / 'plan.json'))
+    scheduler = Scheduler(ACCOUNTS, handler=lambda ids, slot: None, random_times=fixed_times,
+                          working_day=lambda day: True, plan_store=store)
+    try:
+        scheduler._start_day(DAY)
+        old_plan = scheduler.plan
+        # Batch dikirim sebelum tengah malam, selesai setelah hari berganti
+        scheduler._slots.acquire()
+        next_day = DAY + timedelta(days=1)
+        scheduler._start_day(next_day)
+        scheduler._run_batch(old_plan, ['a'], 'morning')
+
+        assert ('a', 'morning') in old_plan.done
+        assert scheduler.plan.done == set()
+        assert store.load(next_day).done == set()
+    finally:
+        scheduler.stop()
+
+
+def test_batch_marks_done_for_current_plan(tmp_path):
+    store = PlanStore(str(tmp_path / 'plan.json'))
+    scheduler = Scheduler(ACCOUNTS, handler=lambda ids, slot: None, random_times=fixed_times,
+                          working_day=lambda day: True, plan_store=store)
+    try:
+        scheduler._start_day(DAY)
+        scheduler._slots.acquire()
+        scheduler._run_batch(scheduler.plan, ['a', 'b'], 'morning')
+        assert store.load(DAY).done == {('a', 'morning'), ('b', 'morning')}
+    finally:
+        scheduler.stop()
@@ -0,0 +1,88 @@
+import os
+import time
+
+import pytest
+
+from session_store import SessionStore, cookies_to_session, get_session_store, session_to_state
+
+STATE = {'cookies': [{'name': 'ci_session', 'value': 'abc', 'domain': 'star-asn.kemenimipas.go.id',
+                      'path': '/'}], 'origins': []}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(str(tmp_path / 'sessions'), max_age_hours=12)
+
+
+def _age(store, site_key, account_id, hours):
+    path = store._path(site_key, account_id)
+    old = time.time() - hours * 3600
+    os.utime(path, (old, old))
+
+
+def test_save_and_load_per_account(store):
+    store.save('starasn', STATE, 'a')
+    assert store.load('starasn', 'a') == STATE
+    assert store.load('starasn', 'b') is None
+    assert store.load('pusaka', 'a') is None
+    # Tanpa akun: state mode satu akun
+    store.save('starasn', {'cookies': [], 'origins': []})
+    assert store.load('starasn') == {'cookies': [], 'origins': []}
+    assert not [name for name in os.listdir(store.directory) if name.endswith('.tmp')]
+
+
+def test_expired_state_is_not_used(store):
+    store.save('starasn', STATE, 'a')
+    _age(store, 'starasn', 'a', 11)
+    assert store.load('starasn', 'a') == STATE
+    _age(store, 'starasn', 'a', 13)
+    assert store.load('starasn', 'a') is None
+
+
+def test_max_age_zero_never_expires(tmp_path):
+    store = SessionStore(str(tmp_path), max_age_hours=0)
+    store.save('starasn', STATE, 'a')
+    _age(store, 'starasn', 'a', 24 * 30)
+    assert store.load('starasn', 'a') == STATE
+
+
+def test_discard(store):
+    store.save('starasn', STATE, 'a')
+    store.save('starasn', STATE, 'b')
+    store.discard('starasn', 'a')
+    assert store.load('starasn', 'a') is None
+    assert store.load('starasn', 'b') == STATE
+    store.discard('starasn', 'a')  # sudah tidak ada: tidak error
+
+
+def test_corrupt_state_is_ignored(store):
+    with open(store._path('starasn', 'a'), 'w') as f:
+        f.write('{rusak')
+    assert store.load('starasn', 'a') is None
+
+
+def test_stats_persist_across_instances(store):
+    store.record_miss('starasn')
+    store.record_login('starasn', 20.0)
+    assert store.record_hit('starasn', 1.0) == pytest.approx(19.0)
+
+    reloaded = SessionStore(store.directory)
+    assert reloaded.stats()['starasn'] == {
+        'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'avg_login_s': 20.0, 'avg_check_s': 1.0, 'saved_s': 19.0,
+    }
+
+
+def test_get_session_store_shared_per_directory(tmp_path):
+    directory = str(tmp_path / 'shared')
+    assert get_session_store(directory) is get_session_store(os.path.join(directory, '.'))
+
+
+def test_cookie_round_trip_through_requests():
+    requests = pytest.importorskip('requests')
+    session = requests.Session()
+    cookies_to_session(STATE['cookies'], session)
+    state = session_to_state(session)
+    cookie, = state['cookies']
+    assert (cookie['name'], cookie['value'], cookie['domain'], cookie['path']) == \
+        ('ci_session', 'abc', 'star-asn.kemenimipas.go.id', '/')
+    assert cookie['expires'] == -1
@@ -0,0 +1,152 @@
+import io
+import logging
+
+import pytest
+from PIL import Image
+
+from site_flow import (ATTEMPT_RETRY, ATTEMPT_STOP, ATTEMPT_SUCCESS, STEP_CHECK, STEP_DISCARD, STEP_LOGIN,
+                       STEP_REUSE, STEP_SAVE, captcha_accepted, captcha_text_valid, decode_captcha,
+                       judge_login_attempt, logged_in, presence_artifact, read_login_response, retry_reason,
+                       session_steps, should_prefetch_captcha, should_recheck_session, should_wait_redirect,
+                       submit_outcome)
+from starasn_http import (LOGIN_CAPTCHA_REJECTED, LOGIN_CREDENTIAL_ERROR, LOGIN_RATE_LIMITED, LOGIN_SERVER_ERROR,
+                          LOGIN_SUCCESS, LOGIN_UNKNOWN)
+
+DASHBOARD = 'https://star-asn.kemenimipas.go.id/dashboard'
+LOGIN_PAGE = 'https://star-asn.kemenimipas.go.id/authentication/login'
+
+
+def test_logged_in_uses_site_markers():
+    assert logged_in('pusaka', 'https://pusaka-v3.kemenag.go.id/profile')
+    assert not logged_in('pusaka', 'https://pusaka-v3.kemenag.go.id/LOGIN')
+    assert logged_in('pusaka', 'https://x/authentication/home')
+    assert not logged_in('starasn', 'https://x/authentication/home')
+
+
+def test_decode_captcha():
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4)).save(buffer, format='PNG')
+    assert decode_captcha(buffer.getvalue()).size == (4, 4)
+    assert decode_captcha(b'bukan gambar') is None
+
+
+@pytest.mark.parametrize('text, valid', [(None, False), ('', False), ('abc', False), ('abcd', True)])
+def test_captcha_text_valid(text, valid):
+    assert captcha_text_valid(text) is valid
+
+
+@pytest.mark.parametrize('status, payload, expected', [
+    (200, None, (None, '')),
+    (302, None, (None, '')),
+    (500, None, (LOGIN_SERVER_ERROR, '')),
+    (200, {'status': 'success'}, (LOGIN_SUCCESS, '')),
+    (200, {'status': 'error', 'message': 'Captcha salah'}, (LOGIN_CAPTCHA_REJECTED, 'Captcha salah')),
+])
+def test_read_login_response(status, payload, expected):
+    assert read_login_response(status, payload) == expected
+
+
+@pytest.mark.parametrize('outcome, prefetch, wait', [
+    (None, False, True),
+    (LOGIN_SUCCESS, False, True),
+    (LOGIN_CAPTCHA_REJECTED, True, False),
+    (LOGIN_UNKNOWN, True, False),
+    (LOGIN_CREDENTIAL_ERROR, False, False),
+])
+def test_after_submit(outcome, prefetch, wait):
+    assert should_prefetch_captcha(outcome) is prefetch
+    assert should_wait_redirect(outcome) is wait
+
+
+def test_submit_outcome_label():
+    assert submit_outcome(LOGIN_RATE_LIMITED, False) == LOGIN_RATE_LIMITED
+    assert submit_outcome(None, True) == 'timeout'
+    assert submit_outcome(None, False) == 'redirect'
+
+
+@pytest.mark.parametrize('url, outcome, verdict', [
+    (DASHBOARD, None, ATTEMPT_SUCCESS),
+    (DASHBOARD, LOGIN_CAPTCHA_REJECTED, ATTEMPT_SUCCESS),
+    (LOGIN_PAGE, LOGIN_CAPTCHA_REJECTED, ATTEMPT_RETRY),
+    (LOGIN_PAGE, LOGIN_UNKNOWN, ATTEMPT_RETRY),
+    (LOGIN_PAGE, None, ATTEMPT_RETRY),
+    (LOGIN_PAGE, LOGIN_SUCCESS, ATTEMPT_RETRY),
+    (LOGIN_PAGE, LOGIN_CREDENTIAL_ERROR, ATTEMPT_STOP),
+    (LOGIN_PAGE, LOGIN_RATE_LIMITED, ATTEMPT_STOP),
+    (LOGIN_PAGE, LOGIN_SERVER_ERROR, ATTEMPT_STOP),
+])
+def test_judge_login_attempt(url, outcome, verdict):
+    assert judge_login_attempt(url, outcome) == verdict
+
+
+def test_success_with_timed_out_redirect_rechecks_session():
+    assert should_recheck_session(LOGIN_PAGE, LOGIN_SUCCESS)
+    assert not should_recheck_session(DASHBOARD, LOGIN_SUCCESS)
+    assert not should_recheck_session(LOGIN_PAGE, LOGIN_CAPTCHA_REJECTED)
+
+    assert judge_login_attempt(LOGIN_PAGE, LOGIN_SUCCESS, session_valid=True) == ATTEMPT_SUCCESS
+    # Sesi valid hanya berarti jika server memang menjawab sukses
+    assert judge_login_attempt(LOGIN_PAGE, LOGIN_CAPTCHA_REJECTED, session_valid=True) == ATTEMPT_RETRY
+
+
+@pytest.mark.parametrize('verdict, outcome, accepted', [
+    (ATTEMPT_SUCCESS, None, True),
+    (ATTEMPT_RETRY, LOGIN_SUCCESS, True),
+    (ATTEMPT_RETRY, LOGIN_CAPTCHA_REJECTED, False),
+    (ATTEMPT_RETRY, None, False),
+])
+def test_captcha_accepted(verdict, outcome, accepted):
+    assert captcha_accepted(verdict, outcome) == accepted
+
+
+def test_retry_reason():
+    assert retry_reason(LOGIN_CAPTCHA_REJECTED) == 'CAPTCHA ditolak'
+    assert retry_reason(None) == 'masih di halaman login'
+    assert 'diterima' in retry_reason(LOGIN_SUCCESS)
+
+
+def pusaka(pulang=False, sudah=False):
+    return {'buttons': {'masuk': False, 'pulang': pulang}, 'cards': {}, 'markers': {'sudah': sudah}}
+
+
+@pytest.mark.parametrize('site_key, decision, snapshot, expected', [
+    ('pusaka', ('masuk', True, ''), pusaka(), 'presence_result'),
+    ('pusaka', (None, False, ''), pusaka(), 'presence_failed'),
+    ('pusaka', (None, True, ''), pusaka(sudah=True), None),
+    ('starasn', ('pulang', True, ''), None, 'presence_result_pulang'),
+    ('starasn', (None, True, ''), None, None),
+])
+def test_presence_artifact(site_key, decision, snapshot, expected):
+    assert presence_artifact(site_key, decision, snapshot) == expected
+
+
+def test_presence_artifact_logs_already_done(caplog):
+    with caplog.at_level(logging.INFO, logger='site_flow'):
+        presence_artifact('pusaka', (None, True, ''), pusaka(sudah=True))
+    assert 'Sudah melakukan presensi hari ini' in caplog.text
+
+
+def _run_steps(has_store, restored, valid=True, login_ok=True):
+    """Jalankan session_steps seperti engine, kembalikan (langkah, hasil)"""
+    replies = {STEP_CHECK: valid, STEP_LOGIN: login_ok}
+    steps = session_steps(has_store, restored)
+    taken, reply = [], None
+    while True:
+        try:
+            step = steps.send(reply)
+        except StopIteration as done:
+            return taken, done.value
+        taken.append(step)
+        reply = replies.get(step)
+
+
+@pytest.mark.parametrize('has_store, restored, valid, login_ok, expected', [
+    (False, False, True, True, ([STEP_LOGIN], True)),
+    (False, True, True, False, ([STEP_LOGIN], False)),
+    (True, False, True, True, ([STEP_LOGIN, STEP_SAVE], True)),
+    (True, True, True, True, ([STEP_CHECK, STEP_REUSE], True)),
+    (True, True, False, True, ([STEP_CHECK, STEP_DISCARD, STEP_LOGIN, STEP_SAVE], True)),
+    (True, True, False, False, ([STEP_CHECK, STEP_DISCARD, STEP_LOGIN], False)),
+])
+def test_session_steps(has_store, restored, valid, login_ok, expected):
+    assert _run_steps(has_store, restored, valid, login_ok) == expected
@@ -0,0 +1,166 @@
+import time
+
+import pytest
+
+import starasn_http
+from starasn_http import (LOGIN_CAPTCHA_REJECTED, LOGIN_CREDENTIAL_ERROR, LOGIN_RATE_LIMITED, LOGIN_RETRYABLE,
+                          LOGIN_SERVER_ERROR, LOGIN_SUCCESS, LOGIN_UNKNOWN, StarAsnHttpClient, StarAsnHttpError,
+                          StarAsnHttpTimeout, classify_login_response, parse_status_cards)
+
+
+@pytest.mark.parametrize('status, payload, expected', [
+    (200, {'status': 'success'}, LOGIN_SUCCESS),
+    (200, {'status': 'error', 'message': 'Captcha tidak sesuai'}, LOGIN_CAPTCHA_REJECTED),
+    (200, {'status': 'error', 'message': 'Kode Keamanan salah'}, LOGIN_CAPTCHA_REJECTED),
+    (200, {'status': 'error', 'message': 'Password salah'}, LOGIN_CREDENTIAL_ERROR),
+    (200, {'status': 'error', 'message': 'Terlalu banyak percobaan'}, LOGIN_RATE_LIMITED),
+    (429, {'status': 'success'}, LOGIN_RATE_LIMITED),
+    (500, {'status': 'success'}, LOGIN_SERVER_ERROR),
+    (200, None, LOGIN_SERVER_ERROR),
+    (200, {'status': 'error', 'message': 'Sesuatu terjadi'}, LOGIN_UNKNOWN),
+    (200, {'status': 'error'}, LOGIN_UNKNOWN),
+])
+def test_classify_login_response(status, payload, expected):
+    assert classify_login_response(status, payload) == expected
+
+
+def test_only_captcha_and_unknown_are_retryable():
+    assert set(LOGIN_RETRYABLE) == {LOGIN_CAPTCHA_REJECTED, LOGIN_UNKNOWN}
+
+
+STATUS_HTML = """
+<html><head><meta name="x" content="y"><script>var t = "PRESENSI PULANG Belum Presensi";</script></head>
+<body>
+  <div id="masuk" data-x="1" class="col card shadow">
+    <div class="card-header"><h5>PRESENSI MASUK</h5></div>
+    <div class="card-body"><span class="badge">{masuk}</span><br><a class="btn btn-primary" href="#">Presensi</a></div>
+  </div>
+  <div class="card"><div class="card-header">PRESENSI PULANG</div><p>{pulang}</div>
+</body></html>
+"""
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, payload=None, text=''):
+        self.status_code = status_code
+        self.payload = payload
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        if self.payload is None:
+            raise ValueError('bukan JSON')
+        return self.payload
+
+
+class FakeSession:
+    def __init__(self, status_html, presence_response):
+        self.status_html = status_html
+        self.presence_response = presence_response
+        self.posted = []
+        self.timeouts = []
+
+    def get(self, url, **kwargs):
+        self.timeouts.append(kwargs.get('timeout'))
+        return FakeResponse(text=self.status_html)
+
+    def post(self, url, data=None, **kwargs):
+        self.posted.append(data['type'])
+        return self.presence_response
+
+
+def _client(masuk='Belum Presensi', pulang='Belum Presensi', response=None):
+    html = STATUS_HTML.format(masuk=masuk, pulang=pulang)
+    return StarAsnHttpClient(captcha_solver=None, session=FakeSession(html, response))
+
+
+COORDS = {'latitude': 0, 'longitude': 0}
+
+
+def test_parse_status_cards_reads_card_text_only():
+    cards = parse_status_cards(STATUS_HTML.format(masuk='07:31 WITA', pulang='Belum Presensi'))
+    assert cards['masuk']['found'] and '07:31 WITA' in cards['masuk']['text']
+    assert 'Belum Presensi' in cards['pulang']['text']
+    # Teks script tidak dihitung sebagai isi card
+    assert 'var t' not in cards['masuk']['text'] + cards['pulang']['text']
+
+
+def test_parse_status_cards_skips_hidden_text():
+    html = ('<div class="card">PRESENSI MASUK <span hidden>Belum Presensi</span>'
+            '<span style="display: none">Belum Presensi</span><noscript>Belum Presensi</noscript>'
+            '07:31 WITA</div>')
+    cards = parse_status_cards(html)
+    assert cards['masuk']['found']
+    assert 'Belum Presensi' not in cards['masuk']['text']
+    assert '07:31 WITA' in cards['masuk']['text']
+
+
+def test_parse_status_cards_missing():
+    cards = parse_status_cards('<div class="card">Pengumuman</div><p>PRESENSI MASUK</p>')
+    assert cards == {'masuk': {'found': False, 'text': ''}, 'pulang': {'found': False, 'text': ''}}
+
+
+def test_do_presence_submits_masuk():
+    client = _client(response=FakeResponse(payload={'status': 'success'}))
+    assert client.do_presence(COORDS) == (True, "Presensi Masuk berhasil diklik")
+    assert client.session.posted == ['masuk']
+
+
+@pytest.mark.parametrize('response', [
+    FakeResponse(payload={'message': 'ok'}),                  # tanpa field status
+    FakeResponse(payload={'status': 'error'}),
+    FakeResponse(payload=None, text='<html>error</html>'),     # bukan JSON
+])
+def test_unconfirmed_presence_is_failure(response):
+    assert _client(response=response).do_presence(COORDS) == (False, "Presensi Masuk ditolak server")
+
+
+def test_pulang_waits_until_16(monkeypatch):
+    class Clock:
+        hour = 15
+
+        @classmethod
+        def now(cls):
+            return cls
+
+    monkeypatch.setattr(starasn_http, 'datetime', Clock)
+    client = _client(masuk='07:31 WITA', response=FakeResponse(payload={'status': 'success'}))
+    assert client.do_presence(COORDS) == (True, "Menunggu jam pulang")
+    Clock.hour = 16
+    assert client.do_presence(COORDS) == (True, "Presensi Pulang berhasil diklik")
+    assert client.session.posted == ['pulang']
+
+
+def test_already_present():
+    client = _client(masuk='07:31 WITA', pulang='16:02 WITA')
+    assert client.do_presence(COORDS) == (True, "Status OK / Sudah Presensi")
+    assert client.session.posted == []
+
+
+def test_status_page_without_cards_falls_back():
+    client = StarAsnHttpClient(None, session=FakeSession('<p>PRESENSI MASUK</p>', None))
+    with pytest.raises(StarAsnHttpError):
+        client.do_presence(COORDS)
+
+
+def test_deadline_caps_request_timeout():
+    client = _client()
+    client.deadline = time.monotonic() + 2
+    client.check_status()
+    assert 0 < client.session.timeouts[-1] <= 2
+
+    client.deadline = None
+    client.check_status()
+    assert client.session.timeouts[-1] == client.timeout
+
+
+def test_expired_deadline_stops_before_request():
+    client = _client()
+    client.deadline = time.monotonic() - 1
+    with pytest.raises(StarAsnHttpTimeout):
+        client.do_presence(COORDS)
+    assert client.session.timeouts == []
+    # Sesi dianggap tidak valid, login berikutnya juga langsung berhenti
+    assert not client.session_valid()
@@ -0,0 +1,49 @@
+from strategy_stats import StrategyStats
+
+ORDER = ['a', 'b', 'c']
+
+
+def test_without_data_keeps_historical_order():
+    stats = StrategyStats(default_order=ORDER, explore=0)
+    assert stats.order(['c', 'a', 'b']) == ORDER
+
+
+def test_winning_strategy_moves_first():
+    stats = StrategyStats(default_order=ORDER, explore=0)
+    for _ in range(5):
+        stats.record_result(['a', 'b', 'c'], 'c', accepted=True)
+    assert stats.order(ORDER)[0] == 'c'
+
+
+def test_cheaper_strategy_wins_tie():
+    stats = StrategyStats(default_order=['a', 'b'], explore=0)
+    stats.record_cost('a', 100.0)
+    stats.record_cost('b', 10.0)
+    assert stats.order(['a', 'b']) == ['b', 'a']
+
+
+def test_prunes_losers_but_never_everything():
+    stats = StrategyStats(default_order=ORDER, explore=0, min_trials=3)
+    for _ in range(3):
+        stats.record_result(['a', 'b'], 'a', accepted=True)
+    assert 'b' not in stats.order(ORDER)
+
+    hopeless = StrategyStats(default_order=['x'], explore=0, min_trials=3)
+    for _ in range(3):
+        hopeless.record_result(['x'], 'x', accepted=False)
+    assert hopeless.order(['x']) == ['x']
+
+
+def test_exploration_is_a_permutation():
+    stats = StrategyStats(default_order=ORDER, explore=1.0, seed=1)
+    assert sorted(stats.order(ORDER)) == ORDER
+
+
+def test_persisted_round_trip(tmp_path):
+    path = str(tmp_path / 'stats.json')
+    stats = StrategyStats(default_order=ORDER, path=path, explore=0)
+    stats.record_result(['a', 'c'], 'c', accepted=True)
+
+    loaded = StrategyStats(default_order=ORDER, path=path, explore=0)
+    assert loaded.snapshot()['c']['wins'] == 1
+    assert loaded.snapshot()['a']['trials'] == 1
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from site_config import SESSION_CHECKS
+from site_flow import ATTEMPT_RETRY, ATTEMPT_SUCCESS
+from starasn_http import LOGIN_CAPTCHA_REJECTED, LOGIN_SUCCESS
+from web_automation import WebAutomation
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_has_no_side_effects(tmp_path):
+    # Proses baru: impor tidak memasang listener log maupun membuat file log
+    code = ('import logging, log_setup, web_automation; '
+            'assert log_setup._listener is None; '
+            'assert not logging.getLogger().handlers')
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env, check=True)
+    assert not (tmp_path / 'web_automation.log').exists()
+
+
+class FakeSolver:
+    cache = None
+
+    def __init__(self):
+        self.reports = []
+
+    def report_answer(self, img, accepted):
+        self.reports.append(accepted)
+
+
+class FakeRequest:
+    def __init__(self, status, text):
+        self.status = status
+        self._text = text
+
+    def get(self, url, **kwargs):
+        return SimpleNamespace(status=self.status, text=lambda: self._text)
+
+
+class FakePage:
+    def __init__(self, status=200, text='PRESENSI MASUK'):
+        self.context = SimpleNamespace(request=FakeRequest(status, text))
+        self.visited = []
+
+    def goto(self, url, **kwargs):
+        self.visited.append(url)
+
+
+@pytest.fixture
+def automation(monkeypatch):
+    monkeypatch.setenv('SESSION_REUSE', '0')
+    return WebAutomation(headless=True, captcha_solver=FakeSolver())
+
+
+def test_accepted_login_without_redirect_keeps_captcha(automation):
+    artifact = automation._settle_login_attempt(ATTEMPT_RETRY, 'img', LOGIN_SUCCESS, '', 0)
+    assert automation.captcha_solver.reports == [True]
+    assert artifact == {'name': 'login_failed', 'attempt': 1}
+
+
+def test_rejected_captcha_is_reported(automation):
+    automation._settle_login_attempt(ATTEMPT_RETRY, 'img', LOGIN_CAPTCHA_REJECTED, '', 0)
+    automation._settle_login_attempt(ATTEMPT_SUCCESS, 'img', None, '', 1)
+    assert automation.captcha_solver.reports == [False, True]
+
+
+def test_recheck_opens_status_page_when_session_valid(automation):
+    page = FakePage()
+    assert automation._recheck_login_session(page)
+    assert page.visited == [SESSION_CHECKS['starasn']['url']]
+
+
+def test_recheck_without_session(automation):
+    page = FakePage(status=302, text='')
+    assert not automation._recheck_login_session(page)
+    assert page.visited == []
@@ -2,402 +2,720 @@
 Aplikasi Otomatisasi Web Absensi
 Untuk pusaka-v3.kemenag.go.id dan star-asn.kemenimipas.go.id
 Dengan dukungan CAPTCHA solver OCR
+
+Impor modul tanpa efek samping; .env dan logging dipasang oleh
+site_config.init() yang dipanggil main().
 """
 
 import os
 import json
 import time
 import random
-import smtplib
 import argparse
 import logging
+from contextlib import contextmanager
 from datetime import datetime
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-
-from captcha_solver import CaptchaSolver, manual_captcha_input
-
-# Load environment variables
-load_dotenv()
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('web_automation.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+
+from artifact_store import JPEG_QUALITY, get_artifact_store, new_run_id
+from browser_manager import BrowserManager
+from captcha_capture import CaptchaCapture
+from log_setup import bind_log_context
+from page_waits import (ACTION_TIMEOUT, CAPTCHA_LOADED_JS, FORM_TIMEOUT, LOGIN_RESPONSE_TIMEOUT,
+                        PUSAKA_PRESENCE_READY, REDIRECT_TIMEOUT, SHORT_TIMEOUT, STARASN_DASHBOARD_READY,
+                        WaitTimer, is_action_response, is_login_response)
+from metrics import get_metrics
+from notifier import email_config_from_env, get_notifier
+from presence_probe import ProbeStats, decide_pusaka, decide_starasn, probe, probe_selector
+from profiling import profile_phase, profile_run
+from route_filter import load_route_filters
+from session_store import get_session_store
+from site_config import HTTP_SITES, SESSION_CHECKS, SITE_URLS, create_captcha_solver, init
+from site_flow import (ATTEMPT_RETRY, ATTEMPT_STOP, ATTEMPT_SUCCESS, MAX_CAPTCHA_ATTEMPTS, STEP_CHECK,
+                       STEP_DISCARD, STEP_LOGIN, STEP_REUSE, STEP_SAVE, announce_presence, captcha_accepted,
+                       captcha_text_valid, decode_captcha, judge_login_attempt, logged_in, presence_artifact,
+                       read_login_response, retry_reason, session_steps, should_prefetch_captcha,
+                       should_recheck_session, should_wait_redirect, submit_outcome)
+from starasn_http import LOGIN_OUTCOME_TEXT, StarAsnHttpClient, StarAsnHttpTimeout, create_session
+
 logger = logging.getLogger(__name__)
 
+# Koordinat default mode satu akun (Updated sesuai alamat spesifik)
+COORD_PUSAKA = {'latitude': -7.3789, 'longitude': 112.7698}  # Jl Raya Juanda 26, Sidoarjo
+COORD_STARASN = {'latitude': -0.4937, 'longitude': 117.1505}  # Bapas Samarinda
+
+# Playwright (dan stack CAPTCHA: numpy, PIL) baru diimpor saat jalurnya
+# dipakai, lihat _load_playwright() dan site_config.create_captcha_solver()
+sync_playwright = None
+PlaywrightTimeoutError = None
+
+
+def _load_playwright():
+    """Impor Playwright sync sekali, saat browser pertama dibutuhkan"""
+    global sync_playwright, PlaywrightTimeoutError
+    if sync_playwright is None:
+        from playwright.sync_api import TimeoutError as timeout_error, sync_playwright as playwright_factory
+        PlaywrightTimeoutError = timeout_error
+        sync_playwright = playwright_factory
+
 
 class WebAutomation:
-    def __init__(self, headless=True):
-        """Initialize automation"""
+    def __init__(self, headless=True, browser_manager=None, account=None, captcha_solver=None):
+        """Initialize automation
+
+        Args:
+            headless: Jalankan browser tanpa GUI
+            browser_manager: BrowserManager opsional; jika ada, browser hangat
+                dipakai ulang antar run alih-alih diluncurkan setiap run
+            account: Akun dari file akun fleet (lihat fleet_runner.load_accounts);
+                None = satu akun dari environment (PUSAKA_*/STARASN_*)
+            captcha_solver: CaptchaSolver bersama; None = buat baru saat
+                CAPTCHA pertama perlu diselesaikan
+        """
         self.headless = headless
-        self.captcha_solver = CaptchaSolver()
+        self.browser_manager = browser_manager
+        self._captcha_solver = captcha_solver
+        self.account_id = account['id'] if account else None
         
-        # Load credentials from environment
-        self.credentials = {
-            'pusaka': {
-                'username': os.getenv('PUSAKA_USERNAME'),
-                'password': os.getenv('PUSAKA_PASSWORD'),
-                'url': 'https://pusaka-v3.kemenag.go.id',
-                'login_url': 'https://pusaka-v3.kemenag.go.id/login'
-            },
-            'starasn': {
-                'username': os.getenv('STARASN_USERNAME'),
-                'password': os.getenv('STARASN_PASSWORD'),
-                'url': 'https://star-asn.kemenimipas.go.id',
-                'login_url': 'https://star-asn.kemenimipas.go.id/authentication/login'
+        if account:
+            self.credentials = {
+                site_key: dict(SITE_URLS[site_key], username=site['username'], password=site['password'])
+                for site_key, site in account['sites'].items()
             }
-        }
+            self.coords = {
+                site_key: {'latitude': site['latitude'], 'longitude': site['longitude']}
+                for site_key, site in account['sites'].items()
+            }
+        else:
+            # Load credentials from environment
+            self.credentials = {
+                'pusaka': dict(SITE_URLS['pusaka'],
+                               username=os.getenv('PUSAKA_USERNAME'),
+                               password=os.getenv('PUSAKA_PASSWORD')),
+                'starasn': dict(SITE_URLS['starasn'],
+                                username=os.getenv('STARASN_USERNAME'),
+                                password=os.getenv('STARASN_PASSWORD'))
+            }
+            self.coords = {'pusaka': COORD_PUSAKA, 'starasn': COORD_STARASN}
         
-        # Email config
-        self.email_config = {
-            'from_email': os.getenv('EMAIL_FROM'),
-            'to_email': os.getenv('EMAIL_TO', 'hakimarx@gmail.com'),
-            'app_password': os.getenv('EMAIL_APP_PASSWORD')
+        # Mode per site: 'browser' (Playwright) atau 'http' (tanpa browser,
+        # fallback ke Playwright jika alur HTTP gagal)
+        self.site_modes = {
+            'pusaka': os.getenv('PUSAKA_MODE', 'browser').lower(),
+            'starasn': os.getenv('STARASN_MODE', 'browser').lower(),
         }
+        for site_key, mode in self.site_modes.items():
+            if mode == 'http' and site_key not in HTTP_SITES:
+                logger.warning(f"Mode HTTP belum didukung untuk {site_key}, memakai browser")
+                self.site_modes[site_key] = 'browser'
+        self._http_session = None
+        self.login_errors = {}  # site_key -> alasan login gagal (klasifikasi respons)
+        self.login_attempts = {}  # site_key -> jumlah attempt login terakhir (metrics)
+        self.metrics = get_metrics()
+        # Screenshot/HTML gagal ditulis di background per run/akun/attempt
+        self.artifacts = get_artifact_store()
+        self.run_id = new_run_id()
+        self.wait_timer = WaitTimer()
+        self.probe_stats = ProbeStats()
+        # Filter request per site (gambar, font, analytics diblokir; CAPTCHA diizinkan)
+        self.route_filters = load_route_filters()
+        
+        # Storage state per akun per site untuk melewati login (dan CAPTCHA)
+        self.session_store = None
+        if os.getenv('SESSION_REUSE', '1') == '1':
+            self.session_store = get_session_store(
+                os.getenv('SESSION_DIR', 'sessions'),
+                max_age_hours=float(os.getenv('SESSION_MAX_AGE_HOURS', '12'))
+            )
+        
+        # Email config: notifikasi dikirim di background lewat antrean bersama
+        self.email_config = email_config_from_env((account or {}).get('email_to'))
+        self.notifier = get_notifier(self.email_config)
     
+    @property
+    def captcha_solver(self):
+        if self._captcha_solver is None:
+            self._captcha_solver = create_captcha_solver()
+        return self._captcha_solver
+
     def is_working_day(self):
         """Cek apakah hari ini adalah hari kerja (Senin-Jumat)"""
         return datetime.now().weekday() < 5
     
     def send_email_notification(self, success=True, message=""):
-        """Kirim notifikasi via Gmail"""
-        if not self.email_config.get('from_email') or not self.email_config.get('app_password'):
+        """Antrekan notifikasi email (dikirim oleh worker notifier)"""
+        if self.notifier is None:
             logger.warning("Email tidak dikonfigurasi, skip notifikasi")
             return
-        
+        self.notifier.submit(self.email_config['to_email'], success, message, label=self.account_id)
+    
+    def _labels(self, site_key):
+        """Label metrics untuk site ini di akun ini"""
+        return {'site': site_key, 'account': self.account_id or 'default'}
+    
+    def _save_artifacts(self, page, site_key, name, attempt=None, html=True):
+        """Ambil screenshot (+HTML) page; kompresi dan penulisan di background"""
+        if self.artifacts is None:
+            return
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.email_config['from_email']
-            msg['To'] = self.email_config['to_email']
-            
-            if success:
-                msg['Subject'] = '✅ Absensi Otomatis Berhasil'
-                body = f"""
-Absensi otomatis telah berhasil diselesaikan!
-
-Waktu: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-{message}
-
----
-Web Automation System
-                """
-            else:
-                msg['Subject'] = '❌ Absensi Otomatis Gagal'
-                body = f"""
-Absensi otomatis mengalami error!
-
-Waktu: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-Error: {message}
-
----
-Web Automation System
-                """
-            
-            msg.attach(MIMEText(body, 'plain', 'utf-8'))
-            
-            server = smtplib.SMTP('smtp.gmail.com', 587)
-            server.starttls()
-            server.login(self.email_config['from_email'], self.email_config['app_password'])
-            server.send_message(msg)
-            server.quit()
-            
-            logger.info("Email notifikasi berhasil dikirim")
-            
+            screenshot = page.screenshot(type='jpeg', quality=JPEG_QUALITY)
+            content = page.content() if html else None
         except Exception as e:
-            logger.error(f"Gagal mengirim email: {str(e)}")
+            logger.warning(f"Gagal mengambil artefak {site_key}_{name}: {e}")
+            return
+        self.artifacts.save(self.run_id, self.account_id or 'default', f'{site_key}_{name}',
+                            screenshot, content, attempt)
     
     def login_pusaka(self, page):
         """Login ke pusaka-v3.kemenag.go.id"""
         creds = self.credentials['pusaka']
+        labels = self._labels('pusaka')
         
         logger.info(f"Membuka Pusaka: {creds['login_url']}")
-        page.goto(creds['login_url'], timeout=30000, wait_until='domcontentloaded')
-        page.wait_for_timeout(2000)
+        with self.metrics.span('goto', **labels):
+            page.goto(creds['login_url'], timeout=30000, wait_until='domcontentloaded')
+            with self.wait_timer.phase('pusaka.form_ready', 2000):
+                page.wait_for_selector("input[placeholder='Username']", state='visible', timeout=FORM_TIMEOUT)
         
         # Fill login form
         logger.info("Mengisi form login Pusaka...")
-        page.fill("input[placeholder='Username']", creds['username'])
-        page.fill("input[placeholder='Password']", creds['password'])
+        with self.metrics.span('form_fill', **labels):
+            page.fill("input[placeholder='Username']", creds['username'])
+            page.fill("input[placeholder='Password']", creds['password'])
         
         # Click login button
-        page.click("button.btn.bg-indigo-400")
-        page.wait_for_timeout(3000)
+        with self.metrics.span('login_submit', **labels) as span:
+            page.click("button.btn.bg-indigo-400")
+            with self.wait_timer.phase('pusaka.login_redirect', 3000):
+                try:
+                    page.wait_for_url(lambda url: logged_in('pusaka', url), timeout=LOGIN_RESPONSE_TIMEOUT)
+                except PlaywrightTimeoutError:
+                    span.set(outcome='timeout')
         
         # Check if login successful (check for dashboard or error)
-        current_url = page.url
-        if 'login' not in current_url.lower():
+        if logged_in('pusaka', page.url):
             logger.info("✅ Login Pusaka berhasil!")
             print("[OK] Login Pusaka berhasil!")
             return True
         else:
             logger.error("❌ Login Pusaka gagal - masih di halaman login")
             print("[FAIL] Login Pusaka gagal - masih di halaman login")
-            page.screenshot(path="login_pusaka_failed.png")
-            with open("login_pusaka_failed.html", "w", encoding="utf-8") as f:
-                f.write(page.content())
+            self._save_artifacts(page, 'pusaka', 'login_failed')
             return False
     
+    def _open_starasn_login(self, page, creds):
+        """Buka halaman login Star-ASN, tutup modal, isi username/password"""
+        with self.metrics.span('goto', **self._labels('starasn')):
+            page.goto(creds['login_url'], timeout=30000, wait_until='domcontentloaded')
+            with self.wait_timer.phase('starasn.form_ready', 2000):
+                page.wait_for_selector("input#username", state='visible', timeout=FORM_TIMEOUT)
+                try:
+                    page.wait_for_function(CAPTCHA_LOADED_JS, timeout=SHORT_TIMEOUT)
+                except PlaywrightTimeoutError:
+                    pass
+        
+        # Close any modal that appears
+        try:
+            close_btn = page.locator("button.btn-close, .modal-header button[aria-label='Close']")
+            if close_btn.count() > 0:
+                close_btn.first.click()
+                with self.wait_timer.phase('starasn.modal_close', 500):
+                    close_btn.first.wait_for(state='hidden', timeout=SHORT_TIMEOUT)
+        except:
+            pass
+    
+    def _log_captcha_cache(self):
+        # CaptchaSolver(cache=None) juga konfigurasi yang valid
+        if self.captcha_solver.cache is not None:
+            logger.info(f"CAPTCHA cache: {self.captcha_solver.cache.stats()}")
+
     def login_starasn(self, page):
-        """Login ke star-asn.kemenimipas.go.id dengan CAPTCHA solving"""
+        """Login ke star-asn.kemenimipas.go.id dengan CAPTCHA solving
+
+        Halaman login hanya dimuat sekali; CAPTCHA diambil dari respons
+        jaringan (lihat CaptchaCapture) dan retry hanya me-request ulang
+        endpoint CAPTCHA. Keputusan per attempt ada di site_flow.
+        """
         creds = self.credentials['starasn']
-        max_captcha_attempts = 7
+        capture = CaptchaCapture()
+        capture.attach(page)
+        reload = True
+        labels = self._labels('starasn')
         
-        for attempt in range(max_captcha_attempts):
-            logger.info(f"Membuka Star-ASN: {creds['login_url']} (Attempt {attempt + 1})")
-            page.goto(creds['login_url'], timeout=30000, wait_until='domcontentloaded')
-            page.wait_for_timeout(2000)
-            
-            # Close any modal that appears
-            try:
-                close_btn = page.locator("button.btn-close, .modal-header button[aria-label='Close']")
-                if close_btn.count() > 0:
-                    close_btn.first.click()
-                    page.wait_for_timeout(500)
-            except:
-                pass
-            
-            # Fill login form
-            logger.info("Mengisi form login Star-ASN...")
-            page.fill("input#username", creds['username'])
-            page.fill("input#password-input", creds['password'])
-            
-            # Get CAPTCHA image and solve
-            captcha_img = page.locator("img#kv-image")
-            if captcha_img.count() > 0:
+        try:
+            for attempt in range(MAX_CAPTCHA_ATTEMPTS):
+                self.login_attempts['starasn'] = attempt + 1
+                if reload:
+                    logger.info(f"Membuka Star-ASN: {creds['login_url']} (Attempt {attempt + 1})")
+                    self._open_starasn_login(page, creds)
+                    reload = False
+                    captcha_bytes = capture.take(page)
+                else:
+                    logger.info(f"Meminta CAPTCHA baru Star-ASN (Attempt {attempt + 1})")
+                    with self.wait_timer.phase('starasn.captcha_refresh', 2000):
+                        captcha_bytes = capture.next(page)
+                
+                img = decode_captcha(captcha_bytes)
+                if img is None:
+                    reload = True
+                    continue
+                
                 logger.info("Mendeteksi CAPTCHA, mencoba solve dengan OCR...")
+                captcha_text = self.captcha_solver.solve_image(img)
+                if not captcha_text_valid(captcha_text):
+                    logger.warning("OCR gagal mendapatkan teks yang valid, minta captcha baru...")
+                    capture.prefetch(page)
+                    continue
                 
-                # Get CAPTCHA image via screenshot (more reliable than downloading URL)
-                try:
-                    from io import BytesIO
-                    from PIL import Image
-                    
-                    screenshot_bytes = captcha_img.screenshot()
-                    img = Image.open(BytesIO(screenshot_bytes))
-                    
-                    # Try OCR
-                    captcha_text = self.captcha_solver.solve_image(img)
-                    
-                    if captcha_text and len(captcha_text) >= 4:
-                        logger.info(f"CAPTCHA OCR result: {captcha_text}")
-                        page.fill("input#kv-captcha", captcha_text)
-                    else:
-                        # Fallback: Refresh CAPTCHA and try again
-                        logger.warning("OCR gagal mendapatkan teks yang valid, refresh captcha...")
-                        refresh_btn = page.locator("button.btn-sm.btn-primary")
-                        if refresh_btn.count() > 0:
-                            refresh_btn.click()
-                            page.wait_for_timeout(1000)
-                            continue
-                except Exception as e:
-                    logger.error(f"Error saat processing captcha: {e}")
-                    # Fallback to URL method
-                    captcha_url = captcha_img.get_attribute("src")
-                    if not captcha_url.startswith("http"):
-                        captcha_url = f"https://star-asn.kemenimipas.go.id{captcha_url}"
-                    cookies = page.context.cookies()
-                    cookie_dict = {c['name']: c['value'] for c in cookies}
-                    captcha_text = self.captcha_solver.solve_from_url(captcha_url, cookies=cookie_dict)
-                    if captcha_text:
-                        page.fill("input#kv-captcha", captcha_text)
-            
-            # Click login button
-            page.click("button.btn-primary.d-grid.w-100")
-            page.wait_for_timeout(3000)
-            
-            # Check if login successful
-            current_url = page.url
-            if 'login' not in current_url.lower() and 'authentication' not in current_url.lower():
-                logger.info("✅ Login Star-ASN berhasil!")
-                print("[OK] Login Star-ASN berhasil!")
-                return True
-            else:
-                logger.warning(f"❌ Login Star-ASN gagal (attempt {attempt + 1}), mencoba lagi...")
-                print(f"[FAIL] Login Star-ASN gagal (attempt {attempt + 1}), mencoba lagi...")
-                page.screenshot(path=f"login_starasn_failed_attempt_{attempt+1}.png")
-                with open(f"login_starasn_failed_attempt_{attempt+1}.html", "w", encoding="utf-8") as f:
-                    f.write(page.content())
+                # Fill login form (diisi ulang setiap attempt jika form di-reset halaman)
+                logger.info(f"CAPTCHA OCR result: {captcha_text}")
+                with self.metrics.span('form_fill', **labels):
+                    page.fill("input#username", creds['username'])
+                    page.fill("input#password-input", creds['password'])
+                    page.fill("input#kv-captcha", captcha_text)
+                
+                # Click login button, klasifikasi respons JSON XHR login
+                outcome, message = None, ''
+                with self.wait_timer.phase('starasn.login_response', 3000), \
+                        self.metrics.span('login_submit', **labels) as submit_span:
+                    try:
+                        with page.expect_response(is_login_response, timeout=LOGIN_RESPONSE_TIMEOUT) as response_info:
+                            page.click("button.btn-primary.d-grid.w-100")
+                        response = response_info.value
+                        try:
+                            payload = response.json()
+                        except Exception:
+                            payload = None
+                        outcome, message = read_login_response(response.status, payload)
+                        if should_prefetch_captcha(outcome):
+                            # CAPTCHA berikutnya diunduh sambil hasil attempt ini dicatat
+                            capture.prefetch(page)
+                        elif should_wait_redirect(outcome):
+                            page.wait_for_url(lambda url: logged_in('starasn', url), timeout=REDIRECT_TIMEOUT)
+                    except PlaywrightTimeoutError:
+                        reload = True
+                    submit_span.set(outcome=submit_outcome(outcome, reload))
+                
+                session_valid = False
+                if should_recheck_session(page.url, outcome):
+                    session_valid = self._recheck_login_session(page)
+                verdict = judge_login_attempt(page.url, outcome, session_valid)
+                artifact = self._settle_login_attempt(verdict, img, outcome, message, attempt)
+                if artifact is not None:
+                    self._save_artifacts(page, 'starasn', **artifact)
+                if verdict != ATTEMPT_RETRY:
+                    return verdict == ATTEMPT_SUCCESS
+        finally:
+            capture.detach(page)
+            self._log_capture(capture)
         
+        self._login_starasn_exhausted()
+        return False
+
+    def _recheck_login_session(self, page):
+        """Login dijawab sukses tapi redirect timeout: cek sesi, buka halaman statistik jika valid"""
+        logger.warning("Login Star-ASN diterima server tapi redirect tidak selesai, mengecek sesi...")
+        if not self._session_valid(page.context, 'starasn'):
+            return False
+        page.goto(SESSION_CHECKS['starasn']['url'], timeout=30000, wait_until='domcontentloaded')
+        return True
+
+    def _settle_login_attempt(self, verdict, img, outcome, message, attempt):
+        """Catat hasil satu attempt login Star-ASN (dipakai engine sync dan async)
+
+        Returns:
+            dict | None: argumen _save_artifacts (name, attempt/html), None jika tidak perlu
+        """
+        if verdict == ATTEMPT_SUCCESS:
+            self.captcha_solver.report_answer(img, accepted=True)
+            self.login_errors.pop('starasn', None)
+            self._log_captcha_cache()
+            logger.info("✅ Login Star-ASN berhasil!")
+            print("[OK] Login Star-ASN berhasil!")
+            return None
+        if verdict == ATTEMPT_STOP:
+            self.login_errors['starasn'] = LOGIN_OUTCOME_TEXT[outcome]
+            logger.error(f"❌ Login Star-ASN dihentikan: {LOGIN_OUTCOME_TEXT[outcome]} - {message}")
+            print(f"[FAIL] Login Star-ASN dihentikan: {LOGIN_OUTCOME_TEXT[outcome]}")
+            return {'name': 'login_failed', 'html': False}
+        self.captcha_solver.report_answer(img, accepted=captcha_accepted(verdict, outcome))
+        logger.warning(f"❌ Login Star-ASN gagal (attempt {attempt + 1}): {retry_reason(outcome)} {message}, mencoba lagi...")
+        print(f"[FAIL] Login Star-ASN gagal (attempt {attempt + 1}), mencoba lagi...")
+        return {'name': 'login_failed', 'attempt': attempt + 1}
+
+    @staticmethod
+    def _log_capture(capture):
+        logger.info(f"CAPTCHA diambil: {capture.from_network} dari respons jaringan, "
+                    f"{capture.fetched} request langsung")
+
+    def _login_starasn_exhausted(self):
+        self._log_captcha_cache()
         logger.error("❌ Login Star-ASN gagal setelah semua percobaan")
         print("[FAIL] Login Star-ASN gagal setelah semua percobaan")
-        return False
     
+    def run_starasn_http(self, deadline=None):
+        """Login + presensi Star-ASN lewat HTTP tanpa browser
+
+        Args:
+            deadline: Batas waktu alur (time.monotonic()), dipakai engine async
+                yang menjalankan method ini di thread: asyncio.wait_for tidak
+                bisa menghentikan thread, jadi client berhenti sendiri
+
+        Returns:
+            tuple: (success, message), atau None jika alur HTTP gagal dan
+            harus fallback ke Playwright
+        """
+        creds = self.credentials['starasn']
+        if self._http_session is None:
+            self._http_session = create_session()
+
+        start = time.perf_counter()
+        client = StarAsnHttpClient(self.captcha_solver, session=self._http_session, deadline=deadline)
+        state = self.session_store.load('starasn', self.account_id) if self.session_store else None
+        if state:
+            client.restore_state(state)
+        try:
+            logged_in = self._reuse_or_login(
+                'starasn',
+                restored=state is not None,
+                check=client.session_valid,
+                login=lambda: self._http_login(client, creds),
+                export_state=client.export_state,
+            )
+            if not logged_in:
+                if client.last_outcome:
+                    self.login_errors['starasn'] = LOGIN_OUTCOME_TEXT.get(client.last_outcome)
+                return False, self._login_failed_message('starasn')
+            result = client.do_presence(self.coords['starasn'])
+            logger.info(f"Star-ASN (HTTP) selesai dalam {time.perf_counter() - start:.1f}s")
+            return result
+        except StarAsnHttpTimeout as e:
+            # Waktu site sudah habis: fallback ke Playwright tidak ada gunanya
+            logger.error(f"Alur HTTP Star-ASN dihentikan: {e}")
+            return False, str(e)
+        except Exception as e:
+            logger.warning(f"Alur HTTP Star-ASN gagal ({e}), fallback ke Playwright")
+            return None
+
+    def _http_login(self, client, creds):
+        try:
+            return client.login(creds['username'], creds['password'])
+        finally:
+            self.login_attempts['starasn'] = client.attempts
+
+    def _reuse_or_login(self, site_key, restored, check, login, export_state, on_discard=None):
+        """Pakai sesi tersimpan jika masih valid, jika tidak login penuh
+
+        Urutan langkah diputuskan site_flow.session_steps (sama dengan
+        AsyncWebAutomation._login_site_async), di sini hanya dijalankan.
+
+        Args:
+            restored: True jika storage state tersimpan sudah dipulihkan
+            check: Callable cek sesi murah -> bool
+            login: Callable login penuh -> bool
+            export_state: Callable storage state setelah login berhasil
+            on_discard: Callable opsional untuk membuang cookie sesi lama
+        """
+        steps = session_steps(self.session_store is not None, restored)
+        start = time.perf_counter()
+        result = None
+        while True:
+            try:
+                step = steps.send(result)
+            except StopIteration as done:
+                return done.value
+            result = None
+            if step == STEP_CHECK:
+                result = check()
+            elif step == STEP_REUSE:
+                self._session_reused(site_key, start)
+            elif step == STEP_DISCARD:
+                self._session_discarded(site_key)
+                if on_discard is not None:
+                    on_discard()
+            elif step == STEP_LOGIN:
+                start = self._session_login_started(site_key)
+                result = self._timed_login(site_key, login)
+            elif step == STEP_SAVE:
+                self._session_saved(site_key, start, export_state())
+
+    # Pencatatan sesi tersimpan, dipakai juga oleh AsyncWebAutomation
+    def _session_reused(self, site_key, start):
+        self.metrics.record('login', time.perf_counter() - start, 'reused', **self._labels(site_key))
+        saved = self.session_store.record_hit(site_key, time.perf_counter() - start)
+        logger.info(f"♻️ Sesi {site_key} tersimpan masih valid, login dilewati (hemat ~{saved:.1f}s)")
+
+    def _session_discarded(self, site_key):
+        logger.info(f"Sesi {site_key} tersimpan tidak valid, login penuh...")
+        self.session_store.discard(site_key, self.account_id)
+
+    def _session_login_started(self, site_key):
+        """Catat miss sesi tersimpan, kembalikan waktu mulai login penuh"""
+        if self.session_store is not None:
+            self.session_store.record_miss(site_key)
+        return time.perf_counter()
+
+    def _session_saved(self, site_key, start, state):
+        self.session_store.record_login(site_key, time.perf_counter() - start)
+        self.session_store.save(site_key, state, self.account_id)
+
+    def _timed_login(self, site_key, login):
+        """Login penuh sebagai span 'login' (outcome + jumlah attempt)"""
+        self.login_attempts.pop(site_key, None)
+        with self.metrics.span('login', **self._labels(site_key)) as span, \
+                profile_phase(f'page.{site_key}.login'):
+            ok = login()
+            span.set(outcome='ok' if ok else 'failed', attempts=self.login_attempts.pop(site_key, 1))
+        return ok
+
+    @staticmethod
+    def _click_and_wait_action(page, locator):
+        """Klik lalu tunggu respons submit dari server (ceiling ACTION_TIMEOUT)"""
+        try:
+            with page.expect_response(is_action_response, timeout=ACTION_TIMEOUT):
+                locator.click()
+        except PlaywrightTimeoutError:
+            logger.warning(f"Tidak ada respons server dalam {ACTION_TIMEOUT} ms setelah klik")
+
+    def _presence_action(self, page, site_key, snapshot_decision, phase_ms):
+        """Jalankan keputusan presensi: klik tombol yang ditandai probe (jika ada)"""
+        key, success, message = snapshot_decision
+        if key is not None:
+            with self.wait_timer.phase(f'{site_key}.presence_submit', phase_ms), \
+                    self.metrics.span('presence_click', **self._labels(site_key)):
+                self._click_and_wait_action(page, page.locator(probe_selector(site_key, key)))
+        return key, success, message
+
+    def _timed_presence(self, site_key, presence, page):
+        """do_presence_* sebagai span 'presence'"""
+        with self.metrics.span('presence', **self._labels(site_key)) as span, \
+                profile_phase(f'page.{site_key}.presence'):
+            success, message = presence(page)
+            span.set(outcome='ok' if success else 'failed')
+        return success, message
+
     def do_presence_pusaka(self, page):
         """Melakukan presensi di Pusaka"""
         try:
             logger.info("Membuka halaman presensi...")
-            page.goto("https://pusaka-v3.kemenag.go.id/profile/presence", timeout=30000)
-            page.wait_for_timeout(3000)
-            
-            # Cek jam
-            current_hour = datetime.now().hour
-            
-            # 1. Cek tombol Presensi MASUK
-            btn_masuk = page.locator("button:has-text('Presensi Masuk'), button:has-text('Absen Masuk')")
-            if btn_masuk.count() > 0:
-                logger.info("Tombol Presensi Masuk ditemukan. Melakukan klik...")
-                btn_masuk.first.click()
-                page.wait_for_timeout(3000)
-                page.screenshot(path="presensi_pusaka_result.png")
-                logger.info("✅ Klik Presensi Masuk berhasil dilakukan")
-                return True, "Presensi Masuk berhasil diklik"
-
-            # 2. Cek tombol Presensi PULANG
-            btn_pulang = page.locator("button:has-text('Presensi Pulang'), button:has-text('Absen Pulang'), button:has-text('Simpan')")
-            if btn_pulang.count() > 0:
-                if current_hour >= 16:
-                    logger.info("Tombol Presensi Pulang ditemukan dan sudah waktunya. Melakukan klik...")
-                    btn_pulang.first.click()
-                    page.wait_for_timeout(3000)
-                    page.screenshot(path="presensi_pusaka_result.png")
-                    logger.info("✅ Klik Presensi Pulang berhasil dilakukan")
-                    return True, "Presensi Pulang berhasil diklik"
-                else:
-                    return True, "Menunggu jam pulang (Tombol Pulang sudah ada)"
+            with self.metrics.span('goto', **self._labels('pusaka')):
+                page.goto("https://pusaka-v3.kemenag.go.id/profile/presence", timeout=30000)
+            with self.wait_timer.phase('pusaka.presence_ready', 3000):
+                try:
+                    page.wait_for_selector(PUSAKA_PRESENCE_READY, timeout=FORM_TIMEOUT)
+                except PlaywrightTimeoutError:
+                    pass  # Lanjut ke pengecekan, berakhir di "Tombol Presensi tidak ditemukan"
             
-            # 3. Cek Status Sudah Absen
-            if page.locator("text=Sudah Presensi").count() > 0 or page.locator("text=Anda sudah melakukan presensi").count() > 0:
-                logger.info("Info: Sudah melakukan presensi hari ini")
-                return True, "Sudah melakukan presensi sebelumnya"
-                
-            logger.warning("❌ Tidak ditemukan tombol presensi apapun")
-            page.screenshot(path="presensi_pusaka_failed.png")
-            return False, "Tombol Presensi tidak ditemukan"
+            # Status halaman (tombol + marker) dalam satu round trip
+            snapshot = probe(page, 'pusaka', self.probe_stats)
+            decision = decide_pusaka(snapshot, datetime.now().hour)
+            announce_presence('pusaka', decision)
+            _, success, message = self._presence_action(page, 'pusaka', decision, 3000)
+            artifact = presence_artifact('pusaka', decision, snapshot)
+            if artifact is not None:
+                self._save_artifacts(page, 'pusaka', artifact, html=False)
+            return success, message
                 
         except Exception as e:
             logger.error(f"Error saat presensi: {str(e)}")
             return False, str(e)
+    
     def do_presence_starasn(self, page):
         """Melakukan presensi di Star-ASN dashboard"""
         try:
             logger.info("Mengecek status presensi Star-ASN...")
-            page.wait_for_timeout(3000)
-            
-            # Cek jam saat ini
-            current_hour = datetime.now().hour
-            
-            # Prioritas: UI Based
-            # 1. Cek Card MASUK dulu
-            masuk_card = page.locator("div.card:has-text('PRESENSI MASUK')")
-            if masuk_card.count() > 0:
-                # Cek apakah ada tombol/link di dalamnya yang aktif
-                action_btn = masuk_card.locator("a.btn, button.btn").first
-                status_text = masuk_card.text_content()
-                
-                # Jika ada tombol dan status "Belum Presensi" -> KLIK (Kapanpun!)
-                if action_btn.count() > 0 and "Belum Presensi" in status_text:
-                    logger.info("Ditemukan tombol PRESENSI MASUK. Melakukan klik...")
-                    action_btn.click()
-                    page.wait_for_timeout(5000)
-                    page.screenshot(path="starasn_result_masuk.png")
-                    return True, "Presensi Masuk berhasil diklik"
-
-            # 2. Cek Card PULANG
-            pulang_card = page.locator("div.card:has-text('PRESENSI PULANG')")
-            if pulang_card.count() > 0:
-                action_btn = pulang_card.locator("a.btn, button.btn").first
-                status_text = pulang_card.text_content()
-                
-                # Klik pulang HANYA jika jam > 16 (atau jam 23 sesuai request khusus, tapi default aman > 16)
-                if action_btn.count() > 0 and "Belum Presensi" in status_text:
-                    if current_hour >= 16:
-                        logger.info("Ditemukan tombol PRESENSI PULANG dan sudah waktunya. Melakukan klik...")
-                        action_btn.click()
-                        page.wait_for_timeout(5000)
-                        page.screenshot(path="starasn_result_pulang.png")
-                        return True, "Presensi Pulang berhasil diklik"
-                    else:
-                        logger.info("Tombol Pulang ada, tapi belum waktunya (Wait until > 16:00)")
-                        return True, "Menunggu jam pulang"
+            with self.wait_timer.phase('starasn.dashboard_ready', 3000):
+                try:
+                    page.wait_for_selector(STARASN_DASHBOARD_READY, timeout=FORM_TIMEOUT)
+                except PlaywrightTimeoutError:
+                    pass
             
-            logger.info("Tidak ada aksi presensi yang diperlukan saat ini.")
-            return True, "Status OK / Sudah Presensi"
+            # Status card MASUK/PULANG dalam satu round trip.
+            # Klik MASUK kapanpun; PULANG HANYA jika jam >= 16
+            snapshot = probe(page, 'starasn', self.probe_stats)
+            decision = decide_starasn(snapshot, datetime.now().hour)
+            announce_presence('starasn', decision)
+            _, success, message = self._presence_action(page, 'starasn', decision, 5000)
+            artifact = presence_artifact('starasn', decision, snapshot)
+            if artifact is not None:
+                self._save_artifacts(page, 'starasn', artifact, html=False)
+            return success, message
 
         except Exception as e:
             logger.error(f"Error presensi Star-ASN: {e}")
             return False, str(e)
 
-    def run_automation(self, site='all'):
-        """Jalankan otomatisasi dengan dynamic geolocation"""
-        results = []
-        
-        # Koordinat (Updated sesuai alamat spesifik)
-        COORD_PUSAKA = {'latitude': -7.3789, 'longitude': 112.7698}  # Jl Raya Juanda 26, Sidoarjo
-        COORD_STARASN = {'latitude': -0.4937, 'longitude': 117.1505}  # Bapas Samarinda
-        
+    def _login_failed_message(self, site_key):
+        reason = self.login_errors.get(site_key)
+        return f"Login Gagal ({reason})" if reason else "Login Gagal"
+
+    @staticmethod
+    def _context_options(coords):
+        """Opsi browser context per site (viewport, UA, geolocation)"""
+        return {
+            'viewport': {'width': 1280, 'height': 720},
+            'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'geolocation': coords,
+            'permissions': ['geolocation'],
+        }
+
+    def _new_context(self, browser, site_key):
+        """Context site dengan storage state tersimpan (jika ada)
+
+        Returns:
+            tuple: (context, restored)
+        """
+        state = self.session_store.load(site_key, self.account_id) if self.session_store else None
+        context = browser.new_context(**self._context_options(self.coords[site_key]), storage_state=state)
+        if site_key in self.route_filters:
+            self.route_filters[site_key].attach(context)
+        return context, state is not None
+
+    def _session_valid(self, context, site_key):
+        """Cek sesi lewat request context (cookie sama dengan page), tanpa render"""
+        check = SESSION_CHECKS[site_key]
         try:
-            with sync_playwright() as p:
+            response = context.request.get(check['url'], max_redirects=0, timeout=10000)
+            return response.status == 200 and (check['marker'] is None or check['marker'] in response.text())
+        except Exception as e:
+            logger.warning(f"Cek sesi {site_key} gagal: {e}")
+            return False
+
+    def _login_site(self, context, page, site_key, restored, login):
+        """Login site di browser, melewati login jika sesi tersimpan valid"""
+        def check():
+            if not self._session_valid(context, site_key):
+                return False
+            if SESSION_CHECKS[site_key]['open_page']:
+                page.goto(SESSION_CHECKS[site_key]['url'], timeout=30000, wait_until='domcontentloaded')
+            return True
+
+        return self._reuse_or_login(
+            site_key, restored,
+            check=check,
+            login=lambda: login(page),
+            export_state=context.storage_state,
+            on_discard=context.clear_cookies,
+        )
+
+    @contextmanager
+    def _browser(self):
+        """Browser untuk satu run: dari BrowserManager atau launch baru"""
+        _load_playwright()
+        if self.browser_manager is not None:
+            with self.metrics.span('browser_launch', mode='warm'):
+                browser = self.browser_manager.acquire()
+            try:
+                yield browser
+            finally:
+                self.browser_manager.release()
+            return
+
+        with sync_playwright() as p:
+            with self.metrics.span('browser_launch', mode='cold'):
                 browser = p.chromium.launch(headless=self.headless)
-                
-                # 1. Handle Pusaka (Sidoarjo)
-                if site in ['all', 'pusaka']:
-                    logger.info("--- Proses Pusaka (Lokasi: Sidoarjo) ---")
-                    context_pusaka = browser.new_context(
-                        viewport={'width': 1280, 'height': 720},
-                        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                        geolocation=COORD_PUSAKA,
-                        permissions=['geolocation']
-                    )
-                    page_pusaka = context_pusaka.new_page()
-                    try:
-                        if self.login_pusaka(page_pusaka):
-                            success, msg = self.do_presence_pusaka(page_pusaka)
-                            # Logic khusus Pusaka: Jika msg="Presensi Masuk berhasil...", info user
-                            results.append(('Pusaka', success, msg))
-                        else:
-                            results.append(('Pusaka', False, "Login Gagal"))
-                    except Exception as e:
-                        logger.error(f"Error Pusaka: {e}")
-                        results.append(('Pusaka', False, str(e)))
-                    context_pusaka.close()
-                
-                # 2. Handle Star-ASN (Samarinda)
-                if site in ['all', 'starasn']:
-                    logger.info("--- Proses Star-ASN (Lokasi: Samarinda) ---")
-                    context_star = browser.new_context(
-                        viewport={'width': 1280, 'height': 720},
-                        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                        geolocation=COORD_STARASN,
-                        permissions=['geolocation']
-                    )
-                    page_star = context_star.new_page()
-                    try:
-                        if self.login_starasn(page_star):
-                            success, msg = self.do_presence_starasn(page_star)
-                            results.append(('Star-ASN', success, msg))
-                        else:
-                            results.append(('Star-ASN', False, "Login Gagal"))
-                    except Exception as e:
-                        logger.error(f"Error Star-ASN: {e}")
-                        print(f"Error Star-ASN: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        results.append(('Star-ASN', False, str(e)))
-                    context_star.close()
-                
+            try:
+                yield browser
+            finally:
                 browser.close()
+
+    def _run_browser_sites(self, browser_sites, results):
+        """Jalankan login + presensi via Playwright untuk site yang tersisa"""
+        with self._browser() as browser:
+            # 1. Handle Pusaka (Sidoarjo)
+            if 'pusaka' in browser_sites:
+                logger.info("--- Proses Pusaka (Lokasi: Sidoarjo) ---")
+                context_pusaka, restored = self._new_context(browser, 'pusaka')
+                page_pusaka = context_pusaka.new_page()
+                try:
+                    if self._login_site(context_pusaka, page_pusaka, 'pusaka', restored, self.login_pusaka):
+                        success, msg = self._timed_presence('pusaka', self.do_presence_pusaka, page_pusaka)
+                        # Logic khusus Pusaka: Jika msg="Presensi Masuk berhasil...", info user
+                        results.append(('Pusaka', success, msg))
+                    else:
+                        results.append(('Pusaka', False, self._login_failed_message('pusaka')))
+                except Exception as e:
+                    logger.error(f"Error Pusaka: {e}")
+                    results.append(('Pusaka', False, str(e)))
+                context_pusaka.close()
             
-            # Send notification HANYA jika ada aksi penting (Berhasil Klik atau Gagal Error)
-            # Skip notifikasi jika statusnya hanya "Sudah Presensi" atau "Menunggu jam pulang"
-            should_notify = any("berhasil diklik" in str(r[2]) for r in results) or any(not r[1] for r in results)
-            
-            if should_notify:
-                all_success = all(r[1] for r in results)
-                message = "\n".join(f"- {name}: {msg}" for name, success, msg in results)
-                self.send_email_notification(success=all_success, message=message)
-            else:
-                logger.info("Tidak ada aktivitas presensi baru, skip email.")
+            # 2. Handle Star-ASN (Samarinda)
+            if 'starasn' in browser_sites:
+                logger.info("--- Proses Star-ASN (Lokasi: Samarinda) ---")
+                context_star, restored = self._new_context(browser, 'starasn')
+                page_star = context_star.new_page()
+                try:
+                    if self._login_site(context_star, page_star, 'starasn', restored, self.login_starasn):
+                        success, msg = self._timed_presence('starasn', self.do_presence_starasn, page_star)
+                        results.append(('Star-ASN', success, msg))
+                    else:
+                        results.append(('Star-ASN', False, self._login_failed_message('starasn')))
+                except Exception as e:
+                    logger.error(f"Error Star-ASN: {e}")
+                    print(f"Error Star-ASN: {e}")
+                    import traceback
+                    traceback.print_exc()
+                    results.append(('Star-ASN', False, str(e)))
+                context_star.close()
+
+    def _finish_run(self, results):
+        """Kirim notifikasi bila perlu, kembalikan [(nama site, success)]"""
+        # Send notification HANYA jika ada aksi penting (Berhasil Klik atau Gagal Error)
+        # Skip notifikasi jika statusnya hanya "Sudah Presensi" atau "Menunggu jam pulang"
+        should_notify = any("berhasil diklik" in str(r[2]) for r in results) or any(not r[1] for r in results)
+        
+        if should_notify:
+            all_success = all(r[1] for r in results)
+            message = "\n".join(f"- {name}: {msg}" for name, success, msg in results)
+            self.send_email_notification(success=all_success, message=message)
+        else:
+            logger.info("Tidak ada aktivitas presensi baru, skip email.")
+        
+        if self.session_store is not None:
+            logger.info(f"Session reuse: {self.session_store.stats()}")
+        if self.notifier is not None:
+            logger.info(f"Notifier: {self.notifier.stats()}")
+        if self.artifacts is not None:
+            logger.info(f"Artefak: {self.artifacts.stats()}")
+        self.wait_timer.log_report()
+        probe_report = self.probe_stats.report()
+        if probe_report:
+            logger.info(f"Deteksi status presensi: {probe_report}")
+        if self.route_filters:
+            logger.info(f"Route filter: { {key: f.report() for key, f in self.route_filters.items()} }")
+        
+        return [(r[0], r[1]) for r in results] 
+
+    def run_automation(self, site='all'):
+        """Jalankan otomatisasi dengan dynamic geolocation (span 'run' + export metrics)"""
+        self.run_id = new_run_id()
+        with bind_log_context(self.run_id, self.account_id), \
+                self.metrics.span('run', site=site, account=self.account_id or 'default') as span:
+            results = self._run_automation(site)
+            span.set(outcome='ok' if results and all(ok for _, ok in results) else 'failed')
+        if self.artifacts is not None:
+            self.artifacts.end_run(self.run_id)
+        logger.info(f"Metrics fase: {self.metrics.summary()}")
+        self.metrics.write_textfile()
+        return results
+
+    def _run_automation(self, site='all'):
+        results = []
+        browser_sites = [s for s in ('pusaka', 'starasn') if site in ['all', s] and s in self.credentials]
+        
+        try:
+            # Site mode HTTP dijalankan dulu tanpa browser
+            if 'starasn' in browser_sites and self.site_modes['starasn'] == 'http':
+                logger.info("--- Proses Star-ASN via HTTP (Lokasi: Samarinda) ---")
+                http_result = self.run_starasn_http()
+                if http_result is not None:
+                    results.append(('Star-ASN', *http_result))
+                    browser_sites.remove('starasn')
+
+            # Browser hanya diluncurkan jika masih ada site yang membutuhkannya
+            if browser_sites:
+                self._run_browser_sites(browser_sites, results)
             
-            return [(r[0], r[1]) for r in results] 
+            return self._finish_run(results)
             
         except Exception as e:
             logger.error(f"Error automation: {str(e)}")
@@ -405,22 +723,25 @@ Web Automation System
             return []
 
 
-def generate_random_times():
-    """Generate waktu random untuk absen hari ini"""
-    # Pagi: 06:00-07:30 (360-450 menit dari midnight)
-    morning_minutes = random.randint(360, 450)
-    morning_hour = morning_minutes // 60
-    morning_min = morning_minutes % 60
-    
-    # Sore: 16:30-19:00 (990-1140 menit dari midnight)
-    afternoon_minutes = random.randint(990, 1140)
-    afternoon_hour = afternoon_minutes // 60
-    afternoon_min = afternoon_minutes % 60
-    
-    return {
-        'morning': {'hour': morning_hour, 'minute': morning_min},
-        'afternoon': {'hour': afternoon_hour, 'minute': afternoon_min}
-    }
+# Jendela waktu absen (menit dari midnight)
+SCHEDULE_WINDOWS = {
+    'morning': (360, 450),     # Pagi: 06:00-07:30
+    'afternoon': (990, 1140),  # Sore: 16:30-19:00
+}
+
+
+def generate_random_times(windows=None, rng=random):
+    """Generate waktu random untuk absen hari ini
+
+    Args:
+        windows: {slot: (menit_awal, menit_akhir)}, default SCHEDULE_WINDOWS
+        rng: Sumber angka acak (random.Random untuk hasil yang bisa diulang)
+    """
+    times = {}
+    for slot, (start, end) in (windows or SCHEDULE_WINDOWS).items():
+        minutes = rng.randint(start, end)
+        times[slot] = {'hour': minutes // 60, 'minute': minutes % 60}
+    return times
 
 
 def select_platform():
@@ -446,10 +767,18 @@ def select_platform():
 
 
 def main():
+    init()
     parser = argparse.ArgumentParser(description='Web Automation')
     parser.add_argument('--test', action='store_true', help='Test run (Visual)')
     parser.add_argument('--site', choices=['all', 'pusaka', 'starasn'], default=None)
     parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--engine', choices=['sync', 'async'],
+                        default=os.getenv('AUTOMATION_ENGINE', 'sync'),
+                        help='sync: site berurutan, async: site berjalan bersamaan')
+    parser.add_argument('--accounts', default=os.getenv('FLEET_ACCOUNTS_FILE'),
+                        help='File akun JSON: mode fleet banyak akun (lihat fleet_runner.py)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profil CPU + alokasi memori setiap run, laporan di PROFILE_DIR (default profiles/)')
     args = parser.parse_args()
     
     # Logic Headless:
@@ -458,7 +787,33 @@ def main():
     headless = False 
     if args.headless: headless = True
     
-    automation = WebAutomation(headless=headless)
+    # Scheduler mode: satu Chromium hangat dipakai ulang untuk semua run
+    browser_manager = None
+    if args.accounts:
+        # Mode fleet: banyak akun, site dan koordinat dari file akun
+        from fleet_runner import FleetRunner, load_accounts, parse_rates
+        automation = FleetRunner(
+            load_accounts(args.accounts),
+            headless=headless,
+            concurrency=int(os.getenv('FLEET_CONCURRENCY', '4')),
+            site_rates=parse_rates(None),
+            site_timeout=int(os.getenv('SITE_TIMEOUT', '300'))
+        )
+    elif args.engine == 'async':
+        # Engine async meluncurkan browser sendiri di event loop setiap run
+        from async_automation import AsyncWebAutomation
+        automation = AsyncWebAutomation(
+            headless=headless,
+            site_timeout=int(os.getenv('SITE_TIMEOUT', '300'))
+        )
+    else:
+        if not args.test:
+            browser_manager = BrowserManager(
+                headless=headless,
+                max_runs=int(os.getenv('BROWSER_MAX_RUNS', '20')),
+                max_rss_mb=int(os.getenv('BROWSER_MAX_RSS_MB', '1024'))
+            )
+        automation = WebAutomation(headless=headless, browser_manager=browser_manager)
     
     # Jika site tidak di-specify via argumen, tanya user
     if args.site:
@@ -470,75 +825,54 @@ def main():
     
     if args.test:
         logger.info("=== MODE TEST ===")
-        results = automation.run_automation(site=site)
+        with profile_run(f'test_{site}', enabled=args.profile):
+            results = automation.run_automation(site=site)
         print("\n=== HASIL TEST ===")
         for name, success in results:
             status = "[OK]" if success else "[FAIL]"
             print(f"{name}: {status}")
     else:
-        # Random Time Scheduler Mode
+        # Random Time Scheduler Mode: job per akun di heap, tidur sampai job berikutnya
+        from scheduler import PlanStore, Scheduler
+
         logger.info("="*50)
         logger.info("Memulai Random Time Scheduler...")
-        
-        last_date = None
-        random_times = None
-        morning_done = False
-        afternoon_done = False
-        
-        while True:
-            try:
-                now = datetime.now()
-                today = now.date()
-                
-                # Generate waktu baru di awal hari baru
-                if last_date != today:
-                    random_times = generate_random_times()
-                    last_date = today
-                    morning_done = False
-                    afternoon_done = False
-                    
-                    logger.info(f"\n{'='*50}")
-                    logger.info(f"Hari Baru: {today.strftime('%A, %d %B %Y')}")
-                    logger.info(f"Waktu Absen Masuk : {random_times['morning']['hour']:02d}:{random_times['morning']['minute']:02d} WIB")
-                    logger.info(f"Waktu Absen Pulang: {random_times['afternoon']['hour']:02d}:{random_times['afternoon']['minute']:02d} WIB")
-                    logger.info(f"{'='*50}\n")
-                
-                if automation.is_working_day() and random_times:
-                    current_hour = now.hour
-                    current_min = now.minute
-                    
-                    # Check absen pagi
-                    if not morning_done:
-                        if (current_hour > random_times['morning']['hour'] or 
-                            (current_hour == random_times['morning']['hour'] and current_min >= random_times['morning']['minute'])):
-                            logger.info(f"⏰ Waktu Absen MASUK! ({now.strftime('%H:%M')})")
-                            automation.run_automation(site=site)
-                            morning_done = True
-                    
-                    # Check absen sore
-                    if not afternoon_done:
-                        if (current_hour > random_times['afternoon']['hour'] or 
-                            (current_hour == random_times['afternoon']['hour'] and current_min >= random_times['afternoon']['minute'])):
-                            logger.info(f"⏰ Waktu Absen PULANG! ({now.strftime('%H:%M')})")
-                            automation.run_automation(site=site)
-                            afternoon_done = True
-                    
-                    if morning_done and afternoon_done:
-                        logger.info(f"✅ Absen hari ini selesai. Menunggu hari berikutnya...")
-                else:
-                    if not automation.is_working_day():
-                        logger.info(f"Hari ini bukan hari kerja ({now.strftime('%A')}). Skip.")
-                
-                # Sleep 1 menit untuk cek lebih presisi
-                time.sleep(60)
-                
-            except KeyboardInterrupt:
-                logger.info("Scheduler stops.")
-                break
-            except Exception as e:
-                logger.error(f"Scheduler error: {e}")
-                time.sleep(60)
 
+        # Satu worker: BrowserManager terikat ke thread yang meluncurkannya, dan
+        # FleetRunner sudah paralel di dalam satu batch (batch bersamaan akan
+        # melipatgandakan batas konkurensi dan rate limit per site)
+        if args.accounts:
+            accounts = automation.accounts
+
+            def handler(account_ids, slot):
+                with profile_run(f'{slot}_{site}', enabled=args.profile):
+                    automation.run_automation(site=site, account_ids=account_ids)
+        else:
+            accounts = [{'id': automation.account_id or 'default', 'schedule': None}]
+
+            def handler(account_ids, slot):
+                with profile_run(f'{slot}_{site}', enabled=args.profile):
+                    automation.run_automation(site=site)
+
+        scheduler = Scheduler(
+            accounts,
+            handler,
+            random_times=lambda account: generate_random_times(account.get('schedule')),
+            plan_store=PlanStore(os.getenv('SCHEDULE_PLAN_FILE', 'schedule_plan.json')),
+            workers=1
+        )
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            logger.info("Scheduler stops.")
+        finally:
+            if browser_manager is not None:
+                # Tutup di thread worker yang memakai browser
+                scheduler.executor.submit(browser_manager.close).result()
+            scheduler.stop()
 
 if __name__ == "__main__":
-    main()
+    # Jalankan lewat modul 'web_automation', bukan salinan __main__ ini, agar
+    # async_automation/fleet_runner yang mengimpornya memakai kelas yang sama
+    import web_automation
+    web_automation.main()